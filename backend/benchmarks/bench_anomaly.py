@@ -0,0 +1,49 @@
+# backend/benchmarks/bench_anomaly.py
+#!/usr/bin/env python3
+"""
+Benchmark: стоимость обновления детектора аномалий на один снапшот
+Запуск из каталога backend: python -m benchmarks.bench_anomaly
+"""
+
+import random
+import time
+
+from src.anomaly import AnomalyDetector
+
+AGENTS = 1000
+ROUNDS = 20
+DISKS = 4
+
+
+def make_snapshot(ts):
+    return {
+        "timestamp": ts,
+        "cpu": {"usage": random.uniform(0, 100)},
+        "memory": {"used_percent": random.uniform(20, 80)},
+        "disks": [{"mountpoint": f"/mnt/{i}", "used_percent": random.uniform(10, 90)} for i in range(DISKS)],
+    }
+
+
+def main():
+    random.seed(42)
+    print("🧪 Anomaly detector benchmark")
+    print("=" * 60)
+
+    for seasonal in (False, True):
+        detector = AnomalyDetector(seasonal=seasonal)
+        snapshots = [make_snapshot(1_700_000_000 + r * 10) for r in range(ROUNDS)]
+
+        start = time.perf_counter()
+        for snapshot in snapshots:
+            for agent in range(AGENTS):
+                detector.update(f"agent-{agent}", snapshot)
+        elapsed = time.perf_counter() - start
+
+        updates = AGENTS * ROUNDS
+        print(f"seasonal={seasonal}: {updates} snapshots in {elapsed:.3f}s "
+              f"-> {elapsed / updates * 1e6:.1f} µs/snapshot, "
+              f"{updates / elapsed:,.0f} snapshots/s, series={detector.stats()['series']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# backend/benchmarks/bench_procfs.py
+#!/usr/bin/env python3
+"""
+Benchmark: /proc fast path против последовательности вызовов psutil
+Обе стороны собирают одно и то же: CPU (всего и по ядрам), память, swap,
+loadavg, счётчики по интерфейсам и дискам и заполнение всех разделов.
+Список разделов получается один раз заранее для обеих сторон
+Запуск из каталога backend: python -m benchmarks.bench_procfs
+"""
+
+import time
+
+import psutil
+
+from src import procfs
+from src.procfs import ProcReader
+
+ITERATIONS = 500
+
+
+def psutil_sequence(mountpoints):
+    """То, что быстрый путь заменяет в HostSampler, через psutil"""
+    psutil.cpu_percent(interval=None)
+    psutil.cpu_percent(interval=None, percpu=True)
+    psutil.virtual_memory()
+    psutil.swap_memory()
+    psutil.getloadavg()
+    psutil.net_io_counters(pernic=True)
+    psutil.disk_io_counters(perdisk=True)
+    for mountpoint in mountpoints:
+        try:
+            psutil.disk_usage(mountpoint)
+        except Exception:
+            pass
+
+
+def procfs_sequence(reader, mountpoints):
+    reader.sample()
+    for mountpoint in mountpoints:
+        try:
+            procfs.statvfs_usage(mountpoint)
+        except Exception:
+            pass
+
+
+def measure(fn, iterations=ITERATIONS):
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    print("🧪 Host sampling benchmark")
+    print("=" * 60)
+    if not procfs.available():
+        print("⚠️  /proc fast path is not available on this platform")
+        return
+
+    mountpoints = [p.mountpoint for p in psutil.disk_partitions()]
+    reader = ProcReader()
+    fast = measure(lambda: procfs_sequence(reader, mountpoints))
+    slow = measure(lambda: psutil_sequence(mountpoints))
+    reader.close()
+
+    print(f"partitions:      {len(mountpoints):8d}")
+    print(f"psutil sequence: {slow * 1e6:8.1f} µs/sample")
+    print(f"/proc fast path: {fast * 1e6:8.1f} µs/sample")
+    print(f"speedup:         {slow / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,4 @@
+# backend/conftest.py
+# Корневой conftest: pytest добавляет каталог backend в sys.path, поэтому
+# тесты и скрипты в src импортируют модули как src.* при запуске `pytest`
+# из backend без python -m
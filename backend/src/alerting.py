@@ -0,0 +1,444 @@
+# backend/src/alerting.py
+"""
+Streaming Alert Rule Engine
+Правила вида `cpu.usage > 90 for 2m` или `disks[*].used_percent > 85`
+вычисляются при приёме метрик; проверяются только правила, литеральный
+путь которых (до первого индекса) присутствует в снапшоте
+"""
+
+import itertools
+import json
+import logging
+import operator
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+_OPERATORS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+_EXPR_RE = re.compile(
+    r"^\s*(?P<path>[A-Za-z_][\w.\[\]*]*)\s*(?P<op>>=|<=|==|!=|>|<)\s*(?P<value>-?\d+(?:\.\d+)?)"
+    r"(?:\s+for\s+(?P<for>\d+)(?P<unit>[smh]))?\s*$"
+)
+# Поля, по которым идентифицируется элемент списка (диск, процесс, датчик, интерфейс).
+# pid раньше name: одноимённых процессов может быть много
+_INSTANCE_KEYS = ("mountpoint", "pid", "sensor_key", "device", "name")
+
+INACTIVE, PENDING, FIRING = "inactive", "pending", "firing"
+
+
+def parse_expression(expr: str) -> Dict[str, Any]:
+    """Разбирает выражение правила в путь, оператор, порог и длительность"""
+    match = _EXPR_RE.match(expr or "")
+    if not match:
+        raise ValueError(f"Invalid rule expression: {expr!r}")
+    duration = 0
+    if match.group("for"):
+        duration = int(match.group("for")) * _DURATION_UNITS[match.group("unit")]
+    path = match.group("path")
+    return {
+        "path": path,
+        "segments": split_path(path),
+        "op": match.group("op"),
+        "threshold": float(match.group("value")),
+        "for": duration,
+    }
+
+
+def split_path(path: str) -> List[str]:
+    """`disks[*].used_percent` -> ['disks', '*', 'used_percent']"""
+    segments = []
+    for part in path.split("."):
+        while "[" in part:
+            head, _, rest = part.partition("[")
+            index, _, part = rest.partition("]")
+            if head:
+                segments.append(head)
+            if index != "*" and not index.isdigit():
+                raise ValueError(f"Invalid index in path: {path!r}")
+            segments.append(index)
+        if part:
+            segments.append(part)
+    return segments
+
+
+def _instance_name(item: Any, index: int) -> str:
+    if isinstance(item, dict):
+        for key in _INSTANCE_KEYS:
+            if item.get(key) not in (None, ""):
+                if key == "pid" and item.get("create_time"):
+                    # Переиспользованный pid — другой процесс и другой экземпляр
+                    return f"{item['pid']}@{item['create_time']}"
+                return str(item[key])
+    return str(index)
+
+
+def extract_values(snapshot: Dict[str, Any], segments: List[str]) -> List[Tuple[str, float]]:
+    """Значения по пути; `*` разворачивается в отдельные экземпляры"""
+    results = []
+
+    def walk(node, i, instance):
+        if node is None:
+            return
+        if i == len(segments):
+            if isinstance(node, (int, float)) and not isinstance(node, bool):
+                results.append((instance, float(node)))
+            return
+        segment = segments[i]
+        if segment == "*":
+            if isinstance(node, list):
+                for idx, item in enumerate(node):
+                    name = _instance_name(item, idx)
+                    walk(item, i + 1, f"{instance}/{name}" if instance else name)
+        elif segment.isdigit():
+            if isinstance(node, list) and int(segment) < len(node):
+                walk(node[int(segment)], i + 1, instance)
+        elif isinstance(node, dict):
+            walk(node.get(segment), i + 1, instance)
+
+    walk(snapshot, 0, "")
+    return results
+
+
+class AlertRule:
+    """Правило алерта"""
+
+    def __init__(
+        self,
+        expr: str,
+        name: Optional[str] = None,
+        severity: str = "warning",
+        hysteresis: float = 0.0,
+        agent_id: Optional[str] = None,
+        rule_id: Optional[str] = None,
+    ):
+        parsed = parse_expression(expr)
+        if hysteresis < 0:
+            raise ValueError("hysteresis must be non-negative")
+        self.id = rule_id or uuid.uuid4().hex[:12]
+        self.expr = expr.strip()
+        self.name = name or self.expr
+        self.severity = severity
+        self.hysteresis = float(hysteresis)
+        self.agent_id = agent_id
+        self.path = parsed["path"]
+        self.segments = parsed["segments"]
+        # Литеральная часть пути до первого индекса: по ней правило индексируется
+        self.prefix = tuple(itertools.takewhile(lambda seg: seg != "*" and not seg.isdigit(), self.segments))
+        self.op = parsed["op"]
+        self.threshold = parsed["threshold"]
+        self.duration = parsed["for"]
+        self._compare = _OPERATORS[self.op]
+
+    def breached(self, value: float) -> bool:
+        return self._compare(value, self.threshold)
+
+    def recovered(self, value: float) -> bool:
+        """Условие восстановления с учётом гистерезиса"""
+        if self.op in (">", ">="):
+            return not self.breached(value + self.hysteresis)
+        if self.op in ("<", "<="):
+            return not self.breached(value - self.hysteresis)
+        return not self.breached(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "expr": self.expr,
+            "severity": self.severity,
+            "hysteresis": self.hysteresis,
+            "agent_id": self.agent_id,
+            "path": self.path,
+            "for": self.duration,
+        }
+
+
+class FileNotifier:
+    """Пишет события алертов в файл построчно в формате JSON"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def notify(self, event: Dict[str, Any]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, default=str) + "\n")
+
+
+class WebhookNotifier:
+    """Отправляет события алертов POST-запросом на webhook"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def notify(self, event: Dict[str, Any]):
+        import requests
+        requests.post(self.url, json=event, timeout=self.timeout)
+
+
+class _RuleNode:
+    """Узел индекса правил: правила с этим литеральным префиксом и дочерние узлы"""
+
+    __slots__ = ("rules", "children")
+
+    def __init__(self):
+        self.rules: List[AlertRule] = []
+        self.children: Dict[str, "_RuleNode"] = {}
+
+
+class AlertEngine:
+    """Индекс правил и состояния алертов по (правило, агент, экземпляр)"""
+
+    def __init__(self):
+        self.rules: Dict[str, AlertRule] = {}
+        # Индекс: агент (None — все агенты) -> дерево литеральных путей правил
+        self._index: Dict[Optional[str], _RuleNode] = {}
+        self._states: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+        # Экземпляры с состоянием: агент -> правило -> экземпляры (ключи _states)
+        self._instances: Dict[str, Dict[str, Set[str]]] = {}
+        self.notifiers: List[Any] = []
+        self._lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-notify")
+        self.evaluations = 0
+
+    # --- Правила ---
+
+    def add_rule(self, rule: AlertRule) -> AlertRule:
+        with self._lock:
+            if rule.id in self.rules:
+                self.remove_rule(rule.id)
+            self.rules[rule.id] = rule
+            node = self._index.setdefault(rule.agent_id, _RuleNode())
+            for segment in rule.prefix:
+                node = node.children.setdefault(segment, _RuleNode())
+            node.rules.append(rule)
+        return rule
+
+    def remove_rule(self, rule_id: str) -> bool:
+        with self._lock:
+            rule = self.rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            # Удаляем правило и опустевшие узлы на его пути
+            path = [self._index.get(rule.agent_id)]
+            for segment in rule.prefix:
+                path.append(path[-1].children.get(segment) if path[-1] is not None else None)
+            if path[-1] is not None and rule in path[-1].rules:
+                path[-1].rules.remove(rule)
+            for depth in range(len(rule.prefix), 0, -1):
+                node = path[depth]
+                if node is None or node.rules or node.children:
+                    break
+                del path[depth - 1].children[rule.prefix[depth - 1]]
+            for agent_id, by_rule in list(self._instances.items()):
+                for instance in by_rule.get(rule_id, ()):
+                    del self._states[(rule_id, agent_id, instance)]
+                by_rule.pop(rule_id, None)
+                if not by_rule:
+                    del self._instances[agent_id]
+            return True
+
+    def load_rules(self, path: str) -> int:
+        """Загружает правила из JSON файла (список объектов с полем expr)"""
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        for item in items:
+            self.add_rule(AlertRule(
+                expr=item["expr"],
+                name=item.get("name"),
+                severity=item.get("severity", "warning"),
+                hysteresis=float(item.get("hysteresis", 0.0)),
+                agent_id=item.get("agent_id"),
+                rule_id=item.get("id"),
+            ))
+        return len(items)
+
+    def add_notifier(self, notifier):
+        self.notifiers.append(notifier)
+
+    # --- Вычисление ---
+
+    def _candidate_rules(self, agent_id: str, snapshot: Dict[str, Any]):
+        """Правила, литеральный путь которых есть в снапшоте (остальные не просматриваются)"""
+        def walk(node: _RuleNode, value: Any):
+            if value is None:
+                return
+            yield from node.rules
+            if isinstance(value, dict):
+                for segment, child in node.children.items():
+                    if segment in value:
+                        yield from walk(child, value[segment])
+
+        for scope in (None, agent_id):
+            root = self._index.get(scope)
+            if root is not None:
+                yield from walk(root, snapshot)
+
+    def _set_state(self, key: Tuple[str, str, str], state: Dict[str, Any]):
+        self._states[key] = state
+        self._instances.setdefault(key[1], {}).setdefault(key[0], set()).add(key[2])
+
+    def _drop_state(self, key: Tuple[str, str, str]) -> Dict[str, Any]:
+        state = self._states.pop(key)
+        by_rule = self._instances[key[1]]
+        instances = by_rule[key[0]]
+        instances.discard(key[2])
+        if not instances:
+            del by_rule[key[0]]
+            if not by_rule:
+                del self._instances[key[1]]
+        return state
+
+    def evaluate(self, agent_id: str, snapshot: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Вычисляет затронутые снапшотом правила; возвращает события переходов состояний"""
+        now = snapshot.get("timestamp")
+        if now is None:
+            now = time.time()
+        events = []
+        with self._lock:
+            seen = {}
+            for rule in list(self._candidate_rules(agent_id, snapshot)):
+                self.evaluations += 1
+                instances = seen[rule.id] = set()
+                for instance, value in extract_values(snapshot, rule.segments):
+                    instances.add(instance)
+                    event = self._transition(rule, agent_id, instance, value, now)
+                    if event:
+                        events.append(event)
+            events.extend(self._expire_missing(agent_id, seen, now))
+        for event in events:
+            self._dispatch(event)
+        return events
+
+    def _transition(self, rule: AlertRule, agent_id: str, instance: str, value: float, now: float):
+        key = (rule.id, agent_id, instance)
+        state = self._states.get(key)
+
+        if state is None or state["state"] == INACTIVE:
+            if not rule.breached(value):
+                return None
+            state = {"state": PENDING, "since": now, "value": value}
+            self._set_state(key, state)
+            if rule.duration == 0:
+                return self._fire(rule, key, state, now)
+            return None
+
+        state["value"] = value
+        if state["state"] == PENDING:
+            if not rule.breached(value):
+                self._drop_state(key)
+                return None
+            if now - state["since"] >= rule.duration:
+                return self._fire(rule, key, state, now)
+            return None
+
+        # FIRING: снимаем только после выхода за порог с учётом гистерезиса
+        if rule.recovered(value):
+            self._drop_state(key)
+            return self._event("resolved", rule, key, value, now, state.get("fired_at"))
+        return None
+
+    def _expire_missing(self, agent_id: str, seen: Dict[str, set], now: float) -> List[Dict[str, Any]]:
+        """
+        Экземпляры, которых нет в снапшоте (диск отмонтирован, процесс завершился):
+        pending снимается, firing разрешается событием resolved
+        """
+        events = []
+        tracked = self._instances.get(agent_id)
+        if not tracked:
+            return events
+        # Только правила этого прохода и только их экземпляры у этого агента
+        stale = [(rule_id, instance) for rule_id, instances in seen.items()
+                 for instance in tracked.get(rule_id, set()) - instances]
+        for rule_id, instance in stale:
+            key = (rule_id, agent_id, instance)
+            state = self._drop_state(key)
+            if state["state"] == FIRING:
+                event = self._event("resolved", self.rules[key[0]], key, state["value"], now, state.get("fired_at"))
+                event["reason"] = "instance_missing"
+                events.append(event)
+        return events
+
+    def _fire(self, rule, key, state, now):
+        state["state"] = FIRING
+        state["fired_at"] = now
+        return self._event("firing", rule, key, state["value"], now, now)
+
+    @staticmethod
+    def _event(status, rule, key, value, now, fired_at):
+        return {
+            "status": status,
+            "rule_id": rule.id,
+            "rule": rule.name,
+            "expr": rule.expr,
+            "severity": rule.severity,
+            "agent_id": key[1],
+            "instance": key[2] or None,
+            "value": value,
+            "threshold": rule.threshold,
+            "fired_at": fired_at,
+            "timestamp": now,
+        }
+
+    def _dispatch(self, event: Dict[str, Any]):
+        for notifier in self.notifiers:
+            self._executor.submit(self._safe_notify, notifier, event)
+
+    @staticmethod
+    def _safe_notify(notifier, event):
+        try:
+            notifier.notify(event)
+        except Exception as e:
+            logger.warning(f"Alert notifier {type(notifier).__name__} failed: {e}")
+
+    def flush(self, timeout: float = 5.0):
+        """Дожидается доставки поставленных уведомлений"""
+        self._executor.submit(lambda: None).result(timeout=timeout)
+
+    # --- Запросы ---
+
+    def alerts(self, state: Optional[str] = None, agent_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            result = []
+            for (rule_id, aid, instance), st in self._states.items():
+                if state and st["state"] != state:
+                    continue
+                if agent_id and aid != agent_id:
+                    continue
+                rule = self.rules[rule_id]
+                result.append({
+                    "rule_id": rule_id,
+                    "rule": rule.name,
+                    "expr": rule.expr,
+                    "severity": rule.severity,
+                    "agent_id": aid,
+                    "instance": instance or None,
+                    "state": st["state"],
+                    "value": st["value"],
+                    "since": st["since"],
+                    "fired_at": st.get("fired_at"),
+                })
+            return result
+
+    def forget_agent(self, agent_id: str):
+        with self._lock:
+            for rule_id, instances in self._instances.pop(agent_id, {}).items():
+                for instance in instances:
+                    del self._states[(rule_id, agent_id, instance)]
+
+
+# Глобальный движок алертов
+alert_engine = AlertEngine()
@@ -0,0 +1,176 @@
+# backend/src/anomaly.py
+"""
+Incremental Anomaly Detection
+EWMA среднее и дисперсия на каждый ряд (агент + путь метрики) с O(1)
+состоянием, опционально с сезонными корзинами по часу суток
+"""
+
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .alerting import extract_values, split_path
+
+DEFAULT_SERIES = ("cpu.usage", "memory.used_percent", "disks[*].used_percent")
+DEFAULT_ALPHA = 0.1        # Вес нового значения в EWMA
+DEFAULT_THRESHOLD = 3.0    # |z|, начиная с которого точка считается аномальной
+DEFAULT_WARMUP = 10        # Сколько точек нужно ряду до выставления оценок
+SEASON_BUCKETS = 24        # Сезонные корзины: час суток
+# Нижняя граница σ: почти постоянный ряд (диск 41.00 → 41.01) не должен давать
+# огромный z. Абсолютная часть — в единицах рядов по умолчанию (проценты),
+# относительная — доля |среднего|
+MIN_STD = 0.1
+MIN_STD_RELATIVE = 0.01
+
+
+class _Series:
+    """Состояние одного ряда: EWMA среднее/дисперсия и сезонные корзины"""
+
+    __slots__ = ("mean", "var", "count", "seasonal", "score", "value", "timestamp")
+
+    def __init__(self, seasonal: bool):
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+        # Сезонные корзины: [mean, var, count] на каждый час суток
+        self.seasonal = [[0.0, 0.0, 0] for _ in range(SEASON_BUCKETS)] if seasonal else None
+        self.score = 0.0
+        self.value = 0.0
+        self.timestamp = 0
+
+
+def _section_present(snapshot: Dict[str, Any], segments: List[str]) -> bool:
+    """Есть ли в снапшоте секция ряда (литеральная часть пути до первого индекса)"""
+    node: Any = snapshot
+    for segment in segments:
+        if segment == "*" or segment.isdigit():
+            break
+        if not isinstance(node, dict):
+            return False
+        node = node.get(segment)
+    return node is not None
+
+
+def _ewma(mean: float, var: float, count: int, x: float, alpha: float) -> Tuple[float, float]:
+    if count == 0:
+        return x, 0.0
+    diff = x - mean
+    incr = alpha * diff
+    return mean + incr, (1 - alpha) * (var + diff * incr)
+
+
+class AnomalyDetector:
+    """Детектор аномалий, обновляемый при каждом приёме метрик"""
+
+    def __init__(
+        self,
+        series: Tuple[str, ...] = DEFAULT_SERIES,
+        alpha: float = DEFAULT_ALPHA,
+        threshold: float = DEFAULT_THRESHOLD,
+        warmup: int = DEFAULT_WARMUP,
+        seasonal: bool = False,
+    ):
+        self.series = [(path, split_path(path)) for path in series]
+        self.alpha = alpha
+        self.threshold = threshold
+        self.warmup = warmup
+        self.seasonal = seasonal
+        self._state: Dict[Tuple[str, str], _Series] = {}
+        self._anomalous: Dict[Tuple[str, str], None] = {}
+        # Ряды агента по путям: (агент, путь) -> имена рядов (для экземпляров, которые пропали)
+        self._names: Dict[Tuple[str, str], Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _score(self, state: _Series, x: float, bucket: Optional[List]) -> float:
+        # Сезонная база, если корзина уже прогрета, иначе общая
+        if bucket is not None and bucket[2] >= self.warmup:
+            mean, var = bucket[0], bucket[1]
+        elif state.count >= self.warmup:
+            mean, var = state.mean, state.var
+        else:
+            return 0.0
+        return (x - mean) / max(math.sqrt(var), MIN_STD, MIN_STD_RELATIVE * abs(mean))
+
+    def update(self, agent_id: str, snapshot: Dict[str, Any]) -> Dict[str, float]:
+        """Обновляет ряды агента значениями снапшота и возвращает оценки {ряд: z}"""
+        timestamp = snapshot.get("timestamp") or int(time.time())
+        hour = (int(timestamp) // 3600) % SEASON_BUCKETS
+        scores = {}
+        with self._lock:
+            for path, segments in self.series:
+                touched = set()
+                for instance, x in extract_values(snapshot, segments):
+                    name = path.replace("[*]", f"[{instance}]") if instance else path
+                    touched.add(name)
+                    key = (agent_id, name)
+                    state = self._state.get(key)
+                    if state is None:
+                        state = self._state[key] = _Series(self.seasonal)
+
+                    bucket = state.seasonal[hour] if state.seasonal is not None else None
+                    score = self._score(state, x, bucket)
+
+                    state.mean, state.var = _ewma(state.mean, state.var, state.count, x, self.alpha)
+                    state.count += 1
+                    if bucket is not None:
+                        bucket[0], bucket[1] = _ewma(bucket[0], bucket[1], bucket[2], x, self.alpha)
+                        bucket[2] += 1
+
+                    state.score = score
+                    state.value = x
+                    state.timestamp = timestamp
+                    if abs(score) >= self.threshold:
+                        self._anomalous[key] = None
+                    else:
+                        self._anomalous.pop(key, None)
+                    scores[name] = round(score, 3)
+
+                # Экземпляр пропал из присланной секции (диск отмонтирован) — ряд удаляется
+                known = self._names.get((agent_id, path), set())
+                if _section_present(snapshot, segments):
+                    for name in known - touched:
+                        del self._state[(agent_id, name)]
+                        self._anomalous.pop((agent_id, name), None)
+                    known = touched
+                else:
+                    known = known | touched
+                if known:
+                    self._names[(agent_id, path)] = known
+                else:
+                    self._names.pop((agent_id, path), None)
+        return scores
+
+    def anomalies(self, agent_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Ряды, последняя точка которых аномальна"""
+        with self._lock:
+            result = []
+            for key in self._anomalous:
+                if agent_id and key[0] != agent_id:
+                    continue
+                state = self._state[key]
+                result.append({
+                    "agent_id": key[0],
+                    "series": key[1],
+                    "score": round(state.score, 3),
+                    "value": state.value,
+                    "expected": round(state.mean, 3),
+                    "stddev": round(math.sqrt(state.var), 3),
+                    "timestamp": state.timestamp,
+                })
+            return sorted(result, key=lambda a: abs(a["score"]), reverse=True)
+
+    def forget(self, agent_id: str):
+        with self._lock:
+            for path, _ in self.series:
+                for name in self._names.pop((agent_id, path), ()):
+                    self._state.pop((agent_id, name), None)
+                    self._anomalous.pop((agent_id, name), None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"series": len(self._state), "anomalous": len(self._anomalous)}
+
+
+# Глобальный детектор аномалий
+anomaly_detector = AnomalyDetector()
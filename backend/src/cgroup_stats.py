@@ -0,0 +1,169 @@
+# backend/src/cgroup_stats.py
+"""
+cgroup v2 Container Reader
+Ресурсы контейнеров напрямую из /sys/fs/cgroup: cpu.stat, memory.current,
+memory.stat, io.stat, pids.current (сеть — из /proc/<pid>/net/dev процесса
+контейнера). Путь к cgroup определяется один раз на контейнер, затем все
+контейнеры читаются за один проход без обращений к Docker
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .procfs import ProcReader
+
+CGROUP_ROOT = "/sys/fs/cgroup"
+SYSTEMD, CGROUPFS = "systemd", "cgroupfs"
+
+
+def available(root: str = CGROUP_ROOT) -> bool:
+    """Единая иерархия cgroup v2 (есть cgroup.controllers в корне)"""
+    return os.path.exists(os.path.join(root, "cgroup.controllers"))
+
+
+def _read(path: str) -> str:
+    with open(path, "rb") as f:
+        return f.read().decode()
+
+
+def _read_optional(path: str) -> str:
+    """Файл контроллера; пустая строка, если контроллер для cgroup не включён"""
+    try:
+        return _read(path)
+    except FileNotFoundError:
+        return ""
+
+
+def _keyed(text: str) -> Dict[str, int]:
+    """Файлы вида "key value" (cpu.stat, memory.stat)"""
+    result = {}
+    for line in text.splitlines():
+        key, _, value = line.partition(" ")
+        if value:
+            result[key] = int(value)
+    return result
+
+
+def _io_bytes(text: str) -> Tuple[int, int]:
+    """io.stat: "8:0 rbytes=1 wbytes=2 ..." по устройствам -> сумма"""
+    read = write = 0
+    for line in text.splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes":
+                read += int(value)
+            elif key == "wbytes":
+                write += int(value)
+    return read, write
+
+
+class CgroupReader:
+    """Чтение статистики контейнеров из cgroup v2"""
+
+    def __init__(self, root: str = CGROUP_ROOT, proc_root: str = "/proc",
+                 driver: str = SYSTEMD, host_memory: Optional[int] = None):
+        self.root = root
+        self.proc_root = proc_root
+        self.driver = driver
+        self.host_memory = host_memory
+        self._paths: Dict[str, Optional[str]] = {}
+        # Предыдущие значения для дельт: id -> (monotonic, usage_usec, rx, tx, read, write)
+        self._prev: Dict[str, Tuple[float, int, int, int, int, int]] = {}
+
+    def _candidates(self, container_id: str) -> List[str]:
+        systemd = os.path.join(self.root, "system.slice", f"docker-{container_id}.scope")
+        cgroupfs = os.path.join(self.root, "docker", container_id)
+        return [systemd, cgroupfs] if self.driver == SYSTEMD else [cgroupfs, systemd]
+
+    def resolve(self, container_id: str) -> Optional[str]:
+        """Каталог cgroup контейнера (кэшируется; None — не найден)"""
+        if container_id in self._paths:
+            return self._paths[container_id]
+        path = next((p for p in self._candidates(container_id) if os.path.isdir(p)), None)
+        if path is not None:
+            self._paths[container_id] = path
+        return path
+
+    def forget(self, container_id: str):
+        self._paths.pop(container_id, None)
+        self._prev.pop(container_id, None)
+
+    def _network(self, path: str) -> Tuple[int, int]:
+        """Сетевые счётчики пространства имён контейнера (по первому процессу)"""
+        try:
+            pids = _read(os.path.join(path, "cgroup.procs")).split()
+            if not pids:
+                return 0, 0
+            with open(os.path.join(self.proc_root, pids[0], "net", "dev"), "rb") as f:
+                interfaces = ProcReader.parse_net_dev(f.read())
+        except OSError:
+            return 0, 0
+        rx = sum(n["bytes_recv"] for name, n in interfaces.items() if name != "lo")
+        tx = sum(n["bytes_sent"] for name, n in interfaces.items() if name != "lo")
+        return rx, tx
+
+    def read(self, container_id: str, name: str = "") -> Optional[Dict[str, Any]]:
+        """Статистика одного контейнера в полях модели ContainerStats"""
+        path = self.resolve(container_id)
+        if path is None:
+            return None
+        now = time.monotonic()
+        # Файлы отключённых контроллеров (memory, io, pids) отсутствуют —
+        # такие поля остаются нулевыми, как и в `docker stats`
+        cpu = _keyed(_read_optional(os.path.join(path, "cpu.stat")))
+        current = int(_read_optional(os.path.join(path, "memory.current")) or 0)
+        memory_stat = _keyed(_read_optional(os.path.join(path, "memory.stat")))
+        limit_text = _read_optional(os.path.join(path, "memory.max")).strip()
+        block_read, block_write = _io_bytes(_read_optional(os.path.join(path, "io.stat")))
+        pids = int(_read_optional(os.path.join(path, "pids.current")) or 0)
+        if not os.path.isdir(path):
+            # Контейнер остановлен — cgroup удалён
+            self.forget(container_id)
+            return None
+        rx, tx = self._network(path)
+
+        if limit_text in ("max", ""):
+            limit = self.host_memory or 0
+        else:
+            limit = int(limit_text)
+        # Как в `docker stats`: без неактивного файлового кэша
+        usage = max(current - memory_stat.get("inactive_file", 0), 0)
+        usage_usec = cpu.get("usage_usec", 0)
+
+        stats = {
+            "id": container_id[:12],
+            "name": name,
+            "cpu_percent": 0.0,
+            "memory_usage": usage,
+            "memory_limit": limit,
+            "memory_percent": round(usage / limit * 100.0, 2) if limit else 0.0,
+            "network_rx": rx,
+            "network_tx": tx,
+            "block_read": block_read,
+            "block_write": block_write,
+            "pids": pids,
+            "network_rx_per_sec": 0.0,
+            "network_tx_per_sec": 0.0,
+            "block_read_per_sec": 0.0,
+            "block_write_per_sec": 0.0,
+        }
+        prev = self._prev.get(container_id)
+        self._prev[container_id] = (now, usage_usec, rx, tx, block_read, block_write)
+        if prev is not None and now > prev[0]:
+            elapsed = now - prev[0]
+            # Процент одного ядра, как в `docker stats` (может быть больше 100)
+            stats["cpu_percent"] = round(max(usage_usec - prev[1], 0) / (elapsed * 1e6) * 100.0, 2)
+            for field, value, old in (("network_rx", rx, prev[2]), ("network_tx", tx, prev[3]),
+                                      ("block_read", block_read, prev[4]), ("block_write", block_write, prev[5])):
+                stats[f"{field}_per_sec"] = round(max(value - old, 0) / elapsed, 1)
+        return stats
+
+    def sweep(self, containers: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """Один проход по всем контейнерам {id: name}; ненайденные пропускаются"""
+        result = {}
+        for container_id, name in containers.items():
+            stats = self.read(container_id, name)
+            if stats is not None:
+                result[container_id] = stats
+        return result
@@ -0,0 +1,150 @@
+# backend/src/container_actions.py
+"""
+Container Actions
+Запуск, остановка и перезапуск контейнеров без блокировки event loop:
+через Engine API (POST /containers/{id}/{action}), а если сокет недоступен —
+асинхронным вызовом `docker` CLI. Пакетные действия выполняются параллельно
+с ограничением числа одновременных операций
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from .docker_api import DockerAPIError, DockerEngineAPI, encode_filters
+from .docker_state import docker_state
+
+ACTIONS = ("start", "stop", "restart")
+DEFAULT_TIMEOUT = 10       # Секунд на корректную остановку (docker stop -t)
+DEFAULT_PARALLELISM = 8
+MAX_PARALLELISM = 32
+MAX_TARGETS = 500
+# Запас поверх timeout: после него dockerd ещё отправляет SIGKILL и ждёт выхода
+GRACE = 5
+
+
+def _match_labels(labels: Dict[str, str], selector: List[str]) -> bool:
+    """Селектор в формате фильтра Docker: "key" или "key=value" (все условия сразу)"""
+    for item in selector:
+        key, sep, value = item.partition("=")
+        if key not in labels or (sep and labels[key] != value):
+            return False
+    return True
+
+
+class ContainerActions:
+    """Действия над контейнерами (одиночные и пакетные)"""
+
+    def __init__(self, api=None, state=None, parallelism: int = DEFAULT_PARALLELISM):
+        # Отдельный пул: пакетное действие не должно занимать соединения сбора метрик
+        self.api = api or DockerEngineAPI(max_connections=MAX_PARALLELISM)
+        self.state = state
+        self.parallelism = parallelism
+
+    async def _run_api(self, container_id: str, action: str, timeout: int) -> Dict[str, Any]:
+        params = {"t": timeout} if action != "start" else None
+        # 204 — выполнено, 304 — контейнер уже в нужном состоянии (пустой ответ в обоих случаях)
+        await self.api.arequest("POST", f"/containers/{container_id}/{action}", params=params, timeout=timeout + GRACE)
+        return {"status": "success"}
+
+    @staticmethod
+    async def _run_cli(container_id: str, action: str, timeout: int) -> Dict[str, Any]:
+        cmd = ["docker", action, container_id] if action == "start" else ["docker", action, "-t", str(timeout), container_id]
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout + GRACE)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return {"status": "error", "error": "Command timed out"}
+        if process.returncode != 0:
+            return {"status": "error", "error": stderr.decode(errors="replace")}
+        return {"status": "success"}
+
+    async def run(self, container_id: str, action: str, timeout: int = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+        """Одно действие; ошибки Docker возвращаются в результате, а не исключением"""
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action '{action}', expected one of: {', '.join(ACTIONS)}")
+        try:
+            if self.api.available:
+                # Без повтора через CLI: при обрыве действие могло уже выполниться
+                try:
+                    result = await self._run_api(container_id, action, timeout)
+                except DockerAPIError as e:
+                    result = {"status": "error", "error": e.message, "status_code": e.status_code}
+            else:
+                result = await self._run_cli(container_id, action, timeout)
+        except Exception as e:
+            result = {"status": "error", "error": str(e)}
+        return {"container_id": container_id, "action": action, **result}
+
+    async def select(self, labels: List[str]) -> List[str]:
+        """ID контейнеров (в том числе остановленных) по селектору меток"""
+        if self.state is not None and self.state.ready:
+            return [cid for cid, c in self.state.containers.items() if _match_labels(c.get("Labels") or {}, labels)]
+        if self.api.available:
+            containers = await self.api.aget("/containers/json", all=1, filters=encode_filters({"label": labels}))
+            return [c["Id"] for c in containers or []]
+        cmd = ["docker", "ps", "-aq", "--no-trunc"] + [arg for label in labels for arg in ("--filter", f"label={label}")]
+        process = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=DEFAULT_TIMEOUT)
+        if process.returncode != 0:
+            raise RuntimeError(stderr.decode(errors="replace").strip() or "docker ps failed")
+        return stdout.decode().split()
+
+    async def bulk(
+        self,
+        action: str,
+        container_ids: Optional[List[str]] = None,
+        labels: Optional[List[str]] = None,
+        timeout: int = DEFAULT_TIMEOUT,
+        parallelism: Optional[int] = None,
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Действие над списком контейнеров и/или всеми контейнерами с метками labels
+
+        Выполняется не больше parallelism операций одновременно; результат —
+        по каждому контейнеру в порядке запроса. on_progress(done, total)
+        вызывается после каждого контейнера
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action '{action}', expected one of: {', '.join(ACTIONS)}")
+        if not container_ids and not labels:
+            raise ValueError("container_ids or labels is required")
+        targets = list(dict.fromkeys(container_ids or []))
+        if labels:
+            targets += [cid for cid in await self.select(labels) if cid not in targets]
+        if len(targets) > MAX_TARGETS:
+            raise ValueError(f"too many containers: {len(targets)} > {MAX_TARGETS}")
+
+        limit = max(1, min(parallelism or self.parallelism, MAX_PARALLELISM))
+        semaphore = asyncio.Semaphore(limit)
+        done = 0
+
+        async def limited(container_id: str) -> Dict[str, Any]:
+            nonlocal done
+            async with semaphore:
+                result = await self.run(container_id, action, timeout)
+            done += 1
+            if on_progress is not None:
+                on_progress(done, len(targets))
+            return result
+
+        results = await asyncio.gather(*(limited(cid) for cid in targets))
+        succeeded = sum(1 for r in results if r["status"] == "success")
+        return {
+            "action": action,
+            "parallelism": limit,
+            "total": len(results),
+            "succeeded": succeeded,
+            "failed": len(results) - succeeded,
+            "results": results,
+        }
+
+
+# Глобальный исполнитель действий над контейнерами
+container_actions = ContainerActions(state=docker_state)
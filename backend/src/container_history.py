@@ -0,0 +1,158 @@
+# backend/src/container_history.py
+"""
+Per-container History
+Временные ряды метрик контейнеров по полному ID контейнера (переименование
+не разрывает ряд). Ряды хранятся компактными массивами с той же глубиной,
+что и metrics_history; запросы возвращают прореженные диапазоны
+"""
+
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional
+
+RETENTION = 3600      # Глубина истории в секундах (как у metrics_history)
+MAX_POINTS = 1800     # Максимум точек в ряду
+MIN_INTERVAL = 2.0    # Не чаще одной точки за столько секунд (потоки stats шлют раз в секунду)
+
+# Метрика -> typecode массива
+METRICS = {
+    "cpu_percent": "f",
+    "memory_usage": "q",
+    "memory_limit": "q",
+    "memory_percent": "f",
+    "network_rx_per_sec": "d",
+    "network_tx_per_sec": "d",
+    "block_read_per_sec": "d",
+    "block_write_per_sec": "d",
+    "pids": "l",
+}
+
+
+class _Series:
+    """Ряд одного контейнера: параллельные массивы значений"""
+
+    __slots__ = ("name", "timestamps", "values")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.timestamps = array("d")
+        self.values = {metric: array(code) for metric, code in METRICS.items()}
+
+    def append(self, timestamp: float, stats: Dict[str, Any]):
+        self.timestamps.append(timestamp)
+        for metric, values in self.values.items():
+            value = stats.get(metric) or 0
+            values.append(float(value) if values.typecode in "fd" else int(value))
+
+    def trim(self, horizon: float, max_points: int):
+        """Отбрасывает точки старше horizon и сверх max_points"""
+        drop = max(bisect_left(self.timestamps, horizon), len(self.timestamps) - max_points)
+        if drop > 0:
+            del self.timestamps[:drop]
+            for values in self.values.values():
+                del values[:drop]
+
+
+def downsample(timestamps, values, start: int, end: int, step: float) -> List[Dict[str, Any]]:
+    """Среднее, минимум и максимум по интервалам длиной step секунд"""
+    points = []
+    i = start
+    while i < end:
+        bucket = math.floor(timestamps[i] / step) * step
+        j = bisect_left(timestamps, bucket + step, i, end)
+        chunk = values[i:j]
+        points.append({
+            "timestamp": bucket,
+            "value": round(sum(chunk) / len(chunk), 2),
+            "min": round(min(chunk), 2),
+            "max": round(max(chunk), 2),
+            "samples": len(chunk),
+        })
+        i = j
+    return points
+
+
+class ContainerHistory:
+    """История метрик всех контейнеров"""
+
+    def __init__(self, retention: int = RETENTION, max_points: int = MAX_POINTS, min_interval: float = MIN_INTERVAL):
+        self.retention = retention
+        self.max_points = max_points
+        self.min_interval = min_interval
+        self._series: Dict[str, _Series] = {}
+
+    def record(self, container_id: str, timestamp: float, stats: Dict[str, Any]):
+        """Добавляет точку; слишком частые точки пропускаются"""
+        series = self._series.get(container_id)
+        if series is None:
+            series = self._series[container_id] = _Series(stats.get("name") or "")
+        elif series.timestamps and timestamp - series.timestamps[-1] < self.min_interval:
+            return
+        # Последнее имя контейнера — для поиска по имени после переименования
+        series.name = stats.get("name") or series.name
+        series.append(timestamp, stats)
+        series.trim(timestamp - self.retention, self.max_points)
+
+    def prune(self, now: float):
+        """Удаляет устаревшие точки и опустевшие ряды (удалённых контейнеров)"""
+        horizon = now - self.retention
+        for container_id in list(self._series):
+            series = self._series[container_id]
+            series.trim(horizon, self.max_points)
+            if not series.timestamps:
+                del self._series[container_id]
+
+    def resolve(self, ref: str) -> Optional[str]:
+        """Полный ID по ID, однозначному префиксу ID или имени контейнера"""
+        if ref in self._series:
+            return ref
+        matches = [cid for cid in self._series if cid.startswith(ref)]
+        if not matches:
+            matches = [cid for cid, s in self._series.items() if s.name == ref.lstrip("/")]
+        return matches[0] if len(matches) == 1 else None
+
+    def query(self, container_id: str, metric: str, since: float,
+              until: Optional[float] = None, step: Optional[float] = None, limit: int = 100) -> Dict[str, Any]:
+        """
+        Точки метрики в диапазоне [since, until], прореженные до не более limit
+        интервалов (step по умолчанию подбирается по длине диапазона)
+        """
+        if metric not in METRICS:
+            raise ValueError(f"unknown metric '{metric}', expected one of: {', '.join(METRICS)}")
+        if not 1 <= limit <= self.max_points:
+            raise ValueError(f"limit must be between 1 and {self.max_points}")
+        series = self._series[container_id]
+        timestamps, values = series.timestamps, series.values[metric]
+        start = bisect_left(timestamps, since)
+        end = bisect_right(timestamps, until) if until is not None else len(timestamps)
+        if step is None or step <= 0:
+            span = (until if until is not None else timestamps[-1] if timestamps else since) - since
+            step = max(span / max(limit, 1), self.min_interval)
+        points = downsample(timestamps, values, start, end, step)[-limit:] if end > start else []
+        raw = values[start:end]
+        return {
+            "container_id": container_id,
+            "name": series.name,
+            "metric": metric,
+            "step": step,
+            "data_points": points,
+            "count": len(points),
+            "statistics": {
+                "min": round(min(raw), 2) if raw else None,
+                "max": round(max(raw), 2) if raw else None,
+                "avg": round(sum(raw) / len(raw), 2) if raw else None,
+                "last": round(raw[-1], 2) if raw else None,
+            },
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер хранилища"""
+        return {
+            "containers": len(self._series),
+            "points": sum(len(s.timestamps) for s in self._series.values()),
+        }
+
+
+# Глобальная история метрик контейнеров
+container_history = ContainerHistory()
@@ -0,0 +1,256 @@
+# backend/src/container_stats.py
+"""
+Container Stats Collector
+По одной потоковой подписке /containers/{id}/stats на каждый запущенный
+контейнер (или общий проход по cgroup v2, см. cgroup_stats.py): CPU %,
+память, сеть и блочный ввод-вывод (с дельтами), pids.
+Последние значения хранятся в памяти, /api/v1/docker/metrics читает их сразу
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import psutil
+
+from .cgroup_stats import CgroupReader, available as cgroups_available
+from .container_history import ContainerHistory, container_history
+from .docker_api import DockerAPIError, DockerEngineAPI, encode_filters
+from .docker_state import docker_state
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_INTERVAL = 5.0  # Как часто сверять подписки со списком запущенных контейнеров
+SAMPLE_INTERVAL = 2.0     # Период cgroup-прохода
+RETRY_DELAY = 2.0
+# Каждая подписка держит своё соединение — отдельный пул, чтобы не занимать общий
+MAX_STREAMS = 500
+
+
+def _parse_started_at(value: str) -> float:
+    """State.StartedAt (RFC 3339 с наносекундами) -> unix time"""
+    if not value or value.startswith("0001-"):
+        return 0.0
+    try:
+        # Python не разбирает наносекунды: оставляем микросекунды
+        main, _, rest = value.rstrip("Z").partition(".")
+        return datetime.fromisoformat(main + "+00:00").timestamp() + float("0." + (rest[:6] or "0"))
+    except ValueError:
+        return 0.0
+
+
+def _block_io(raw: Dict[str, Any]) -> Tuple[int, int]:
+    read = write = 0
+    for entry in (raw.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        op = (entry.get("op") or "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return read, write
+
+
+def compute_stats(raw: Dict[str, Any], prev: Optional[Dict[str, Any]] = None,
+                  elapsed: float = 0.0) -> Dict[str, Any]:
+    """
+    Образец Engine stats API -> поля модели ContainerStats (+ скорости)
+
+    CPU и память считаются так же, как в `docker stats`: доля CPU — по дельте
+    относительно системного времени, память — без файлового кэша
+    """
+    cpu = raw.get("cpu_stats") or {}
+    precpu = raw.get("precpu_stats") or {}
+    cpu_delta = (cpu.get("cpu_usage") or {}).get("total_usage", 0) - (precpu.get("cpu_usage") or {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online = cpu.get("online_cpus") or len((cpu.get("cpu_usage") or {}).get("percpu_usage") or []) or 1
+    cpu_percent = cpu_delta / system_delta * online * 100.0 if cpu_delta > 0 and system_delta > 0 else 0.0
+
+    memory = raw.get("memory_stats") or {}
+    mem_stats = memory.get("stats") or {}
+    # cgroup v1: cache, cgroup v2: inactive_file
+    cache = mem_stats.get("total_inactive_file", mem_stats.get("inactive_file", mem_stats.get("cache", 0)))
+    usage = max(memory.get("usage", 0) - cache, 0)
+    limit = memory.get("limit", 0)
+
+    rx = tx = 0
+    for net in (raw.get("networks") or {}).values():
+        rx += net.get("rx_bytes", 0)
+        tx += net.get("tx_bytes", 0)
+    block_read, block_write = _block_io(raw)
+
+    stats = {
+        "id": (raw.get("id") or "")[:12],
+        "name": (raw.get("name") or "").lstrip("/"),
+        "cpu_percent": round(cpu_percent, 2),
+        "memory_usage": usage,
+        "memory_limit": limit,
+        "memory_percent": round(usage / limit * 100.0, 2) if limit else 0.0,
+        "network_rx": rx,
+        "network_tx": tx,
+        "block_read": block_read,
+        "block_write": block_write,
+        "pids": (raw.get("pids_stats") or {}).get("current", 0) or 0,
+    }
+    # Скорости относительно предыдущего образца того же контейнера
+    for field in ("network_rx", "network_tx", "block_read", "block_write"):
+        if prev is not None and elapsed > 0:
+            stats[f"{field}_per_sec"] = round(max(stats[field] - prev[field], 0) / elapsed, 1)
+        else:
+            stats[f"{field}_per_sec"] = 0.0
+    return stats
+
+
+class ContainerStatsCollector:
+    """
+    Статистика запущенных контейнеров
+
+    Если cgroup контейнера доступен (cgroup v2 на том же хосте), он читается
+    общим проходом раз в sample_interval; иначе — потоковая подписка Engine API
+    """
+
+    def __init__(self, api=None, state=None, cgroups: Optional[CgroupReader] = None,
+                 history: Optional[ContainerHistory] = None, reconcile_interval: float = RECONCILE_INTERVAL,
+                 sample_interval: float = SAMPLE_INTERVAL):
+        self.api = api or DockerEngineAPI(max_connections=MAX_STREAMS)
+        # Кэш состояния Docker (docker_state): если готов, список запущенных берётся из него
+        self.state = state
+        self.cgroups = cgroups
+        # Каждый образец также попадает в историю контейнера (container_history)
+        self.history = history
+        self.reconcile_interval = reconcile_interval
+        self.sample_interval = sample_interval
+        self.latest: Dict[str, Dict[str, Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._swept: Dict[str, str] = {}  # id -> имя контейнера, читаемого из cgroup
+        self._meta: Dict[str, Tuple[int, float]] = {}  # restart_count, started_at
+
+    async def _running(self) -> Dict[str, str]:
+        """Запущенные контейнеры: {id: имя}"""
+        if self.state is not None and self.state.ready:
+            containers = [c for c in self.state.containers.values() if c.get("State") == "running"]
+        else:
+            containers = await self.api.aget("/containers/json", filters=encode_filters({"status": "running"})) or []
+        return {c["Id"]: ((c.get("Names") or [""])[0]).lstrip("/") for c in containers}
+
+    async def _load_meta(self, container_id: str):
+        """restart_count и время запуска — один inspect на запуск контейнера"""
+        inspect = await self.api.aget(f"/containers/{container_id}/json")
+        state = inspect.get("State") or {}
+        self._meta[container_id[:12]] = (int(inspect.get("RestartCount", 0) or 0), _parse_started_at(state.get("StartedAt", "")))
+
+    def _store(self, container_id: str, stats: Dict[str, Any]):
+        short_id = container_id[:12]
+        restart_count, started_at = self._meta.get(short_id, (0, 0.0))
+        now = time.time()
+        stats["id"] = short_id
+        stats["restart_count"] = restart_count
+        stats["uptime"] = int(now - started_at) if started_at else 0
+        stats["updated_at"] = now
+        self.latest[short_id] = stats
+        if self.history is not None:
+            self.history.record(container_id, now, stats)
+
+    async def _follow(self, container_id: str):
+        """Читает поток статистики контейнера, пока тот работает"""
+        short_id = container_id[:12]
+        while True:
+            try:
+                await self._load_meta(container_id)
+                prev, prev_at = None, 0.0
+                async for raw in self.api.stream(f"/containers/{container_id}/stats", params={"stream": 1}):
+                    now = time.monotonic()
+                    stats = compute_stats(raw, prev, now - prev_at if prev else 0.0)
+                    self._store(container_id, stats)
+                    prev, prev_at = stats, now
+                return  # Поток закончился: контейнер остановлен
+            except asyncio.CancelledError:
+                raise
+            except DockerAPIError as e:
+                if e.status_code == 404:
+                    return
+                logger.warning(f"Stats stream for {short_id} failed: {e}")
+            except Exception as e:
+                logger.warning(f"Stats stream for {short_id} failed: {e}")
+            await asyncio.sleep(RETRY_DELAY)
+
+    def _forget(self, container_id: str):
+        short_id = container_id[:12]
+        self.latest.pop(short_id, None)
+        self._meta.pop(short_id, None)
+        self._swept.pop(container_id, None)
+        if self.cgroups is not None:
+            self.cgroups.forget(container_id)
+
+    async def reconcile(self):
+        """Распределяет запущенные контейнеры между cgroup-проходом и подписками"""
+        running = await self._running()
+        if self.cgroups is not None and self.state is not None:
+            self.cgroups.driver = self.state.info.get("CgroupDriver") or self.cgroups.driver
+
+        for container_id in list(self._tasks):
+            task = self._tasks[container_id]
+            if container_id not in running or task.done():
+                task.cancel()
+                del self._tasks[container_id]
+                if container_id not in running:
+                    self._forget(container_id)
+        for container_id in list(self._swept):
+            if container_id not in running:
+                self._forget(container_id)
+
+        new_swept = []
+        for container_id, name in running.items():
+            if container_id in self._tasks or container_id in self._swept:
+                continue
+            if self.cgroups is not None and self.cgroups.resolve(container_id):
+                self._swept[container_id] = name
+                new_swept.append(container_id)
+            else:
+                self._tasks[container_id] = asyncio.create_task(self._follow(container_id))
+        if new_swept:
+            await asyncio.gather(*(self._load_meta(c) for c in new_swept), return_exceptions=True)
+
+    async def sweep(self):
+        """Читает все cgroup-контейнеры за один проход (файловый ввод-вывод — в потоке)"""
+        if not self._swept:
+            return
+        results = await asyncio.to_thread(self.cgroups.sweep, dict(self._swept))
+        for container_id, stats in results.items():
+            self._store(container_id, stats)
+
+    async def run(self):
+        """Фоновая задача: поддерживает подписки и выполняет cgroup-проходы"""
+        last_reconcile = 0.0
+        while True:
+            if self.api.available:
+                try:
+                    if time.monotonic() - last_reconcile >= self.reconcile_interval:
+                        last_reconcile = time.monotonic()
+                        await self.reconcile()
+                    await self.sweep()
+                except Exception as e:
+                    logger.warning(f"Container stats collection failed: {e}")
+            await asyncio.sleep(self.sample_interval)
+
+    async def stop(self):
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Последние значения по всем контейнерам (формат ContainerStats)"""
+        return list(self.latest.values())
+
+    def get(self, container_id: str) -> Optional[Dict[str, Any]]:
+        return self.latest.get(container_id[:12])
+
+
+# Глобальный сборщик статистики контейнеров
+container_stats_collector = ContainerStatsCollector(
+    state=docker_state,
+    history=container_history,
+    cgroups=CgroupReader(host_memory=psutil.virtual_memory().total) if cgroups_available() else None,
+)
@@ -0,0 +1,178 @@
+# backend/src/disk_probe.py
+"""
+Timeout-guarded Disk Enumeration
+Использование дисков собирается в отдельных потоках с таймаутом на каждую
+точку монтирования. Зависшие (NFS/CIFS) точки попадают в карантин с
+экспоненциальной задержкой, результаты кэшируются с TTL — один проблемный
+диск портит только свою запись, а не весь ответ API
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 2.0     # Таймаут на одну точку монтирования
+CACHE_TTL = 30.0        # Время жизни успешного результата
+BACKOFF_BASE = 30.0     # Первый карантин после таймаута
+BACKOFF_MAX = 900.0     # Максимальный карантин
+
+OK, STALE, TIMEOUT, ERROR = "ok", "stale", "timeout", "error"
+
+
+class _MountState:
+    """Кэш и карантин одной точки монтирования"""
+
+    __slots__ = ("usage", "updated_at", "error", "failures", "quarantined_until", "probe")
+
+    def __init__(self):
+        self.usage: Optional[Dict[str, Any]] = None
+        self.updated_at = 0.0
+        self.error: Optional[str] = None
+        self.failures = 0
+        self.quarantined_until = 0.0
+        # Событие завершения проверки, которая ещё выполняется
+        self.probe: Optional[threading.Event] = None
+
+
+def _usage(mountpoint: str) -> Dict[str, Any]:
+    usage = psutil.disk_usage(mountpoint)
+    return {"total": usage.total, "used": usage.used, "free": usage.free, "percent": usage.percent}
+
+
+class DiskUsageCollector:
+    """Сбор disk_usage по всем точкам монтирования без риска зависнуть"""
+
+    def __init__(
+        self,
+        timeout: float = PROBE_TIMEOUT,
+        ttl: float = CACHE_TTL,
+        backoff_base: float = BACKOFF_BASE,
+        backoff_max: float = BACKOFF_MAX,
+        usage_fn: Callable[[str], Dict[str, Any]] = _usage,
+        partitions_fn: Callable[[], List[Any]] = psutil.disk_partitions,
+    ):
+        self.timeout = timeout
+        self.ttl = ttl
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._usage_fn = usage_fn
+        self._partitions_fn = partitions_fn
+        self._mounts: Dict[str, _MountState] = {}
+        self._lock = threading.Lock()
+
+    def _probe_worker(self, mountpoint: str, state: _MountState, done: threading.Event):
+        """Выполняется в потоке проверки; может зависнуть навсегда на мёртвом NFS"""
+        try:
+            usage = self._usage_fn(mountpoint)
+            error = None
+        except Exception as e:
+            usage, error = None, str(e) or e.__class__.__name__
+        with self._lock:
+            # Результат поздней проверки тоже идёт в кэш — точка выходит из карантина
+            if usage is not None:
+                state.usage = usage
+                state.error = None
+                state.failures = 0
+                state.quarantined_until = 0.0
+            else:
+                state.error = error
+            state.updated_at = time.time()
+            state.probe = None
+        done.set()
+
+    def _start_probe(self, mountpoint: str, state: _MountState) -> threading.Event:
+        done = threading.Event()
+        state.probe = done
+        # Поток-демон: зависший вызов statfs не блокирует завершение процесса
+        threading.Thread(
+            target=self._probe_worker,
+            args=(mountpoint, state, done),
+            name=f"disk-probe:{mountpoint}",
+            daemon=True,
+        ).start()
+        return done
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """
+        Использование всех точек монтирования
+
+        Блокирует не дольше timeout: проверки идут параллельно. Каждая запись
+        содержит status: ok, stale (кэш; точка в карантине), timeout или error
+        """
+        now = time.time()
+        partitions = self._partitions_fn()
+        waits = []
+        with self._lock:
+            seen = set()
+            for partition in partitions:
+                mountpoint = partition.mountpoint
+                seen.add(mountpoint)
+                state = self._mounts.get(mountpoint)
+                if state is None:
+                    state = self._mounts[mountpoint] = _MountState()
+                fresh = state.updated_at and now - state.updated_at < self.ttl
+                if fresh or state.probe is not None or state.quarantined_until > now:
+                    continue
+                waits.append((mountpoint, state, self._start_probe(mountpoint, state)))
+            # Отмонтированные точки забываем
+            for mountpoint in self._mounts.keys() - seen:
+                del self._mounts[mountpoint]
+
+        deadline = time.monotonic() + self.timeout
+        for mountpoint, state, done in waits:
+            if done.wait(max(0.0, deadline - time.monotonic())):
+                continue
+            with self._lock:
+                if state.probe is done:
+                    state.failures += 1
+                    backoff = min(self.backoff_base * 2 ** (state.failures - 1), self.backoff_max)
+                    state.quarantined_until = time.time() + backoff
+                    logger.warning(f"Disk probe for {mountpoint} timed out, quarantined for {backoff:.0f}s")
+
+        now = time.time()
+        result = []
+        with self._lock:
+            for partition in partitions:
+                state = self._mounts.get(partition.mountpoint)
+                if state is None:
+                    continue
+                entry = {
+                    "device": partition.device,
+                    "mountpoint": partition.mountpoint,
+                    "fstype": partition.fstype,
+                    "total": None,
+                    "used": None,
+                    "free": None,
+                    "percent": None,
+                    "updated_at": state.updated_at or None,
+                }
+                if state.usage is not None:
+                    entry.update(state.usage)
+                if state.probe is not None or state.quarantined_until > now:
+                    entry["status"] = STALE if state.usage is not None else TIMEOUT
+                elif state.error is not None:
+                    entry["status"] = ERROR
+                    entry["error"] = state.error
+                else:
+                    entry["status"] = OK
+                result.append(entry)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Состояние кэша и карантина"""
+        now = time.time()
+        with self._lock:
+            return {
+                "mounts": len(self._mounts),
+                "quarantined": sorted(m for m, s in self._mounts.items() if s.quarantined_until > now),
+                "probes_in_flight": sum(1 for s in self._mounts.values() if s.probe is not None),
+            }
+
+
+# Глобальный сборщик использования дисков
+disk_usage_collector = DiskUsageCollector()
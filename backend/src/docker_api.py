@@ -0,0 +1,187 @@
+# backend/src/docker_api.py
+"""
+Docker Engine API Client
+Клиент Docker Engine API поверх unix-сокета: долгоживущий пул HTTP-соединений
+(keep-alive) вместо запуска `docker` CLI на каждый запрос. Есть синхронный и
+асинхронный интерфейс; CLI в docker_simple.py остаётся запасным вариантом
+"""
+
+import asyncio
+import json
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+DEFAULT_TIMEOUT = 5.0
+MAX_CONNECTIONS = 10
+
+# Сокеты по умолчанию: Linux и Docker Desktop на macOS
+SOCKET_CANDIDATES = [
+    "/var/run/docker.sock",
+    os.path.expanduser("~/.docker/run/docker.sock"),
+]
+
+
+class DockerAPIError(Exception):
+    """Ошибка, которую вернул Docker Engine (HTTP 4xx/5xx)"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+class DockerUnavailable(DockerAPIError):
+    """Сокет Docker недоступен — можно переходить на CLI"""
+
+    def __init__(self, message: str):
+        super().__init__(503, message)
+
+
+def find_socket() -> Optional[str]:
+    """Путь к сокету Docker: DOCKER_HOST (unix://) или стандартные расположения"""
+    docker_host = os.environ.get("DOCKER_HOST", "")
+    if docker_host.startswith("unix://"):
+        return docker_host[len("unix://"):]
+    if docker_host:
+        return None  # tcp:// и ssh:// обслуживает только CLI
+    for path in SOCKET_CANDIDATES:
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def encode_filters(filters: Dict[str, Any]) -> str:
+    """Фильтры в формате Engine API: {"status": ["running"]} -> JSON-строка"""
+    return json.dumps({k: v if isinstance(v, list) else [v] for k, v in filters.items()})
+
+
+class DockerEngineAPI:
+    """Пул соединений к Docker Engine API по unix-сокету"""
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = MAX_CONNECTIONS,
+    ):
+        self.socket_path = socket_path or find_socket()
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.Client] = None
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._async_loop = None
+
+    @property
+    def available(self) -> bool:
+        return bool(self.socket_path) and os.path.exists(self.socket_path)
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+
+    def _sync(self) -> httpx.Client:
+        if self._client is None:
+            transport = httpx.HTTPTransport(uds=self.socket_path, limits=self._limits())
+            self._client = httpx.Client(transport=transport, base_url="http://docker", timeout=self.timeout)
+        return self._client
+
+    def _async(self) -> httpx.AsyncClient:
+        # Пул асинхронных соединений привязан к event loop
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            transport = httpx.AsyncHTTPTransport(uds=self.socket_path, limits=self._limits())
+            self._async_client = httpx.AsyncClient(transport=transport, base_url="http://docker", timeout=self.timeout)
+            self._async_loop = loop
+        return self._async_client
+
+    @staticmethod
+    def _decode(response: httpx.Response) -> Any:
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise DockerAPIError(response.status_code, message)
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    def _check(self):
+        if not self.available:
+            raise DockerUnavailable("Docker socket not found")
+
+    def request(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                timeout: Optional[float] = None) -> Any:
+        """Синхронный запрос; ответ — разобранный JSON"""
+        self._check()
+        try:
+            response = self._sync().request(method, path, params=params, timeout=timeout or self.timeout)
+        except httpx.TransportError as e:
+            raise DockerUnavailable(f"Docker API request failed: {e}")
+        return self._decode(response)
+
+    async def arequest(self, method: str, path: str, params: Optional[Dict[str, Any]] = None,
+                       timeout: Optional[float] = None) -> Any:
+        """Асинхронный запрос; ответ — разобранный JSON"""
+        self._check()
+        try:
+            response = await self._async().request(method, path, params=params, timeout=timeout or self.timeout)
+        except httpx.TransportError as e:
+            raise DockerUnavailable(f"Docker API request failed: {e}")
+        return self._decode(response)
+
+    async def stream(self, path: str, params: Optional[Dict[str, Any]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Потоковый ответ (events, stats): JSON-объекты по одному на строку, без таймаута чтения"""
+        self._check()
+        timeout = httpx.Timeout(self.timeout, read=None)
+        try:
+            async with self._async().stream("GET", path, params=params, timeout=timeout) as response:
+                if response.status_code >= 400:
+                    await response.aread()
+                    self._decode(response)
+                async for line in response.aiter_lines():
+                    if line.strip():
+                        yield json.loads(line)
+        except httpx.TransportError as e:
+            raise DockerUnavailable(f"Docker API stream failed: {e}")
+
+    def get(self, path: str, **params) -> Any:
+        return self.request("GET", path, params=params or None)
+
+    async def aget(self, path: str, **params) -> Any:
+        return await self.arequest("GET", path, params=params or None)
+
+    # --- Основные ресурсы ---
+
+    def info(self) -> Dict[str, Any]:
+        return self.get("/info")
+
+    def version(self) -> Dict[str, Any]:
+        return self.get("/version")
+
+    def containers(self, all: bool = True) -> List[Dict[str, Any]]:
+        return self.get("/containers/json", all=1 if all else 0)
+
+    def images(self) -> List[Dict[str, Any]]:
+        return self.get("/images/json")
+
+    def networks(self) -> List[Dict[str, Any]]:
+        return self.get("/networks")
+
+    def volumes(self) -> List[Dict[str, Any]]:
+        return (self.get("/volumes") or {}).get("Volumes") or []
+
+    def close(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+
+# Глобальный клиент Docker Engine API
+docker_api = DockerEngineAPI()
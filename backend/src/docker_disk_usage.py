@@ -0,0 +1,145 @@
+# backend/src/docker_disk_usage.py
+"""
+Docker Disk Usage
+Размеры образов (общие и уникальные слои), контейнеров и томов одним
+запросом /system/df. Запрос дорогой для dockerd (обход слоёв и томов),
+поэтому выполняется в фоне редко, а ответы API дополняются из кэша
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from .docker_api import docker_api
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 300.0   # Раз в 5 минут
+DF_TIMEOUT = 60.0          # /system/df на большом хосте может идти десятки секунд
+
+
+def _short(image_id: str) -> str:
+    if image_id.startswith("sha256:"):
+        image_id = image_id[7:]
+    return image_id[:12]
+
+
+def _size(value: Any) -> Optional[int]:
+    """-1 в ответе Docker — значение не вычислено"""
+    if value is None or int(value) < 0:
+        return None
+    return int(value)
+
+
+class DockerDiskUsage:
+    """Кэш ответа /system/df"""
+
+    def __init__(self, api=None, interval: float = REFRESH_INTERVAL, timeout: float = DF_TIMEOUT):
+        self.api = api or docker_api
+        self.interval = interval
+        self.timeout = timeout
+        self.images: Dict[str, Dict[str, Any]] = {}
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.volumes: Dict[str, Dict[str, Any]] = {}
+        self.totals: Dict[str, Any] = {}
+        self.updated_at = 0.0
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def load(self, df: Dict[str, Any]):
+        """Разбирает ответ /system/df"""
+        images = {}
+        for image in df.get("Images") or []:
+            size = _size(image.get("Size")) or 0
+            shared = _size(image.get("SharedSize"))
+            images[_short(image.get("Id", ""))] = {
+                "size": size,
+                "shared_size": shared,
+                "unique_size": size - shared if shared is not None else None,
+                "containers": _size(image.get("Containers")),
+            }
+        containers = {}
+        for container in df.get("Containers") or []:
+            containers[container.get("Id", "")[:12]] = {
+                "size_rw": _size(container.get("SizeRw")),
+                "size_root_fs": _size(container.get("SizeRootFs")),
+            }
+        volumes = {}
+        for volume in df.get("Volumes") or []:
+            usage = volume.get("UsageData") or {}
+            volumes[volume.get("Name", "")] = {"Size": _size(usage.get("Size")), "RefCount": _size(usage.get("RefCount"))}
+        build_cache = df.get("BuildCache") or []
+
+        self.images, self.containers, self.volumes = images, containers, volumes
+        self.totals = {
+            # Слои хранятся один раз: LayersSize — реальный объём образов на диске
+            "layers_size": int(df.get("LayersSize", 0) or 0),
+            "images": len(images),
+            "images_shared": sum(i["shared_size"] or 0 for i in images.values()),
+            "containers": len(containers),
+            "containers_size_rw": sum(c["size_rw"] or 0 for c in containers.values()),
+            "volumes": len(volumes),
+            "volumes_size": sum(v["Size"] or 0 for v in volumes.values()),
+            "build_cache": len(build_cache),
+            "build_cache_size": sum(int(b.get("Size", 0) or 0) for b in build_cache),
+        }
+        self.updated_at = time.time()
+
+    async def refresh(self):
+        """Один запрос /system/df"""
+        started = time.monotonic()
+        df = await self.api.arequest("GET", "/system/df", timeout=self.timeout)
+        self.duration = round(time.monotonic() - started, 3)
+        self.load(df or {})
+        self.error = None
+
+    async def run(self):
+        """Фоновая задача: обновление раз в interval секунд"""
+        while True:
+            if self.api.available:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    self.error = str(e)
+                    logger.warning(f"Docker disk usage refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def join_images(self, images: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Образы (формат ImageInfo) с размерами из /system/df; исходные словари не меняются"""
+        if not self.images:
+            return images
+        joined = []
+        for image in images:
+            usage = self.images.get(_short(image.get("id", "")))
+            if usage is not None:
+                image = {**image, "disk_usage": usage["size"], "unique_size": usage["unique_size"]}
+                if usage["shared_size"] is not None:
+                    image["shared_size"] = usage["shared_size"]
+                if usage["containers"] is not None:
+                    image["containers"] = usage["containers"]
+            joined.append(image)
+        return joined
+
+    def join_volumes(self, volumes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Тома (формат VolumeInfo) с usage_data из /system/df"""
+        if not self.volumes:
+            return volumes
+        return [
+            {**volume, "usage_data": self.volumes[volume.get("name")]} if volume.get("name") in self.volumes else volume
+            for volume in volumes
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "updated_at": self.updated_at,
+            "duration": self.duration,
+            "interval": self.interval,
+            "error": self.error,
+            "totals": self.totals,
+            "containers": self.containers,
+        }
+
+
+# Глобальный кэш использования диска Docker
+docker_disk_usage = DockerDiskUsage()
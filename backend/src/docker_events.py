@@ -0,0 +1,155 @@
+# backend/src/docker_events.py
+"""
+Docker Events Log
+Ограниченный кольцевой буфер событий Docker Engine (die, oom, restart, pull,
+delete, события томов и сетей). Заполняется единственной подпиской
+docker_state; каждое событие получает порядковый номер — курсор для
+запросов "всё после since" и long-polling
+"""
+
+import asyncio
+from collections import deque
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+CAPACITY = 5000     # Сколько последних событий хранится
+MAX_WAIT = 30.0     # Предельное время long-polling запроса
+MAX_LIMIT = 1000    # Предельное число событий в ответе
+
+
+def format_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    """Событие Engine API в форме DockerEvent"""
+    actor = event.get("Actor") or {"ID": event.get("id", ""), "Attributes": {}}
+    return {
+        "type": event.get("Type", ""),
+        "action": event.get("Action") or event.get("status", ""),
+        "actor": actor,
+        "time": int(event.get("time", 0) or 0),
+        "time_nano": int(event.get("timeNano", 0) or 0),
+    }
+
+
+def _key(event: Dict[str, Any]) -> Tuple[int, str, str, str]:
+    return event["time_nano"], event["type"], event["action"], event["actor"].get("ID", "")
+
+
+class DockerEventLog:
+    """Кольцевой буфер событий с курсорами"""
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._events: deque = deque(maxlen=capacity)
+        self._keys: Set[Tuple[int, str, str, str]] = set()
+        self._seq = 0
+        self._waiters: List[asyncio.Future] = []
+
+    @property
+    def cursor(self) -> int:
+        """Номер последнего события (0 — событий ещё не было)"""
+        return self._seq
+
+    def append(self, raw: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Добавляет событие; повтор уже записанного пропускается (после
+        переподключения поток событий начинается с since и может повторяться)
+        """
+        event = format_event(raw)
+        key = _key(event)
+        if event["time_nano"] and key in self._keys:
+            return None
+        if len(self._events) == self.capacity:
+            self._keys.discard(_key(self._events[0]))
+        self._seq += 1
+        event["id"] = self._seq
+        self._events.append(event)
+        self._keys.add(key)
+
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        return event
+
+    def tail(self, count: int) -> List[Dict[str, Any]]:
+        """Последние count событий"""
+        return list(islice(self._events, max(len(self._events) - count, 0), None))
+
+    @staticmethod
+    def _matches(event: Dict[str, Any], types: Optional[Set[str]], actions: Optional[Set[str]],
+                 actor: Optional[str]) -> bool:
+        if types and event["type"] not in types:
+            return False
+        # "exec_start: sh -c ...", "health_status: unhealthy" — фильтр по части до двоеточия
+        if actions and event["action"] not in actions and event["action"].split(":")[0] not in actions:
+            return False
+        if actor:
+            actor_id = event["actor"].get("ID", "")
+            name = (event["actor"].get("Attributes") or {}).get("name", "")
+            if not actor_id.startswith(actor) and name != actor:
+                return False
+        return True
+
+    def query(
+        self,
+        since: int = 0,
+        types: Optional[Iterable[str]] = None,
+        actions: Optional[Iterable[str]] = None,
+        actor: Optional[str] = None,
+        limit: int = 100,
+    ) -> Dict[str, Any]:
+        """
+        События с номером больше since, подходящие под фильтры (не больше limit)
+
+        cursor — номер, с которого продолжать следующий запрос; truncated —
+        часть событий после since уже вытеснена из буфера. Курсор из будущего
+        (журнал начат заново после перезапуска) читается с начала
+        """
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+        if since > self._seq:
+            since = 0
+        types = set(types) if types else None
+        actions = set(actions) if actions else None
+        oldest = self._events[0]["id"] if self._events else self._seq + 1
+        # Номера идут подряд: начало выборки находится без просмотра буфера
+        start = max(since - oldest + 1, 0)
+        events = []
+        cursor = max(since, 0)
+        for event in islice(self._events, start, None):
+            cursor = event["id"]
+            if self._matches(event, types, actions, actor):
+                events.append(event)
+                if len(events) >= limit:
+                    break
+        return {
+            "events": events,
+            "cursor": cursor,
+            "truncated": since + 1 < oldest and since < self._seq,
+        }
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """Ждёт событие с номером больше since; False — истёк timeout"""
+        if self._seq != since:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=min(timeout, MAX_WAIT))
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "capacity": self.capacity,
+            "size": len(self._events),
+            "cursor": self._seq,
+            "waiters": len(self._waiters),
+        }
+
+
+# Глобальный журнал событий Docker
+docker_events = DockerEventLog()
@@ -0,0 +1,269 @@
+# backend/src/docker_inventory.py
+"""
+Docker Inventory
+Постраничные списки контейнеров, образов, сетей и томов без усечения.
+Данные берутся из кэша docker_state; для каждого типа строится индекс
+(отсортированные ключи, множества по меткам и состоянию), который
+перестраивается только при изменении состояния. Страницы адресуются
+курсором (значение сортировки + ID), поэтому не сдвигаются при вставках
+"""
+
+import base64
+import json
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .docker_disk_usage import docker_disk_usage
+from .docker_simple import SimpleDockerMetrics
+from .docker_state import docker_state
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+# Сети, которые создаёт сам Docker: они не считаются неиспользуемыми
+PREDEFINED_NETWORKS = {"bridge", "host", "none"}
+
+# Допустимые поля сортировки по типам ресурсов
+SORT_FIELDS = {
+    "containers": ("created", "name", "size"),
+    "images": ("created", "name", "size"),
+    "networks": ("created", "name"),
+    "volumes": ("created", "name", "size"),
+}
+
+SortKey = Tuple[Any, str]
+
+
+def encode_cursor(key: SortKey, sort: str, order: str) -> str:
+    # Поле и порядок сортировки в курсоре: с другими параметрами он не применим
+    return base64.urlsafe_b64encode(json.dumps([sort, order, *key]).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> SortKey:
+    try:
+        cursor_sort, cursor_order, value, item_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise ValueError("invalid cursor")
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise ValueError(f"cursor was issued for sort={cursor_sort} order={cursor_order}")
+    return value, str(item_id)
+
+
+def _comparable(value: Any, sample: Any) -> bool:
+    """Значение из курсора сравнимо с ключами индекса (иначе bisect упадёт с TypeError)"""
+    if isinstance(sample, str):
+        return isinstance(value, str)
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class _Entry:
+    """Запись индекса: ответ API и поля для фильтров"""
+
+    __slots__ = ("item", "names", "labels", "state", "dangling", "sort")
+
+    def __init__(self, item: Dict[str, Any], names: List[str], labels: Dict[str, str],
+                 state: str, dangling: bool, sort: Dict[str, Any]):
+        self.item = item
+        self.names = names
+        self.labels = labels
+        self.state = state
+        self.dangling = dangling
+        self.sort = sort
+
+
+class _Index:
+    """Индекс одного типа ресурсов"""
+
+    def __init__(self, entries: Dict[str, _Entry], fields: Tuple[str, ...]):
+        self.entries = entries
+        self.order: Dict[str, List[SortKey]] = {
+            field: sorted((entry.sort[field], item_id) for item_id, entry in entries.items())
+            for field in fields
+        }
+        self.by_label: Dict[str, Set[str]] = {}
+        self.by_state: Dict[str, Set[str]] = {}
+        for item_id, entry in entries.items():
+            for key, value in entry.labels.items():
+                self.by_label.setdefault(key, set()).add(item_id)
+                self.by_label.setdefault(f"{key}={value}", set()).add(item_id)
+            if entry.state:
+                self.by_state.setdefault(entry.state, set()).add(item_id)
+
+
+class DockerInventory:
+    """Постраничные запросы к инвентарю Docker"""
+
+    def __init__(self, state=None, disk_usage=None):
+        self.state = state or docker_state
+        self.disk_usage = disk_usage or docker_disk_usage
+        self._indexes: Dict[str, _Index] = {}
+        self._built_for: Tuple[int, float] = (-1, -1.0)
+
+    @property
+    def ready(self) -> bool:
+        return self.state.ready
+
+    # --- Построение индексов ---
+
+    def _containers(self) -> Dict[str, _Entry]:
+        sizes = self.disk_usage.containers
+        entries = {}
+        for item_id, raw in self.state.containers.items():
+            item = SimpleDockerMetrics.format_api_container(raw)
+            size_rw = (sizes.get(item_id[:12]) or {}).get("size_rw")
+            if size_rw is not None:
+                item["size_rw"] = size_rw
+            entries[item_id] = _Entry(
+                item, item["names"], item["labels"], raw.get("State") or "",
+                False,
+                {"created": item["created"], "name": (item["names"] or [""])[0], "size": item["size_rw"]},
+            )
+        return entries
+
+    def _images(self) -> Dict[str, _Entry]:
+        ids = list(self.state.images)
+        items = self.disk_usage.join_images([SimpleDockerMetrics.format_api_image(self.state.images[i]) for i in ids])
+        entries = {}
+        for item_id, item in zip(ids, items):
+            entries[item_id] = _Entry(
+                item, item["repo_tags"], item["labels"] or {}, "",
+                not item["repo_tags"],
+                {"created": item["created"], "name": (item["repo_tags"] or [""])[0], "size": item["disk_usage"] or item["size"]},
+            )
+        return entries
+
+    def _networks(self) -> Dict[str, _Entry]:
+        used = set()
+        for container in self.state.containers.values():
+            for network in ((container.get("NetworkSettings") or {}).get("Networks") or {}).values():
+                used.add(network.get("NetworkID"))
+        entries = {}
+        for item_id, raw in self.state.networks.items():
+            item = SimpleDockerMetrics.format_api_network(raw)
+            entries[item_id] = _Entry(
+                item, [item["name"]], item["labels"] or {}, "",
+                item_id not in used and item["name"] not in PREDEFINED_NETWORKS,
+                {"created": item["created"], "name": item["name"]},
+            )
+        return entries
+
+    def _volumes(self) -> Dict[str, _Entry]:
+        used = set()
+        for container in self.state.containers.values():
+            for mount in container.get("Mounts") or []:
+                if mount.get("Type") == "volume":
+                    used.add(mount.get("Name"))
+        names = list(self.state.volumes)
+        items = self.disk_usage.join_volumes([SimpleDockerMetrics.format_api_volume(self.state.volumes[n]) for n in names])
+        entries = {}
+        for name, item in zip(names, items):
+            size = (item.get("usage_data") or {}).get("Size")
+            entries[name] = _Entry(
+                item, [name], item["labels"] or {}, "",
+                name not in used,
+                {"created": item["created_at"], "name": name, "size": size if size is not None and size >= 0 else 0},
+            )
+        return entries
+
+    def _index(self, kind: str) -> _Index:
+        built_for = (self.state.revision, self.disk_usage.updated_at)
+        if built_for != self._built_for:
+            self._indexes = {}
+            self._built_for = built_for
+        index = self._indexes.get(kind)
+        if index is None:
+            builders: Dict[str, Callable[[], Dict[str, _Entry]]] = {
+                "containers": self._containers,
+                "images": self._images,
+                "networks": self._networks,
+                "volumes": self._volumes,
+            }
+            index = self._indexes[kind] = _Index(builders[kind](), SORT_FIELDS[kind])
+        return index
+
+    # --- Запросы ---
+
+    def query(
+        self,
+        kind: str,
+        state: Optional[List[str]] = None,
+        labels: Optional[List[str]] = None,
+        name: Optional[str] = None,
+        dangling: Optional[bool] = None,
+        sort: str = "created",
+        order: str = "desc",
+        limit: int = DEFAULT_LIMIT,
+        cursor: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Страница ресурсов kind, подходящих под все фильтры
+
+        state — состояния контейнеров, labels — "key" или "key=value",
+        name — префикс имени (для образов — любого тега). next_cursor — курсор
+        следующей страницы (None — страница последняя)
+        """
+        if kind not in SORT_FIELDS:
+            raise ValueError(f"unknown resource '{kind}', expected one of: {', '.join(SORT_FIELDS)}")
+        if sort not in SORT_FIELDS[kind]:
+            raise ValueError(f"cannot sort {kind} by '{sort}', expected one of: {', '.join(SORT_FIELDS[kind])}")
+        if order not in ("asc", "desc"):
+            raise ValueError("order must be 'asc' or 'desc'")
+        if not 1 <= limit <= MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+        index = self._index(kind)
+
+        # Кандидаты по индексам меток и состояний (пересечение множеств)
+        candidates: Optional[Set[str]] = None
+        for label in labels or []:
+            ids = index.by_label.get(label, set())
+            candidates = set(ids) if candidates is None else candidates & ids
+        if state:
+            ids = set().union(*(index.by_state.get(s, set()) for s in state))
+            candidates = ids if candidates is None else candidates & ids
+
+        def matches(item_id: str) -> bool:
+            if candidates is not None and item_id not in candidates:
+                return False
+            entry = index.entries[item_id]
+            if name and not any(n.startswith(name) for n in entry.names):
+                return False
+            if dangling is not None and entry.dangling != dangling:
+                return False
+            return True
+
+        keys = index.order[sort]
+        if cursor:
+            after = decode_cursor(cursor, sort, order)
+            if keys and not _comparable(after[0], keys[0][0]):
+                raise ValueError("invalid cursor")
+            start = bisect_right(keys, after) if order == "asc" else bisect_left(keys, after) - 1
+        else:
+            start = 0 if order == "asc" else len(keys) - 1
+        step = 1 if order == "asc" else -1
+
+        page: List[SortKey] = []
+        position = start
+        while 0 <= position < len(keys) and len(page) <= limit:
+            if matches(keys[position][1]):
+                page.append(keys[position])
+            position += step
+        has_more = len(page) > limit
+        page = page[:limit]
+
+        if candidates is not None and not name and dangling is None:
+            total = len(candidates)
+        else:
+            total = sum(1 for item_id in (candidates if candidates is not None else index.entries) if matches(item_id))
+        return {
+            "kind": kind,
+            "items": [index.entries[item_id].item for _, item_id in page],
+            "count": len(page),
+            "total": total,
+            "sort": sort,
+            "order": order,
+            "next_cursor": encode_cursor(page[-1], sort, order) if has_more else None,
+        }
+
+
+# Глобальный инвентарь Docker
+docker_inventory = DockerInventory()
@@ -1,11 +1,23 @@
 # backend/src/docker_simple.py
+import asyncio
 import subprocess
 import json
 import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import time
 
+from .docker_api import docker_api, DockerUnavailable
+
+IMAGES_LIMIT = 20  # Сколько образов попадает в ответ метрик
+
+# Таймауты загрузки отдельных ресурсов при асинхронном сборе (секунды)
+RESOURCE_TIMEOUT = 5.0
+RESOURCE_TIMEOUTS = {"images": 15.0, "volumes": 10.0}
+
+# Результаты `docker image inspect` по короткому ID: образ неизменяем, пересчитывать не нужно
+_image_details_cache: Dict[str, Dict[str, Any]] = {}
+
 class DockerCLI:
     """Простой класс для работы с Docker через CLI"""
     
@@ -80,6 +92,31 @@ class DockerCLI:
         
         return result
     
+    @staticmethod
+    def inspect_images(image_ids: List[str], timeout: int = 15) -> Dict[str, Any]:
+        """Один вызов `docker image inspect` на все образы; результат — список"""
+        if not image_ids:
+            return {"data": [], "success": True}
+        try:
+            result = subprocess.run(
+                ["docker", "image", "inspect", *image_ids],
+                capture_output=True,
+                text=True,
+                timeout=timeout
+            )
+        except subprocess.TimeoutExpired:
+            return {"error": "Command timed out", "success": False}
+        except Exception as e:
+            return {"error": str(e), "success": False}
+        
+        # Если часть образов уже удалена, docker возвращает ненулевой код,
+        # но в stdout всё равно массив с найденными образами
+        try:
+            data = json.loads(result.stdout or "[]")
+        except json.JSONDecodeError:
+            return {"error": result.stderr or "Invalid inspect output", "success": False}
+        return {"data": data if isinstance(data, list) else [], "success": True}
+    
     @staticmethod
     def get_networks() -> Dict[str, Any]:
         """Получает список сетей"""
@@ -452,150 +489,399 @@ class SimpleDockerMetrics:
         }
     
     @staticmethod
-    def get_metrics() -> Dict[str, Any]:
-        """Получает все метрики Docker"""
-        print("🔍 Collecting Docker metrics via CLI...")
+    def format_api_container(container: Dict[str, Any]) -> Dict[str, Any]:
+        """Форматирует контейнер из ответа Engine API (/containers/json)"""
+        image_id = container.get("ImageID", "")
+        if image_id.startswith('sha256:'):
+            image_id = image_id[7:]
         
-        # Получаем информацию о Docker
-        info_result = DockerCLI.get_info()
-        if not info_result.get("success"):
-            return {
-                "error": info_result.get("error", "Failed to get Docker info"),
-                "success": False
+        command = container.get("Command", "") or ""
+        if len(command) > 200:
+            command = command[:197] + "..."
+        
+        # Как и в CLI-варианте, в ответ попадают только опубликованные порты
+        ports = [
+            {
+                "IP": p.get("IP") or "0.0.0.0",
+                "PrivatePort": p.get("PrivatePort", 0),
+                "PublicPort": p.get("PublicPort", 0),
+                "Type": p.get("Type", "tcp")
             }
+            for p in container.get("Ports") or []
+            if p.get("PublicPort")
+        ]
+        
+        status = container.get("Status", "")
+        return {
+            "id": container.get("Id", "")[:12],
+            "names": [n.lstrip("/") for n in container.get("Names") or []],
+            "image": str(container.get("Image", "")),
+            "image_id": image_id[:12],
+            "command": command,
+            "created": int(container.get("Created", 0) or 0),
+            "status": status,
+            "state": status,
+            "ports": ports,
+            "labels": container.get("Labels") or {},
+            "size_rw": int(container.get("SizeRw", 0) or 0),
+            "size_root_fs": int(container.get("SizeRootFs", 0) or 0),
+            "host_config": container.get("HostConfig") or {},
+            "network_settings": container.get("NetworkSettings") or {},
+            "mounts": container.get("Mounts") or []
+        }
+    
+    @staticmethod
+    def format_api_image(image: Dict[str, Any]) -> Dict[str, Any]:
+        """Форматирует образ из ответа Engine API (/images/json): размеры уже в ответе, inspect не нужен"""
+        image_id = image.get("Id", "")
+        if image_id.startswith('sha256:'):
+            image_id = image_id[7:]
         
-        docker_info = info_result["data"]
-        print(f"✅ Docker info received: {docker_info.get('ServerVersion', 'Unknown')}")
+        tags = [t for t in image.get("RepoTags") or [] if t != "<none>:<none>"]
+        digests = [d for d in image.get("RepoDigests") or [] if not d.startswith("<none>")]
+        size = int(image.get("Size", 0) or 0)
+        parent_id = image.get("ParentId") or None
         
-        # Получаем контейнеры
-        containers_result = DockerCLI.get_containers(all=True)
-        containers = []
-        if containers_result.get("success"):
-            containers_data = containers_result.get("data", [])
-            print(f"📦 Found {len(containers_data)} containers")
-            
-            for container_data in containers_data:
-                try:
-                    formatted = SimpleDockerMetrics.format_container(container_data)
-                    containers.append(formatted)
-                except Exception as e:
-                    print(f"⚠️ Error formatting container {container_data.get('ID', 'unknown')}: {e}")
-                    continue
-        else:
-            print(f"⚠️ Failed to get containers: {containers_result.get('error')}")
-        
-        # Получаем образы
-        images_result = DockerCLI.get_images()
-        images = []
-        if images_result.get("success"):
-            images_data = images_result.get("data", [])
-            for image_data in images_data:
-                try:
-                    # Попытаемся получить точный размер и дату через `docker image inspect`
-                    image_id = image_data.get("ID") or image_data.get("ImageID") or image_data.get("Id")
-                    if image_id:
-                        inspect_cmd = ["docker", "image", "inspect", str(image_id), "--format", "{{json .}}"]
-                        inspect_result = DockerCLI.run_command(inspect_cmd, timeout=10)
-                        if inspect_result.get("success") and isinstance(inspect_result.get("data"), dict):
-                            insp = inspect_result["data"]
-                            # Size fields в байтах
-                            # Content size (raw image content) — используем как основной размер контента
-                            image_data["_content_size_bytes"] = int(insp.get("Size", 0) or 0)
-                            image_data["_virtual_size"] = int(insp.get("VirtualSize", 0) or 0)
-                            # Попытка получить информацию о реальном использовании диска
-                            disk_usage = 0
-                            graph = insp.get("GraphDriver") or {}
-                            graph_data = graph.get("Data") if isinstance(graph, dict) else None
-                            if isinstance(graph_data, dict):
-                                # Ищем подходящие ключи, которые могут содержать размер
-                                for key in ("Size", "DiskSize", "UpperDirSize", "LowerDirSize", "SizeRoot", "Usage"):
-                                    try:
-                                        val = graph_data.get(key)
-                                        if isinstance(val, (int, float)) and val > 0:
-                                            disk_usage = int(val)
-                                            break
-                                        # Некоторые реализации возвращают строки
-                                        if isinstance(val, str) and val.isdigit():
-                                            disk_usage = int(val)
-                                            break
-                                    except:
-                                        continue
+        return {
+            "id": image_id[:12],
+            "repo_tags": tags,
+            "repo_digests": digests,
+            "parent_id": parent_id,
+            "created": int(image.get("Created", 0) or 0),
+            "size": size,
+            "content_size": size,
+            "disk_usage": size,
+            "shared_size": max(int(image.get("SharedSize", 0) or 0), 0),
+            "virtual_size": int(image.get("VirtualSize", 0) or size),
+            "labels": image.get("Labels") or {},
+            "containers": max(int(image.get("Containers", 0) or 0), 0)
+        }
+    
+    @staticmethod
+    def format_api_network(network: Dict[str, Any]) -> Dict[str, Any]:
+        """Форматирует сеть из ответа Engine API (/networks)"""
+        return {
+            "id": network.get("Id", "")[:12],
+            "name": network.get("Name", ""),
+            "created": str(network.get("Created", "") or ""),
+            "scope": network.get("Scope", "") or "",
+            "driver": network.get("Driver", "") or "",
+            "enable_ipv6": bool(network.get("EnableIPv6", False)),
+            "ipam": network.get("IPAM") or {},
+            "internal": bool(network.get("Internal", False)),
+            "attachable": bool(network.get("Attachable", False)),
+            "ingress": bool(network.get("Ingress", False)),
+            "config_from": network.get("ConfigFrom") or None,
+            "config_only": bool(network.get("ConfigOnly", False)),
+            "containers": network.get("Containers") or {},
+            "options": network.get("Options") or {},
+            "labels": network.get("Labels") or {}
+        }
+    
+    @staticmethod
+    def format_api_volume(volume: Dict[str, Any]) -> Dict[str, Any]:
+        """Форматирует том из ответа Engine API (/volumes)"""
+        return {
+            "name": volume.get("Name", ""),
+            "driver": volume.get("Driver", "") or "",
+            "mountpoint": volume.get("Mountpoint", "") or "",
+            "created_at": str(volume.get("CreatedAt", "") or ""),
+            "status": volume.get("Status") or {},
+            "labels": volume.get("Labels") or {},
+            "scope": volume.get("Scope", "") or "",
+            "options": volume.get("Options") or {},
+            "usage_data": volume.get("UsageData")
+        }
+    
+    @staticmethod
+    def image_details(insp: Dict[str, Any]) -> Dict[str, Any]:
+        """Поля образа из вывода `docker image inspect` (размеры в байтах, дата создания)"""
+        # Content size (raw image content) — используем как основной размер контента
+        details = {
+            "_content_size_bytes": int(insp.get("Size", 0) or 0),
+            "_virtual_size": int(insp.get("VirtualSize", 0) or 0),
+        }
+        # Попытка получить информацию о реальном использовании диска
+        disk_usage = 0
+        graph = insp.get("GraphDriver") or {}
+        graph_data = graph.get("Data") if isinstance(graph, dict) else None
+        if isinstance(graph_data, dict):
+            # Ищем подходящие ключи, которые могут содержать размер
+            for key in ("Size", "DiskSize", "UpperDirSize", "LowerDirSize", "SizeRoot", "Usage"):
+                val = graph_data.get(key)
+                if isinstance(val, (int, float)) and val > 0:
+                    disk_usage = int(val)
+                    break
+                # Некоторые реализации возвращают строки
+                if isinstance(val, str) and val.isdigit():
+                    disk_usage = int(val)
+                    break
+        
+        # Created как ISO -> timestamp
+        created_iso = insp.get("Created", "")
+        details["_created_ts"] = SimpleDockerMetrics.parse_date_to_timestamp(created_iso) if created_iso else 0
+        details["_disk_usage_bytes"] = disk_usage
+        return details
+    
+    @staticmethod
+    def enrich_images(images_data: List[Dict[str, Any]], all_images: Optional[List[Dict[str, Any]]] = None):
+        """
+        Дополняет строки `docker images` данными inspect
 
-                            # Created как ISO -> timestamp
-                            created_iso = insp.get("Created", "")
-                            image_data["_created_ts"] = SimpleDockerMetrics.parse_date_to_timestamp(created_iso) if created_iso else 0
-                            image_data["_disk_usage_bytes"] = int(disk_usage or 0)
-                    formatted = SimpleDockerMetrics.format_image(image_data)
-                    images.append(formatted)
-                except Exception as e:
-                    print(f"⚠️ Error formatting image: {e}")
-                    continue
-        # После того как мы обработали inspect, если есть человекочитаемое поле Size в исходных данных
-        # оно может содержать значение, отображаемое в колонке `docker images` (например "221MB").
-        # Форматирование уже сделано в format_image(), но убедимся, что если disk_usage не заполнен,
-        # возьмём значение из исходного поля.
+        Образы, которых нет в кэше, инспектируются одним вызовом CLI.
+        all_images — полный список: по нему из кэша удаляются исчезнувшие образы
+        """
+        def short_id(image):
+            image_id = image.get("ID") or image.get("ImageID") or image.get("Id") or ""
+            if image_id.startswith('sha256:'):
+                image_id = image_id[7:]
+            return image_id[:12]
+        
+        missing = sorted({short_id(i) for i in images_data} - _image_details_cache.keys() - {""})
+        if missing:
+            inspect_result = DockerCLI.inspect_images(missing)
+            if inspect_result.get("success"):
+                for insp in inspect_result["data"]:
+                    if isinstance(insp, dict):
+                        _image_details_cache[short_id(insp)] = SimpleDockerMetrics.image_details(insp)
+            else:
+                print(f"⚠️ Image inspect failed: {inspect_result.get('error')}")
         
-        # Получаем сети (опционально)
-        networks = []
-        try:
-            networks_result = DockerCLI.get_networks()
-            if networks_result.get("success"):
-                networks_data = networks_result.get("data", [])
-                # Приводим к структуре, ожидаемой NetworkInfo
-                networks = []
-                for n in networks_data[:10]:
-                    networks.append({
-                        "id": n.get("ID", "")[:12],
-                        "name": n.get("Name", ""),
-                        "created": "",
-                        "scope": "",
-                        "driver": n.get("Driver", ""),
-                        "enable_ipv6": False,
-                        "ipam": {},
-                        "internal": False,
-                        "attachable": False,
-                        "ingress": False,
-                        "config_from": None,
-                        "config_only": False,
-                        "containers": {},
-                        "options": {},
-                        "labels": {}
-                    })
-        except:
-            pass
+        for image_data in images_data:
+            details = _image_details_cache.get(short_id(image_data))
+            if details:
+                image_data.update(details)
         
-        # Получаем тома (опционально)
-        volumes = []
-        try:
-            volumes_result = DockerCLI.get_volumes()
-            if volumes_result.get("success"):
-                volumes_data = volumes_result.get("data", [])
-                volumes = []
-                for v in volumes_data[:10]:
-                    volumes.append({
-                        "name": v.get("Name", ""),
-                        "driver": v.get("Driver", ""),
-                        "mountpoint": v.get("Mountpoint", ""),
-                        "created_at": "",
-                        "status": {},
-                        "labels": {},
-                        "scope": "",
-                        "options": {},
-                        "usage_data": None
-                    })
-        except:
-            pass
+        if all_images is not None:
+            present = {short_id(i) for i in all_images}
+            for image_id in list(_image_details_cache.keys() - present):
+                del _image_details_cache[image_id]
+    
+    @staticmethod
+    def format_network(network: Dict[str, Any]) -> Dict[str, Any]:
+        """Форматирует сеть из вывода `docker network ls` (структура NetworkInfo)"""
+        return {
+            "id": network.get("ID", "")[:12],
+            "name": network.get("Name", ""),
+            "created": "",
+            "scope": "",
+            "driver": network.get("Driver", ""),
+            "enable_ipv6": False,
+            "ipam": {},
+            "internal": False,
+            "attachable": False,
+            "ingress": False,
+            "config_from": None,
+            "config_only": False,
+            "containers": {},
+            "options": {},
+            "labels": {}
+        }
+    
+    @staticmethod
+    def format_volume(volume: Dict[str, Any]) -> Dict[str, Any]:
+        """Форматирует том из вывода `docker volume ls`"""
+        return {
+            "name": volume.get("Name", ""),
+            "driver": volume.get("Driver", ""),
+            "mountpoint": volume.get("Mountpoint", ""),
+            "created_at": "",
+            "status": {},
+            "labels": {},
+            "scope": "",
+            "options": {},
+            "usage_data": None
+        }
+    
+    @staticmethod
+    def _format_all(items: List[Dict[str, Any]], formatter, kind: str) -> List[Dict[str, Any]]:
+        formatted = []
+        for item in items:
+            try:
+                formatted.append(formatter(item))
+            except Exception as e:
+                print(f"⚠️ Error formatting {kind} {item.get('Id', item.get('ID', 'unknown'))}: {e}")
+        return formatted
+    
+    @staticmethod
+    def assemble(raw: Dict[str, Any], errors: Dict[str, str], source: str) -> Dict[str, Any]:
+        """
+        Собирает ответ из сырых данных ресурсов
+
+        Ресурсы, которые не удалось получить, перечислены в errors, остальные
+        возвращаются как есть (частичный результат). success=False — только
+        если не удалось получить ничего
+        """
+        if source == "api":
+            formatters = (SimpleDockerMetrics.format_api_container, SimpleDockerMetrics.format_api_image,
+                          SimpleDockerMetrics.format_api_network, SimpleDockerMetrics.format_api_volume)
+        else:
+            formatters = (SimpleDockerMetrics.format_container, SimpleDockerMetrics.format_image,
+                          SimpleDockerMetrics.format_network, SimpleDockerMetrics.format_volume)
+        format_container, format_image, format_network, format_volume = formatters
+        
+        if not any(key in raw for key in ("info", "containers", "images", "networks", "volumes")):
+            return {
+                "error": errors.get("info") or "Failed to get Docker metrics",
+                "errors": errors,
+                "success": False
+            }
+        
+        docker_info = dict(raw.get("info") or {})
+        if raw.get("version") and "ApiVersion" not in docker_info:
+            # /info не содержит версии API, она есть в /version
+            docker_info["ApiVersion"] = raw["version"].get("ApiVersion")
         
         return {
             "success": True,
+            "source": source,
+            "errors": errors,
             "engine": SimpleDockerMetrics.generate_engine_info(docker_info),
-            "containers": containers,
+            "containers": SimpleDockerMetrics._format_all(raw.get("containers") or [], format_container, "container"),
             "container_stats": [],
-            "images": images[:20],  # Ограничиваем количество
-            "networks": networks,
-            "volumes": volumes,
+            # Сводка ограничена; полные списки с пагинацией — /api/v1/docker/inventory/{kind}
+            "images": SimpleDockerMetrics._format_all((raw.get("images") or [])[:IMAGES_LIMIT], format_image, "image"),
+            "networks": SimpleDockerMetrics._format_all((raw.get("networks") or [])[:10], format_network, "network"),
+            "volumes": SimpleDockerMetrics._format_all((raw.get("volumes") or [])[:10], format_volume, "volume"),
             "events": []
         }
+    
+    # --- Синхронный сбор (CLI-скрипты, отладка) ---
+    
+    @staticmethod
+    def get_metrics() -> Dict[str, Any]:
+        """Получает все метрики Docker: через Engine API, при недоступности сокета — через CLI"""
+        if docker_api.available:
+            try:
+                return SimpleDockerMetrics.get_metrics_api()
+            except DockerUnavailable as e:
+                print(f"⚠️ Docker API unavailable, falling back to CLI: {e}")
+        return SimpleDockerMetrics.get_metrics_cli()
+    
+    @staticmethod
+    def get_metrics_api() -> Dict[str, Any]:
+        """Метрики Docker через Engine API (одно keep-alive соединение, без fork)"""
+        fetchers = {
+            "info": docker_api.info,
+            "version": docker_api.version,
+            "containers": lambda: docker_api.containers(all=True),
+            "images": docker_api.images,
+            "networks": docker_api.networks,
+            "volumes": docker_api.volumes,
+        }
+        raw, errors = {}, {}
+        for name, fetch in fetchers.items():
+            try:
+                raw[name] = fetch()
+            except DockerUnavailable:
+                raise
+            except Exception as e:
+                errors[name] = str(e)
+        return SimpleDockerMetrics.assemble(raw, errors, "api")
+    
+    @staticmethod
+    def _cli_result(result: Dict[str, Any]) -> Any:
+        if not result.get("success"):
+            raise RuntimeError(result.get("error") or "Docker CLI command failed")
+        return result.get("data")
+    
+    @staticmethod
+    def get_metrics_cli() -> Dict[str, Any]:
+        """Метрики Docker через CLI (запасной вариант)"""
+        print("🔍 Collecting Docker metrics via CLI...")
+        raw, errors = {}, {}
+        for name, fetch in SimpleDockerMetrics._cli_fetchers().items():
+            try:
+                raw[name] = SimpleDockerMetrics._cli_result(fetch())
+            except Exception as e:
+                errors[name] = str(e)
+        SimpleDockerMetrics._enrich_cli_images(raw)
+        return SimpleDockerMetrics.assemble(raw, errors, "cli")
+    
+    @staticmethod
+    def _cli_fetchers() -> Dict[str, Any]:
+        return {
+            "info": DockerCLI.get_info,
+            "containers": lambda: DockerCLI.get_containers(all=True),
+            "images": DockerCLI.get_images,
+            "networks": DockerCLI.get_networks,
+            "volumes": DockerCLI.get_volumes,
+        }
+    
+    @staticmethod
+    def _enrich_cli_images(raw: Dict[str, Any]):
+        # Детали inspect нужны только для образов, попадающих в ответ
+        images_data = raw.get("images")
+        if images_data:
+            SimpleDockerMetrics.enrich_images(images_data[:IMAGES_LIMIT], all_images=images_data)
+    
+    # --- Асинхронный сбор (обработчики API) ---
+    
+    @staticmethod
+    async def _gather(fetchers: Dict[str, Any], timeouts: Dict[str, float]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Запускает все загрузки одновременно, у каждой свой таймаут"""
+        names = list(fetchers)
+        results = await asyncio.gather(
+            *(asyncio.wait_for(fetchers[n](), timeout=timeouts.get(n, RESOURCE_TIMEOUT)) for n in names),
+            return_exceptions=True
+        )
+        raw, failures = {}, {}
+        for name, result in zip(names, results):
+            if isinstance(result, BaseException):
+                failures[name] = result
+            else:
+                raw[name] = result
+        return raw, failures
+    
+    @staticmethod
+    def _describe(error: BaseException) -> str:
+        if isinstance(error, asyncio.TimeoutError):
+            return "timed out"
+        return str(error) or error.__class__.__name__
+    
+    @staticmethod
+    async def get_metrics_async(timeouts: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+        """
+        Метрики Docker без блокировки event loop
+
+        info, контейнеры, образы, сети и тома загружаются параллельно с
+        отдельным таймаутом на каждый ресурс; упавший ресурс не мешает остальным
+        """
+        timeouts = {**RESOURCE_TIMEOUTS, **(timeouts or {})}
+        
+        if docker_api.available:
+            fetchers = {
+                "info": lambda: docker_api.aget("/info"),
+                "version": lambda: docker_api.aget("/version"),
+                "containers": lambda: docker_api.aget("/containers/json", all=1),
+                "images": lambda: docker_api.aget("/images/json"),
+                "networks": lambda: docker_api.aget("/networks"),
+                "volumes": lambda: docker_api.aget("/volumes"),
+            }
+            raw, failures = await SimpleDockerMetrics._gather(fetchers, timeouts)
+            if "volumes" in raw:
+                raw["volumes"] = (raw["volumes"] or {}).get("Volumes") or []
+            # Сокет есть, но демон не отвечает ни на что — пробуем CLI
+            if raw or not all(isinstance(e, DockerUnavailable) for e in failures.values()):
+                errors = {name: SimpleDockerMetrics._describe(e) for name, e in failures.items()}
+                return SimpleDockerMetrics.assemble(raw, errors, "api")
+            print(f"⚠️ Docker API unavailable, falling back to CLI: {failures.get('info')}")
+        
+        # CLI: каждая команда — отдельный процесс в своём потоке, все одновременно
+        fetchers = {
+            name: (lambda fetch=fetch: asyncio.to_thread(lambda: SimpleDockerMetrics._cli_result(fetch())))
+            for name, fetch in SimpleDockerMetrics._cli_fetchers().items()
+        }
+        raw, failures = await SimpleDockerMetrics._gather(fetchers, timeouts)
+        try:
+            await asyncio.wait_for(
+                asyncio.to_thread(SimpleDockerMetrics._enrich_cli_images, raw),
+                timeout=timeouts.get("images", RESOURCE_TIMEOUT)
+            )
+        except asyncio.TimeoutError:
+            print("⚠️ Image inspect timed out, returning images without details")
+        errors = {name: SimpleDockerMetrics._describe(e) for name, e in failures.items()}
+        return SimpleDockerMetrics.assemble(raw, errors, "cli")
 
 # Простой тест
 if __name__ == "__main__":
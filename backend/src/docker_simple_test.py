@@ -1,6 +1,7 @@
 # backend/src/docker_simple_test.py
 #!/usr/bin/env python3
-from docker_simple import SimpleDockerMetrics
+# Запуск из каталога backend: python -m src.docker_simple_test
+from src.docker_simple import SimpleDockerMetrics
 import json
 
 def main():
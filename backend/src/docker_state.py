@@ -0,0 +1,264 @@
+# backend/src/docker_state.py
+"""
+Event-driven Docker State Cache
+Состояние Docker (контейнеры, образы, сети, тома) в памяти, которое
+поддерживается одной долгоживущей подпиской на поток событий Engine API.
+Событие обновляет только затронутые записи; периодическая полная
+синхронизация страхует от пропущенных событий
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Set
+
+from .docker_api import DockerAPIError, DockerUnavailable, docker_api, encode_filters
+from .docker_events import DockerEventLog, docker_events
+from .docker_simple import SimpleDockerMetrics
+
+logger = logging.getLogger(__name__)
+
+RESYNC_INTERVAL = 300.0   # Полная синхронизация раз в 5 минут
+FLUSH_DELAY = 0.2         # Окно объединения событий перед догрузкой записей
+RECENT_EVENTS = 100       # Сколько последних событий отдаётся в поле events
+MAX_BACKOFF = 60.0
+
+# Действия, после которых объект больше не существует
+_REMOVED = {"destroy", "delete", "remove"}
+
+
+class DockerStateCache:
+    """Кэш состояния Docker, обновляемый событиями"""
+
+    def __init__(self, api=None, resync_interval: float = RESYNC_INTERVAL,
+                 flush_delay: float = FLUSH_DELAY, recent_events: int = RECENT_EVENTS,
+                 events: Optional[DockerEventLog] = None):
+        self.api = api or docker_api
+        # Журнал событий (docker_events) заполняется этой же подпиской
+        self.events = events if events is not None else DockerEventLog()
+        self.recent_events = recent_events
+        self.resync_interval = resync_interval
+        self.flush_delay = flush_delay
+        self.info: Dict[str, Any] = {}
+        self.version: Dict[str, Any] = {}
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.images: Dict[str, Dict[str, Any]] = {}
+        self.networks: Dict[str, Dict[str, Any]] = {}
+        self.volumes: Dict[str, Dict[str, Any]] = {}
+        # Готов ли кэш: синхронизирован и подписан на события
+        self.ready = False
+        self.synced_at = 0.0
+        self.events_received = 0
+        self.resyncs = 0
+        self._dirty_containers: Set[str] = set()
+        self._dirty_networks: Set[str] = set()
+        self._dirty_volumes: Set[str] = set()
+        self._dirty_images = False
+        self._dirty_info = False
+        self._needs_resync = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._snapshot: Optional[Dict[str, Any]] = None
+        # Номер изменения состояния: производные индексы перестраиваются, когда он растёт
+        self.revision = 0
+
+    # --- Полная синхронизация ---
+
+    async def resync(self):
+        """Перечитывает всё состояние целиком"""
+        info, version, containers, images, networks, volumes = await asyncio.gather(
+            self.api.aget("/info"),
+            self.api.aget("/version"),
+            self.api.aget("/containers/json", all=1),
+            self.api.aget("/images/json"),
+            self.api.aget("/networks"),
+            self.api.aget("/volumes"),
+        )
+        self.info = info or {}
+        self.version = version or {}
+        self.containers = {c["Id"]: c for c in containers or []}
+        self.images = {i["Id"]: i for i in images or []}
+        self.networks = {n["Id"]: n for n in networks or []}
+        self.volumes = {v["Name"]: v for v in (volumes or {}).get("Volumes") or []}
+        self.synced_at = time.time()
+        self.resyncs += 1
+        self._snapshot = None
+        self.revision += 1
+
+    # --- События ---
+
+    def apply_event(self, event: Dict[str, Any]):
+        """Помечает затронутые событием записи; удалённые объекты убираются сразу"""
+        self.events_received += 1
+        kind = event.get("Type")
+        action = (event.get("Action") or event.get("status") or "").split(":")[0]
+        actor_id = (event.get("Actor") or {}).get("ID") or event.get("id") or ""
+        self.events.append(event)
+
+        if action == "prune":
+            # prune удаляет много объектов сразу — проще перечитать всё
+            self._needs_resync = True
+        elif kind == "container":
+            if action in _REMOVED:
+                self.containers.pop(actor_id, None)
+                self._dirty_containers.discard(actor_id)
+            elif not action.startswith(("exec_", "top", "attach", "resize", "export", "archive-path")):
+                self._dirty_containers.add(actor_id)
+            self._dirty_info = True
+        elif kind == "image":
+            # Ответ /images/json не фильтруется по ID — перечитываем список образов
+            self._dirty_images = True
+            self._dirty_info = True
+        elif kind == "network":
+            if action in _REMOVED:
+                self.networks.pop(actor_id, None)
+                self._dirty_networks.discard(actor_id)
+            else:
+                self._dirty_networks.add(actor_id)
+        elif kind == "volume":
+            if action in _REMOVED:
+                self.volumes.pop(actor_id, None)
+                self._dirty_volumes.discard(actor_id)
+            elif action == "create":
+                self._dirty_volumes.add(actor_id)
+        self._snapshot = None
+        self.revision += 1
+
+    async def flush(self):
+        """Догружает помеченные записи (пакетно: одно обращение на тип ресурса)"""
+        if self._needs_resync:
+            self._needs_resync = False
+            self._dirty_containers, self._dirty_networks, self._dirty_volumes = set(), set(), set()
+            self._dirty_images = self._dirty_info = False
+            await self.resync()
+            return
+        containers, self._dirty_containers = self._dirty_containers, set()
+        networks, self._dirty_networks = self._dirty_networks, set()
+        volumes, self._dirty_volumes = self._dirty_volumes, set()
+        refresh_images, self._dirty_images = self._dirty_images, False
+        refresh_info, self._dirty_info = self._dirty_info, False
+
+        if containers:
+            found = await self.api.aget("/containers/json", all=1, filters=encode_filters({"id": sorted(containers)}))
+            by_id = {c["Id"]: c for c in found or []}
+            for container_id in containers:
+                if container_id in by_id:
+                    self.containers[container_id] = by_id[container_id]
+                else:
+                    self.containers.pop(container_id, None)
+        if refresh_images:
+            self.images = {i["Id"]: i for i in await self.api.aget("/images/json") or []}
+        if refresh_info:
+            self.info = await self.api.aget("/info") or self.info
+        for network_id in networks:
+            try:
+                self.networks[network_id] = await self.api.aget(f"/networks/{network_id}")
+            except DockerAPIError as e:
+                if e.status_code != 404 or isinstance(e, DockerUnavailable):
+                    raise
+                self.networks.pop(network_id, None)
+        for name in volumes:
+            try:
+                self.volumes[name] = await self.api.aget(f"/volumes/{name}")
+            except DockerAPIError as e:
+                if e.status_code != 404 or isinstance(e, DockerUnavailable):
+                    raise
+                self.volumes.pop(name, None)
+        self._snapshot = None
+        self.revision += 1
+
+    def _has_dirty(self) -> bool:
+        return bool(self._needs_resync or self._dirty_containers or self._dirty_networks
+                    or self._dirty_volumes or self._dirty_images or self._dirty_info)
+
+    async def _delayed_flush(self):
+        # Пока идёт догрузка, события помечают новые записи: они догружаются
+        # следующим проходом этой же задачи (_schedule_flush её не перезапускает)
+        while self._has_dirty():
+            await asyncio.sleep(self.flush_delay)
+            try:
+                await self.flush()
+            except Exception as e:
+                # Записи остаются устаревшими до следующей синхронизации
+                logger.warning(f"Docker state refresh failed: {e}")
+                return
+
+    def _schedule_flush(self):
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    # --- Фоновая работа ---
+
+    async def _resync_loop(self):
+        while True:
+            await asyncio.sleep(self.resync_interval)
+            try:
+                await self.resync()
+            except Exception as e:
+                logger.warning(f"Docker state resync failed: {e}")
+
+    async def run(self):
+        """Фоновая задача: синхронизация и подписка на события с переподключением"""
+        backoff = 1.0
+        while True:
+            if not self.api.available:
+                await asyncio.sleep(self.resync_interval)
+                continue
+            resync_task = None
+            # События с момента начала синхронизации: ничего не теряется в промежутке
+            since = int(time.time())
+            try:
+                await self.resync()
+                resync_task = asyncio.create_task(self._resync_loop())
+                self.ready = True
+                backoff = 1.0
+                async for event in self.api.stream("/events", params={"since": since}):
+                    self.apply_event(event)
+                    self._schedule_flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Docker events stream lost: {e}")
+            finally:
+                self.ready = False
+                if resync_task is not None:
+                    resync_task.cancel()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, MAX_BACKOFF)
+
+    # --- Чтение ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Метрики Docker из памяти (формат SimpleDockerMetrics.get_metrics)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            by_created = lambda item: item.get("Created") or 0
+            raw = {
+                "info": self.info,
+                "version": self.version,
+                "containers": sorted(self.containers.values(), key=by_created, reverse=True),
+                "images": sorted(self.images.values(), key=by_created, reverse=True),
+                "networks": list(self.networks.values()),
+                "volumes": list(self.volumes.values()),
+            }
+            snapshot = SimpleDockerMetrics.assemble(raw, {}, "api")
+            snapshot["source"] = "events"
+            snapshot["synced_at"] = self.synced_at
+            snapshot["events"] = self.events.tail(self.recent_events)
+            self._snapshot = snapshot
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "synced_at": self.synced_at,
+            "resyncs": self.resyncs,
+            "events_received": self.events_received,
+            "containers": len(self.containers),
+            "images": len(self.images),
+            "networks": len(self.networks),
+            "volumes": len(self.volumes),
+        }
+
+
+# Глобальный кэш состояния Docker
+docker_state = DockerStateCache(events=docker_events)
@@ -0,0 +1,198 @@
+# backend/src/host_sampler.py
+"""
+Background Host Sampler
+Фоновый поток, собирающий метрики хоста с фиксированным интервалом
+(на Linux — напрямую из /proc, см. procfs.py).
+Последний снимок хранится в одной ссылке: обработчики читают её без
+блокировок и без вызовов psutil в event loop
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import psutil
+
+from .procfs import ProcReader, available as procfs_available, statvfs_usage
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_INTERVAL = 1.0  # Секунды между снимками
+
+
+class HostSampler:
+    """Периодически собирает CPU, память, диск и сеть хоста"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL, disk_path: str = "/", use_procfs: bool = True):
+        self.interval = interval
+        self.disk_path = disk_path
+        self._proc: Optional[ProcReader] = None
+        if use_procfs and procfs_available():
+            try:
+                self._proc = ProcReader()
+            except OSError as e:
+                logger.warning(f"/proc fast path unavailable: {e}")
+        # Снимок заменяется целиком (атомарное присваивание ссылки), никогда не изменяется на месте
+        self._latest: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._prev_net = None
+
+    def _sample_psutil(self) -> Dict[str, Any]:
+        """Сбор через psutil; cpu_percent без интервала — неблокирующий вызов"""
+        memory = psutil.virtual_memory()
+        swap = psutil.swap_memory()
+        try:
+            interfaces = {
+                name: {
+                    "bytes_recv": c.bytes_recv,
+                    "packets_recv": c.packets_recv,
+                    "err_in": c.errin,
+                    "drop_in": c.dropin,
+                    "fifo_in": 0,
+                    "bytes_sent": c.bytes_sent,
+                    "packets_sent": c.packets_sent,
+                    "err_out": c.errout,
+                    "drop_out": c.dropout,
+                    "fifo_out": 0,
+                }
+                for name, c in psutil.net_io_counters(pernic=True).items()
+            }
+        except Exception:
+            interfaces = {}
+        network = {
+            "bytes_sent": sum(n["bytes_sent"] for n in interfaces.values()),
+            "bytes_recv": sum(n["bytes_recv"] for n in interfaces.values()),
+            "interfaces": interfaces,
+        }
+        try:
+            disk_io = {
+                name: {
+                    "read_count": c.read_count,
+                    "read_bytes": c.read_bytes,
+                    "read_time": c.read_time,
+                    "write_count": c.write_count,
+                    "write_bytes": c.write_bytes,
+                    "write_time": c.write_time,
+                    "busy_time": getattr(c, "busy_time", 0),
+                }
+                for name, c in (psutil.disk_io_counters(perdisk=True) or {}).items()
+            }
+        except Exception:
+            disk_io = {}
+        try:
+            load_avg = psutil.getloadavg() if hasattr(psutil, "getloadavg") else None
+        except Exception:
+            load_avg = None
+        return {
+            "cpu": {
+                "percent": psutil.cpu_percent(interval=None),
+                "per_core": psutil.cpu_percent(interval=None, percpu=True),
+                "load_avg": load_avg,
+            },
+            "memory": {
+                "total": memory.total,
+                "available": memory.available,
+                "used": memory.used,
+                "free": memory.free,
+                "percent": memory.percent,
+                "buffers": getattr(memory, "buffers", None),
+                "cached": getattr(memory, "cached", None),
+                "active": getattr(memory, "active", None),
+                "inactive": getattr(memory, "inactive", None),
+                "shared": getattr(memory, "shared", None),
+                "swap_total": swap.total,
+                "swap_used": swap.used,
+                "swap_percent": swap.percent,
+            },
+            "network": network,
+            "disk_io": disk_io,
+        }
+
+    def _disk_usage(self) -> Dict[str, Any]:
+        try:
+            if self._proc is not None:
+                return statvfs_usage(self.disk_path)
+            disk = psutil.disk_usage(self.disk_path)
+            return {"total": disk.total, "used": disk.used, "free": disk.free, "percent": disk.percent}
+        except Exception:
+            return {"total": 0, "used": 0, "free": 0, "percent": 0.0}
+
+    def sample(self) -> Dict[str, Any]:
+        """Собирает один снимок: на Linux через /proc, иначе через psutil"""
+        now = time.time()
+        sample = None
+        if self._proc is not None:
+            try:
+                sample = self._proc.sample()
+            except OSError as e:
+                logger.warning(f"/proc fast path failed, falling back to psutil: {e}")
+                self._proc.close()
+                self._proc = None
+        if sample is None:
+            sample = self._sample_psutil()
+
+        net_info = {
+            "bytes_sent": sample["network"]["bytes_sent"],
+            "bytes_recv": sample["network"]["bytes_recv"],
+            # Счётчики по интерфейсам: имя -> bytes/packets/err/drop/fifo
+            "interfaces": sample["network"]["interfaces"],
+        }
+        # Скорость сети относительно предыдущего снимка
+        prev = self._prev_net
+        if prev and now > prev[0]:
+            elapsed = now - prev[0]
+            net_info["sent_per_sec"] = max(0.0, (net_info["bytes_sent"] - prev[1]) / elapsed)
+            net_info["recv_per_sec"] = max(0.0, (net_info["bytes_recv"] - prev[2]) / elapsed)
+        else:
+            net_info["sent_per_sec"] = 0.0
+            net_info["recv_per_sec"] = 0.0
+        self._prev_net = (now, net_info["bytes_sent"], net_info["bytes_recv"])
+
+        return {
+            "timestamp": now,
+            "source": "procfs" if self._proc is not None else "psutil",
+            "cpu": sample["cpu"],
+            "memory": sample["memory"],
+            "disk": self._disk_usage(),
+            "network": net_info,
+            # Счётчики ввода-вывода по блочным устройствам (имя без /dev/)
+            "disk_io": sample["disk_io"],
+        }
+
+    def latest(self) -> Dict[str, Any]:
+        """Последний снимок; если поток ещё не запущен — собирает его сразу"""
+        snapshot = self._latest
+        if snapshot is None:
+            snapshot = self._latest = self.sample()
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self._latest = self.sample()
+            except Exception as e:
+                logger.warning(f"Host sampler error: {e}")
+            # Фиксированная частота: вычитаем время сбора
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        # Первый снимок инициализирует счётчики CPU (проценты в нём нулевые)
+        self._latest = self.sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="host-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+# Глобальный сэмплер хоста
+host_sampler = HostSampler()
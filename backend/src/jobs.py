@@ -0,0 +1,241 @@
+# backend/src/jobs.py
+"""
+Background Jobs
+Долгие операции (остановка и перезапуск контейнеров, удаление образов,
+сканирование Trivy) выполняются фоновыми задачами: запрос сразу получает
+ID задачи, статус, прогресс и результат читаются отдельно или потоком SSE.
+Одинаковая задача, которая уже выполняется, не запускается повторно;
+завершённые задачи хранятся ttl секунд
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+MAX_WORKERS = 4       # Сколько задач выполняется одновременно
+TTL = 3600            # Сколько хранится завершённая задача
+MAX_JOBS = 1000       # Предел числа хранимых задач
+
+PENDING, RUNNING, SUCCEEDED, FAILED = "pending", "running", "succeeded", "failed"
+FINISHED = (SUCCEEDED, FAILED)
+
+
+class Job:
+    """Состояние одной задачи"""
+
+    __slots__ = ("id", "kind", "params", "key", "status", "progress", "message", "result", "error",
+                 "created_at", "started_at", "finished_at", "version", "_waiters")
+
+    def __init__(self, kind: str, params: Dict[str, Any], key: str):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.key = key
+        self.status = PENDING
+        self.progress = 0.0
+        self.message = ""
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # Номер изменения: поток SSE отдаёт состояние, когда он растёт
+        self.version = 0
+        self._waiters: List[asyncio.Future] = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def _changed(self):
+        self.version += 1
+        waiters, self._waiters = self._waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Очередь фоновых задач с ограниченным числом исполнителей"""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, ttl: float = TTL, max_jobs: int = MAX_JOBS):
+        self.max_workers = max_workers
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.jobs: Dict[str, Job] = {}
+        self._in_flight: Dict[str, Job] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @staticmethod
+    def job_key(kind: str, params: Dict[str, Any]) -> str:
+        return kind + ":" + json.dumps(params, sort_keys=True, default=str)
+
+    @staticmethod
+    def result_error(result: Any) -> Optional[str]:
+        """
+        Ошибка, которую операция вернула в результате, а не исключением:
+        {"status": "error", "error": ...} или пакет, в котором не удалось ни одно действие
+        """
+        if not isinstance(result, dict):
+            return None
+        if result.get("status") == "error":
+            return str(result.get("error") or "operation failed")
+        total = result.get("total")
+        if isinstance(total, int) and total > 0 and result.get("succeeded") == 0:
+            return f"all {total} operations failed"
+        return None
+
+    def _limiter(self) -> asyncio.Semaphore:
+        # Семафор привязан к event loop, как и пул соединений docker_api
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+            self._loop = loop
+        return self._semaphore
+
+    def update(self, job: Job, progress: Optional[float] = None, message: Optional[str] = None):
+        """Прогресс задачи (0..1); можно вызывать и из потока исполнителя"""
+        def apply():
+            if progress is not None:
+                job.progress = min(max(progress, 0.0), 1.0)
+            if message is not None:
+                job.message = message
+            job._changed()
+
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                loop.call_soon_threadsafe(apply)
+                return
+        apply()
+
+    def submit(self, kind: str, params: Dict[str, Any], fn: Callable[[Job], Any]) -> Tuple[Job, bool]:
+        """
+        Ставит задачу в очередь; возвращает (задача, создана ли новая)
+
+        fn(job) — корутина или обычная функция (выполняется в потоке).
+        Если такая же задача (kind и params) ещё не завершена, возвращается она
+        """
+        key = self.job_key(kind, params)
+        existing = self._in_flight.get(key)
+        if existing is not None:
+            return existing, False
+        self.prune()
+        job = Job(kind, params, key)
+        self.jobs[job.id] = job
+        self._in_flight[key] = job
+        self._limiter()
+        self._tasks[job.id] = asyncio.create_task(self._run(job, fn))
+        return job, True
+
+    async def _run(self, job: Job, fn: Callable[[Job], Any]):
+        try:
+            async with self._limiter():
+                job.status = RUNNING
+                job.started_at = time.time()
+                job._changed()
+                if asyncio.iscoroutinefunction(fn):
+                    job.result = await fn(job)
+                else:
+                    job.result = await asyncio.to_thread(fn, job)
+                job.error = self.result_error(job.result)
+                job.status = FAILED if job.error else SUCCEEDED
+                job.progress = 1.0
+        except asyncio.CancelledError:
+            job.status = FAILED
+            job.error = "cancelled"
+            raise
+        except Exception as e:
+            job.status = FAILED
+            # HTTPException обработчиков хранит текст ошибки в detail
+            job.error = str(getattr(e, "detail", None) or e)
+        finally:
+            job.finished_at = time.time()
+            self._in_flight.pop(job.key, None)
+            self._tasks.pop(job.id, None)
+            job._changed()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self, kind: Optional[str] = None, status: Optional[str] = None) -> List[Job]:
+        """Задачи от новых к старым"""
+        jobs = [j for j in self.jobs.values() if (kind is None or j.kind == kind) and (status is None or j.status == status)]
+        return sorted(jobs, key=lambda j: j.created_at, reverse=True)
+
+    def prune(self, now: Optional[float] = None):
+        """Удаляет завершённые задачи старше ttl и самые старые сверх max_jobs"""
+        now = now or time.time()
+        for job_id in [j.id for j in self.jobs.values() if j.finished and now - j.finished_at > self.ttl]:
+            del self.jobs[job_id]
+        if len(self.jobs) >= self.max_jobs:
+            finished = sorted((j for j in self.jobs.values() if j.finished), key=lambda j: j.finished_at)
+            for job in finished[:len(self.jobs) - self.max_jobs + 1]:
+                del self.jobs[job.id]
+
+    async def wait(self, job: Job, version: int, timeout: float) -> bool:
+        """Ждёт изменения задачи после version; False — истёк timeout"""
+        if job.version != version:
+            return True
+        waiter = asyncio.get_running_loop().create_future()
+        job._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if waiter in job._waiters:
+                job._waiters.remove(waiter)
+
+    async def watch(self, job: Job, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """Состояние задачи при каждом изменении до завершения (None — keepalive)"""
+        version = -1
+        while True:
+            if job.version != version:
+                version = job.version
+                yield job.to_dict()
+                if job.finished:
+                    return
+            if not await self.wait(job, version, keepalive):
+                yield None
+
+    async def close(self):
+        """Отменяет незавершённые задачи (остановка сервиса)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {"jobs": len(self.jobs), "in_flight": len(self._in_flight), "by_status": counts}
+
+
+# Глобальный менеджер фоновых задач
+job_manager = JobManager()
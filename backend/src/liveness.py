@@ -0,0 +1,153 @@
+# backend/src/liveness.py
+"""
+Agent Liveness Tracker
+Переводит агентов между состояниями active -> stale -> dead по дедлайнам
+(min-heap), хранит готовые множества и счётчики и рассылает события переходов
+"""
+
+import asyncio
+import heapq
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+ACTIVE, STALE, DEAD = "active", "stale", "dead"
+
+STALE_AFTER = 60     # Агент без данных дольше минуты считается stale
+DEAD_AFTER = 3600    # Через час без данных агент удаляется
+
+# callback(agent_id, old_state, new_state, last_seen)
+TransitionCallback = Callable[[str, Optional[str], str, float], None]
+
+
+class LivenessTracker:
+    """Отслеживает последнюю активность агентов без полного перебора на запрос"""
+
+    def __init__(self, stale_after: float = STALE_AFTER, dead_after: float = DEAD_AFTER):
+        if dead_after <= stale_after:
+            raise ValueError("dead_after must be greater than stale_after")
+        self.stale_after = stale_after
+        self.dead_after = dead_after
+        self.last_seen: Dict[str, float] = {}
+        self.state: Dict[str, str] = {}
+        self._members: Dict[str, Set[str]] = {ACTIVE: set(), STALE: set()}
+        # Куча дедлайнов (deadline, agent_id); у агента не больше одной актуальной записи
+        self._heap: List[Tuple[float, str]] = []
+        self._scheduled: Dict[str, float] = {}
+        self._subscribers: List[TransitionCallback] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, callback: TransitionCallback):
+        """Подписка на переходы состояний агентов"""
+        self._subscribers.append(callback)
+
+    def _schedule(self, agent_id: str, deadline: float):
+        self._scheduled[agent_id] = deadline
+        heapq.heappush(self._heap, (deadline, agent_id))
+
+    def _move(self, agent_id: str, new_state: str, events: list):
+        old_state = self.state.get(agent_id)
+        if old_state in self._members:
+            self._members[old_state].discard(agent_id)
+        if new_state == DEAD:
+            self.state.pop(agent_id, None)
+            self._scheduled.pop(agent_id, None)
+            last_seen = self.last_seen.pop(agent_id, 0.0)
+        else:
+            self.state[agent_id] = new_state
+            self._members[new_state].add(agent_id)
+            last_seen = self.last_seen[agent_id]
+        events.append((agent_id, old_state, new_state, last_seen))
+
+    def heartbeat(self, agent_id: str, now: Optional[float] = None) -> float:
+        """Отмечает активность агента"""
+        now = time.time() if now is None else now
+        events = []
+        with self._lock:
+            self.last_seen[agent_id] = now
+            if self.state.get(agent_id) != ACTIVE:
+                self._move(agent_id, ACTIVE, events)
+                self._schedule(agent_id, now + self.stale_after)
+            # У активного агента запись в куче уже есть — она будет перенесена при извлечении
+        self._emit(events)
+        return now
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Обрабатывает наступившие дедлайны; стоимость пропорциональна их числу"""
+        now = time.time() if now is None else now
+        events = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                deadline, agent_id = heapq.heappop(self._heap)
+                if self._scheduled.get(agent_id) != deadline:
+                    continue  # Устаревшая запись
+                del self._scheduled[agent_id]
+
+                state = self.state.get(agent_id)
+                last_seen = self.last_seen[agent_id]
+                if state == ACTIVE:
+                    due = last_seen + self.stale_after
+                    if due > now:
+                        self._schedule(agent_id, due)  # Был heartbeat — переносим дедлайн
+                        continue
+                    self._move(agent_id, STALE, events)
+                    self._schedule(agent_id, last_seen + self.dead_after)
+                elif state == STALE:
+                    self._move(agent_id, DEAD, events)
+        self._emit(events)
+        return len(events)
+
+    def _emit(self, events):
+        for event in events:
+            for callback in self._subscribers:
+                try:
+                    callback(*event)
+                except Exception as e:
+                    logger.warning(f"Liveness subscriber failed for {event[0]}: {e}")
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def remove(self, agent_id: str):
+        """Удаляет агента без события"""
+        with self._lock:
+            state = self.state.pop(agent_id, None)
+            if state in self._members:
+                self._members[state].discard(agent_id)
+            self.last_seen.pop(agent_id, None)
+            self._scheduled.pop(agent_id, None)
+
+    # --- Запросы: O(размер результата) ---
+
+    def agents(self, state: Optional[str] = None) -> List[str]:
+        with self._lock:
+            if state is None:
+                return list(self.state)
+            return list(self._members.get(state, ()))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {ACTIVE: len(self._members[ACTIVE]), STALE: len(self._members[STALE])}
+
+    def get(self, agent_id: str) -> Tuple[Optional[str], Optional[float]]:
+        with self._lock:
+            return self.state.get(agent_id), self.last_seen.get(agent_id)
+
+    async def run(self, max_sleep: float = 1.0):
+        """Фоновая задача: обрабатывает дедлайны по мере наступления"""
+        while True:
+            try:
+                self.advance()
+            except Exception as e:
+                logger.error(f"Liveness tracker error: {e}")
+            deadline = self.next_deadline()
+            delay = max_sleep if deadline is None else min(max_sleep, max(0.0, deadline - time.time()))
+            await asyncio.sleep(delay)
+
+
+# Глобальный трекер активности агентов
+liveness_tracker = LivenessTracker()
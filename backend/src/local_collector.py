@@ -0,0 +1,204 @@
+# backend/src/local_collector.py
+"""
+Built-in Local Collector
+Встроенный сборщик: хост бэкенда как виртуальный агент. Полные снапшоты
+в формате AgentMetrics собираются вне event loop с ограничением по времени
+и передаются в общий конвейер приёма метрик
+"""
+
+import asyncio
+import logging
+import os
+import platform
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import psutil
+
+from .disk_probe import disk_usage_collector
+from .host_sampler import host_sampler
+from .process_table import process_table
+
+logger = logging.getLogger(__name__)
+
+LOCAL_AGENT_ID = "infrawatch-backend"  # Зарезервированный agent_id встроенного сборщика
+COLLECT_INTERVAL = 10.0   # Секунды между снапшотами
+COLLECT_BUDGET = 5.0      # Максимальное время на один сбор
+
+
+class LocalCollector:
+    """Собирает снапшоты хоста бэкенда и передаёт их в ingest"""
+
+    def __init__(
+        self,
+        agent_id: str = LOCAL_AGENT_ID,
+        interval: float = COLLECT_INTERVAL,
+        budget: float = COLLECT_BUDGET,
+    ):
+        self.agent_id = agent_id
+        self.interval = interval
+        self.budget = budget
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="local-collector")
+        self._pending = None
+        self.collected = 0
+        self.skipped = 0
+
+    # --- Секции снапшота ---
+
+    @staticmethod
+    def _system() -> Dict[str, Any]:
+        boot_time = int(psutil.boot_time())
+        return {
+            "hostname": socket.gethostname(),
+            "os": platform.system().lower(),
+            "platform": platform.platform(),
+            "kernel_version": platform.release(),
+            "uptime": int(time.time()) - boot_time,
+            "boot_time": boot_time,
+            "num_goroutine": threading.active_count(),
+            "num_cpu": psutil.cpu_count() or 0,
+        }
+
+    @staticmethod
+    def _cpu(host: Dict[str, Any]) -> Dict[str, Any]:
+        load_avg = host["cpu"].get("load_avg")
+        try:
+            freq = psutil.cpu_freq()
+        except Exception:
+            freq = None
+        return {
+            "usage": host["cpu"]["percent"],
+            "per_core": host["cpu"].get("per_core"),
+            "frequency": freq.current if freq else None,
+            "load_avg": {"load1": load_avg[0], "load5": load_avg[1], "load15": load_avg[2]} if load_avg else None,
+        }
+
+    @staticmethod
+    def _memory(host: Dict[str, Any]) -> Dict[str, Any]:
+        memory = host["memory"]
+        return {
+            "total": memory["total"],
+            "available": memory["available"],
+            "used": memory["used"],
+            "used_percent": memory["percent"],
+            "free": memory["free"],
+            "active": memory.get("active"),
+            "inactive": memory.get("inactive"),
+            "buffers": memory.get("buffers"),
+            "cached": memory.get("cached"),
+            "shared": memory.get("shared"),
+        }
+
+    @staticmethod
+    def _disks(host: Dict[str, Any]) -> List[Dict[str, Any]]:
+        disk_io = host.get("disk_io") or {}
+        disks = []
+        for disk in disk_usage_collector.collect():
+            # Точки без данных (таймаут, ошибка) в снапшот не попадают
+            if disk["total"] is None:
+                continue
+            disks.append({
+                "device": disk["device"],
+                "mountpoint": disk["mountpoint"],
+                "fstype": disk["fstype"],
+                "total": disk["total"],
+                "free": disk["free"],
+                "used": disk["used"],
+                "used_percent": disk["percent"],
+                "io_stats": disk_io.get(os.path.basename(disk["device"])),
+            })
+        return disks
+
+    @staticmethod
+    def _network(host: Dict[str, Any]) -> Dict[str, Any]:
+        # Счётчики из снимка сэмплера (/proc/net/dev), psutil — только для MTU и флагов
+        counters = host["network"].get("interfaces") or {}
+        try:
+            stats = psutil.net_if_stats()
+        except Exception:
+            stats = {}
+        interfaces = []
+        for name, c in counters.items():
+            st = stats.get(name)
+            interfaces.append({
+                "name": name,
+                "bytes_sent": c["bytes_sent"],
+                "bytes_recv": c["bytes_recv"],
+                "packets_sent": c["packets_sent"],
+                "packets_recv": c["packets_recv"],
+                "err_in": c["err_in"],
+                "err_out": c["err_out"],
+                "drop_in": c["drop_in"],
+                "drop_out": c["drop_out"],
+                "fifo_in": c["fifo_in"],
+                "fifo_out": c["fifo_out"],
+                "mtu": st.mtu if st else None,
+                "flags": (["up"] if st.isup else []) if st else None,
+            })
+        return {"interfaces": interfaces}
+
+    @staticmethod
+    def _temperatures() -> Optional[List[Dict[str, Any]]]:
+        if not hasattr(psutil, "sensors_temperatures"):
+            return None
+        try:
+            sensors = psutil.sensors_temperatures()
+        except Exception:
+            return None
+        result = []
+        for chip, entries in sensors.items():
+            for i, entry in enumerate(entries):
+                result.append({
+                    "sensor_key": f"{chip}_{entry.label or i}",
+                    "temperature": entry.current,
+                    "high": entry.high,
+                    "critical": entry.critical,
+                })
+        return result
+
+    def collect(self) -> Dict[str, Any]:
+        """Собирает полный снапшот (выполняется в рабочем потоке)"""
+        host = host_sampler.latest()
+        return {
+            "agent_id": self.agent_id,
+            "timestamp": int(time.time()),
+            "system": self._system(),
+            "cpu": self._cpu(host),
+            "memory": self._memory(host),
+            "disks": self._disks(host),
+            "network": self._network(host),
+            "temperatures": self._temperatures(),
+            "processes": process_table.latest()["processes"],
+        }
+
+    async def collect_once(self) -> Optional[Dict[str, Any]]:
+        """Сбор в рабочем потоке с ограничением по времени; None — бюджет превышен"""
+        if self._pending is not None and not self._pending.done():
+            # Предыдущий сбор ещё висит — не запускаем параллельный
+            self.skipped += 1
+            return None
+        loop = asyncio.get_running_loop()
+        self._pending = loop.run_in_executor(self._executor, self.collect)
+        try:
+            snapshot = await asyncio.wait_for(asyncio.shield(self._pending), timeout=self.budget)
+        except asyncio.TimeoutError:
+            self.skipped += 1
+            logger.warning(f"Local collector exceeded its {self.budget}s budget, snapshot skipped")
+            return None
+        self.collected += 1
+        return snapshot
+
+    async def run(self, ingest: Callable[[Dict[str, Any]], Any]):
+        """Фоновая задача: собирает снапшоты и передаёт их в ingest"""
+        while True:
+            started = time.monotonic()
+            try:
+                snapshot = await self.collect_once()
+                if snapshot is not None:
+                    ingest(snapshot)
+            except Exception as e:
+                logger.error(f"Local collector error: {e}")
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
@@ -1,5 +1,6 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
@@ -8,13 +9,35 @@ import socket
 import asyncio
 import time
 import json
+import os
 from collections import defaultdict
 import statistics
 import docker
 import subprocess
 from .health_check import router as health_router
 from .docker_simple import SimpleDockerMetrics
+from .docker_api import docker_api
+from .docker_state import docker_state
+from .docker_events import MAX_WAIT as EVENTS_MAX_WAIT, docker_events
+from .container_stats import container_stats_collector
+from .container_history import container_history
+from .container_actions import container_actions
+from .jobs import MAX_JOBS, job_manager
+from .docker_disk_usage import docker_disk_usage
+from .docker_inventory import docker_inventory
 from .trivy_scanner import trivy_scanner, TrivyScanner
+from .process_topk import MAX_K as TOPK_MAX_K, process_topk_index
+from .process_history import process_history_index
+from .ws_broadcaster import metrics_broadcaster
+from .sse_stream import sse_hub, SSESubscriber, MAX_RATE_LIMIT
+from .alerting import alert_engine, AlertRule, FileNotifier, WebhookNotifier
+from .anomaly import anomaly_detector
+from .liveness import liveness_tracker, ACTIVE, STALE, DEAD
+from .host_sampler import host_sampler
+from .process_table import process_table
+from .disk_probe import disk_usage_collector
+from .service_probes import service_prober
+from .local_collector import LocalCollector, LOCAL_AGENT_ID
 
 app = FastAPI(
     title="InfraWatch API v2.5",
@@ -185,6 +208,11 @@ class ContainerStats(BaseModel):
     pids: int
     restart_count: int
     uptime: int
+    # Скорости относительно предыдущего образца (байт/с)
+    network_rx_per_sec: Optional[float] = None
+    network_tx_per_sec: Optional[float] = None
+    block_read_per_sec: Optional[float] = None
+    block_write_per_sec: Optional[float] = None
 
 class DockerEngineInfo(BaseModel):
     version: str
@@ -228,6 +256,8 @@ class ImageInfo(BaseModel):
     content_size: Optional[int] = None
     disk_usage: Optional[int] = None
     shared_size: int
+    # Байты слоёв, которые не используются другими образами (из /system/df)
+    unique_size: Optional[int] = None
     virtual_size: int
     labels: Optional[Dict[str, str]] = None
     containers: int
@@ -267,6 +297,14 @@ class DockerEvent(BaseModel):
     time: int
     time_nano: int
 
+class BulkContainerAction(BaseModel):
+    action: str  # start, stop, restart
+    container_ids: Optional[List[str]] = None
+    # Селектор меток: "key" или "key=value"; выбираются и остановленные контейнеры
+    labels: Optional[List[str]] = None
+    timeout: int = 10
+    parallelism: Optional[int] = None
+
 # Обновляем DockerMetrics
 class ExtendedDockerMetrics(BaseModel):
     engine: DockerEngineInfo
@@ -276,11 +314,12 @@ class ExtendedDockerMetrics(BaseModel):
     networks: List[NetworkInfo]
     volumes: List[VolumeInfo]
     events: Optional[List[DockerEvent]] = None
+    # Ресурсы, которые не удалось получить (частичный ответ)
+    errors: Optional[Dict[str, str]] = None
 
 # Хранилище данных
 metrics_history = defaultdict(list)
 agents_registry = {}
-agent_last_seen = {}
 
 # Предыдущее состояние системных сетевых счётчиков для расчёта скорости (bytes/sec)
 system_net_prev = {
@@ -292,6 +331,13 @@ system_net_prev = {
 # Конфигурация
 MAX_HISTORY = 1000  # Максимальное количество записей в истории
 CLEANUP_INTERVAL = 300  # Очистка старых данных каждые 5 минут
+ALERT_RULES_FILE = os.environ.get("INFRAWATCH_ALERT_RULES")  # JSON файл с правилами алертов
+ALERT_LOG_FILE = os.environ.get("INFRAWATCH_ALERT_LOG")  # Файл для событий алертов
+ALERT_WEBHOOK_URL = os.environ.get("INFRAWATCH_ALERT_WEBHOOK")  # Webhook для событий алертов
+LOCAL_COLLECTOR_ENABLED = os.environ.get("INFRAWATCH_LOCAL_COLLECTOR", "1") != "0"  # Встроенный сборщик хоста бэкенда
+LOCAL_COLLECTOR_INTERVAL = float(os.environ.get("INFRAWATCH_LOCAL_INTERVAL", "10"))  # Интервал сбора, секунды
+
+local_collector = LocalCollector(interval=LOCAL_COLLECTOR_INTERVAL)
 
 async def cleanup_old_metrics():
     """Очистка старых метрик"""
@@ -311,24 +357,90 @@ async def cleanup_old_metrics():
                 if not metrics_history[agent_id]:
                     del metrics_history[agent_id]
             
-            # Очищаем неактивных агентов
-            for agent_id in list(agent_last_seen.keys()):
-                if agent_last_seen[agent_id] < cutoff_time:
-                    del agents_registry[agent_id]
-                    del agent_last_seen[agent_id]
-                    
+            # История контейнеров: та же глубина
+            container_history.prune(current_time)
+            job_manager.prune(current_time)
+            
+            # Неактивные агенты удаляются трекером активности (см. on_agent_transition)
+            
         except Exception as e:
             print(f"Error during cleanup: {e}")
         
         await asyncio.sleep(CLEANUP_INTERVAL)
 
+def on_agent_transition(agent_id: str, old_state: Optional[str], new_state: str, last_seen: float):
+    """Реакция на смену состояния агента (active/stale/dead)"""
+    metrics_broadcaster.publish(("status", agent_id), {
+        "type": "agent_status",
+        "agent_id": agent_id,
+        "status": new_state,
+        "previous_status": old_state,
+        "last_seen": last_seen
+    })
+    
+    if new_state == DEAD:
+        # Агент давно не присылал данных — удаляем его состояние
+        agents_registry.pop(agent_id, None)
+        process_topk_index.forget(agent_id)
+        process_history_index.forget(agent_id)
+        sse_hub.forget(agent_id)
+        alert_engine.forget_agent(agent_id)
+        anomaly_detector.forget(agent_id)
+        print(f"💀 Agent expired: {agent_id}")
+
+liveness_tracker.subscribe(on_agent_transition)
+
+# Фоновые задачи, запущенные при старте (отменяются при остановке)
+background_tasks: List[asyncio.Task] = []
+
 @app.on_event("startup")
 async def startup_event():
     """Запуск фоновых задач при старте"""
-    asyncio.create_task(cleanup_old_metrics())
+    background_tasks.extend([
+        asyncio.create_task(cleanup_old_metrics()),
+        asyncio.create_task(liveness_tracker.run()),
+    ])
+    host_sampler.start()
+    process_table.start()
+    background_tasks.extend([
+        asyncio.create_task(service_prober.run()),
+        asyncio.create_task(docker_state.run()),
+        asyncio.create_task(container_stats_collector.run()),
+        asyncio.create_task(docker_disk_usage.run()),
+    ])
+    if LOCAL_COLLECTOR_ENABLED:
+        background_tasks.append(asyncio.create_task(local_collector.run(ingest_local_snapshot)))
+    
+    # Алерты: правила и получатели уведомлений из окружения
+    if ALERT_LOG_FILE:
+        alert_engine.add_notifier(FileNotifier(ALERT_LOG_FILE))
+    if ALERT_WEBHOOK_URL:
+        alert_engine.add_notifier(WebhookNotifier(ALERT_WEBHOOK_URL))
+    if ALERT_RULES_FILE:
+        try:
+            count = alert_engine.load_rules(ALERT_RULES_FILE)
+            print(f"🔔 Loaded {count} alert rules from {ALERT_RULES_FILE}")
+        except Exception as e:
+            print(f"⚠️ Failed to load alert rules: {e}")
     print("InfraWatch API v2.5 started")
     print(f"API Documentation: http://localhost:8000/docs")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Остановка фоновых задач и потоков, закрытие соединений с Docker"""
+    tasks, background_tasks[:] = list(background_tasks), []
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    host_sampler.stop()
+    process_table.stop()
+    await service_prober.close()
+    await container_stats_collector.stop()
+    await job_manager.close()
+    docker_api.close()
+    await docker_api.aclose()
+    await container_actions.api.aclose()
+
 @app.get("/", tags=["Root"])
 async def root():
     """Корневой эндпоинт"""
@@ -341,10 +453,59 @@ async def root():
             "agents": "/api/v1/agents",
             "history": "/api/v1/metrics/history",
             "system": "/api/v1/system",
-            "docker": "/api/v1/docker/metrics"
+            "top_processes": "/api/v1/processes/top",
+            "process_history": "/api/v1/processes/history",
+            "docker": "/api/v1/docker/metrics",
+            "docker_events": "/api/v1/docker/events",
+            "docker_inventory": "/api/v1/docker/inventory/{kind}",
+            "jobs": "/api/v1/jobs",
+            "websocket": "/ws/metrics",
+            "stream": "/api/v1/stream/metrics",
+            "alerts": "/api/v1/alerts",
+            "anomalies": "/api/v1/anomalies"
         }
     }
 
+def ingest_metrics(metrics: AgentMetrics) -> Dict[str, Any]:
+    """Общий конвейер приёма снапшота: история, индексы, рассылка, алерты"""
+    agent_id = metrics.agent_id
+    
+    # Обновляем время последней активности
+    liveness_tracker.heartbeat(agent_id)
+    
+    # Сохраняем метрики в истории
+    metrics_dict = metrics.dict()
+    metrics_dict['received_at'] = datetime.now().isoformat()
+    
+    # Оценки аномальности (EWMA z-score) сохраняются вместе со снапшотом
+    metrics_dict['anomaly_scores'] = anomaly_detector.update(agent_id, metrics_dict)
+    
+    if agent_id not in metrics_history:
+        metrics_history[agent_id] = []
+    
+    metrics_history[agent_id].append(metrics_dict)
+    
+    # Ограничиваем историю
+    if len(metrics_history[agent_id]) > MAX_HISTORY:
+        metrics_history[agent_id] = metrics_history[agent_id][-MAX_HISTORY:]
+    
+    # Обновляем индекс процессов для top-K запросов
+    process_topk_index.update(agent_id, metrics.timestamp, metrics_dict.get('processes'))
+    process_history_index.update(agent_id, metrics.timestamp, metrics_dict.get('processes'))
+    
+    # Рассылаем обновление подписчикам WebSocket
+    metrics_broadcaster.publish_metrics(agent_id, metrics_dict)
+    sse_hub.publish(agent_id, metrics_dict, labels=agents_registry.get(agent_id, {}).get("labels"))
+    
+    # Проверяем правила алертов, затронутые снапшотом
+    alert_engine.evaluate(agent_id, metrics_dict)
+    
+    return metrics_dict
+
+def ingest_local_snapshot(snapshot: Dict[str, Any]):
+    """Приём снапшота встроенного сборщика через общий конвейер"""
+    ingest_metrics(AgentMetrics.model_validate(snapshot))
+
 @app.post("/api/v1/metrics", tags=["Metrics"])
 async def receive_metrics(request: Request):
     """Прием метрик от агента (с логированием тела для отладки)"""
@@ -360,23 +521,11 @@ async def receive_metrics(request: Request):
             print(f"[DEBUG] Failed to parse AgentMetrics: {e}")
             raise HTTPException(status_code=422, detail=f"Invalid metrics payload: {e}")
 
-        agent_id = metrics.agent_id
-        
-        # Обновляем время последней активности
-        agent_last_seen[agent_id] = time.time()
-        
-        # Сохраняем метрики в истории
-        metrics_dict = metrics.dict()
-        metrics_dict['received_at'] = datetime.now().isoformat()
+        if metrics.agent_id == LOCAL_AGENT_ID:
+            raise HTTPException(status_code=400, detail=f"agent_id '{LOCAL_AGENT_ID}' is reserved for the built-in collector")
         
-        if agent_id not in metrics_history:
-            metrics_history[agent_id] = []
-        
-        metrics_history[agent_id].append(metrics_dict)
-        
-        # Ограничиваем историю
-        if len(metrics_history[agent_id]) > MAX_HISTORY:
-            metrics_history[agent_id] = metrics_history[agent_id][-MAX_HISTORY:]
+        agent_id = metrics.agent_id
+        ingest_metrics(metrics)
         
         # Логируем получение метрик
         print(f"📊 Received metrics from {agent_id}: "
@@ -399,6 +548,8 @@ async def receive_metrics(request: Request):
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing metrics: {str(e)}")
 
@@ -458,7 +609,8 @@ async def get_metrics_history(
             data_points.append({
                 "timestamp": timestamp,
                 "value": current,
-                "time": datetime.fromtimestamp(timestamp).isoformat()
+                "time": datetime.fromtimestamp(timestamp).isoformat(),
+                "anomaly_score": (entry.get('anomaly_scores') or {}).get(metric_type)
             })
     
     return {
@@ -475,27 +627,201 @@ async def get_metrics_history(
         }
     }
 
+@app.websocket("/ws/metrics")
+async def metrics_websocket(websocket: WebSocket):
+    """Push-канал обновлений метрик (сообщения metrics_update)"""
+    # Новому клиенту сразу отправляем последние метрики всех агентов
+    latest = {aid: history[-1] for aid, history in metrics_history.items() if history}
+    await metrics_broadcaster.serve(websocket, initial=latest)
+
+@app.get("/api/v1/ws/stats", tags=["Metrics"])
+async def websocket_stats():
+    """Статистика подписчиков WebSocket"""
+    return metrics_broadcaster.stats()
+
+@app.get("/api/v1/stream/metrics", tags=["Metrics"])
+async def stream_metrics(
+    request: Request,
+    agent_id: Optional[str] = None,
+    label: Optional[str] = None,
+    paths: Optional[str] = None,
+    max_rate: float = 1.0
+):
+    """
+    SSE поток обновлений агентов
+    
+    Args:
+        agent_id: Список агентов через запятую
+        label: Фильтр по меткам агента, например env=prod,role=db
+        paths: Пути метрик через запятую, например cpu.usage,disks[*].used_percent
+        max_rate: Максимум событий в секунду; промежуточные снапшоты сворачиваются
+    """
+    if max_rate <= 0 or max_rate > MAX_RATE_LIMIT:
+        raise HTTPException(status_code=400, detail=f"max_rate must be in (0, {MAX_RATE_LIMIT}]")
+    
+    labels = {}
+    for item in (label or "").split(","):
+        if not item:
+            continue
+        if "=" not in item:
+            raise HTTPException(status_code=400, detail=f"Invalid label filter: {item}")
+        key, value = item.split("=", 1)
+        labels[key.strip()] = value.strip()
+    
+    subscriber = SSESubscriber(
+        agent_ids={a.strip() for a in agent_id.split(",") if a.strip()} if agent_id else None,
+        labels=labels,
+        paths=[p for p in paths.split(",") if p.strip()] if paths else None,
+        max_rate=max_rate
+    )
+    return StreamingResponse(
+        sse_hub.stream(subscriber, is_disconnected=request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/api/v1/processes/top", tags=["Metrics"])
+async def get_top_processes(
+    k: int = 20,
+    sort_by: str = "cpu_percent",
+    group_by: str = "pid",
+    window: int = 0,
+    agent_id: Optional[str] = None
+):
+    """Top-K процессов по всем агентам (последние снапшоты или среднее за window секунд)"""
+    if k < 1 or k > TOPK_MAX_K:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {TOPK_MAX_K}")
+    
+    try:
+        processes = process_topk_index.top(
+            k=k,
+            sort_by=sort_by,
+            group_by=group_by,
+            window=window,
+            agent_ids=[agent_id] if agent_id else None
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "k": k,
+        "sort_by": sort_by,
+        "group_by": group_by,
+        "window": window,
+        "count": len(processes),
+        "processes": processes,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/v1/processes/history", tags=["Metrics"])
+async def get_process_history(
+    agent_id: str,
+    pid: Optional[int] = None,
+    name: Optional[str] = None,
+    since: Optional[int] = None
+):
+    """История процесса агента по pid или всех процессов с заданным именем"""
+    if agent_id not in metrics_history:
+        raise HTTPException(status_code=404, detail="Agent not found")
+    
+    try:
+        series = process_history_index.history(agent_id, pid=pid, name=name, since=since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return {
+        "agent_id": agent_id,
+        "pid": pid,
+        "name": name,
+        "count": len(series),
+        "processes": series,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/api/v1/alerts", tags=["Alerts"])
+async def list_alerts(state: Optional[str] = None, agent_id: Optional[str] = None):
+    """Активные алерты (pending и firing)"""
+    alerts = alert_engine.alerts(state=state, agent_id=agent_id)
+    return {
+        "count": len(alerts),
+        "firing_count": sum(1 for a in alerts if a["state"] == "firing"),
+        "alerts": alerts
+    }
+
+@app.get("/api/v1/alerts/rules", tags=["Alerts"])
+async def list_alert_rules():
+    """Список правил алертов"""
+    rules = [rule.to_dict() for rule in alert_engine.rules.values()]
+    return {"count": len(rules), "rules": rules}
+
+@app.post("/api/v1/alerts/rules", tags=["Alerts"])
+async def create_alert_rule(data: Dict[str, Any]):
+    """
+    Создание правила алерта
+    
+    Payload:
+        {
+            "expr": "cpu.usage > 90 for 2m",
+            "name": "High CPU",
+            "severity": "critical",
+            "hysteresis": 5,
+            "agent_id": null
+        }
+    """
+    if not data.get("expr"):
+        raise HTTPException(status_code=400, detail="expr is required")
+    try:
+        rule = AlertRule(
+            expr=data["expr"],
+            name=data.get("name"),
+            severity=data.get("severity", "warning"),
+            hysteresis=float(data.get("hysteresis", 0.0)),
+            agent_id=data.get("agent_id"),
+            rule_id=data.get("id")
+        )
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    alert_engine.add_rule(rule)
+    return {"status": "created", "rule": rule.to_dict()}
+
+@app.delete("/api/v1/alerts/rules/{rule_id}", tags=["Alerts"])
+async def delete_alert_rule(rule_id: str):
+    """Удаление правила алерта"""
+    if not alert_engine.remove_rule(rule_id):
+        raise HTTPException(status_code=404, detail="Rule not found")
+    return {"status": "deleted", "rule_id": rule_id}
+
+@app.get("/api/v1/anomalies", tags=["Alerts"])
+async def list_anomalies(agent_id: Optional[str] = None):
+    """Ряды метрик, последняя точка которых аномальна (|z| выше порога)"""
+    anomalies = anomaly_detector.anomalies(agent_id=agent_id)
+    return {
+        "count": len(anomalies),
+        "threshold": anomaly_detector.threshold,
+        "anomalies": anomalies,
+        **anomaly_detector.stats()
+    }
+
 @app.get("/api/v1/health", response_model=HealthResponse, tags=["Monitoring"])
 async def health_check():
     """Получение полного статуса системы"""
     try:
-        # Системные метрики хоста
-        cpu_percent = psutil.cpu_percent(interval=0.1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
+        # Системные метрики хоста из фонового сэмплера (без блокировки event loop)
+        host = host_sampler.latest()
         
         # Собираем статистику по агентам
+        liveness_tracker.advance()
         active_agents = []
-        for agent_id, last_seen in agent_last_seen.items():
-            if time.time() - last_seen < 60:  # Активен в последние 60 секунд
-                agent_info = agents_registry.get(agent_id, {})
-                active_agents.append({
-                    "id": agent_id,
-                    "last_seen": last_seen,
-                    "status": "active",
-                    "hostname": agent_info.get("hostname", "unknown"),
-                    "features": agent_info.get("features", {})
-                })
+        for agent_id in liveness_tracker.agents(ACTIVE):
+            agent_info = agents_registry.get(agent_id, {})
+            active_agents.append({
+                "id": agent_id,
+                "last_seen": liveness_tracker.last_seen.get(agent_id),
+                "status": "active",
+                "hostname": agent_info.get("hostname", "unknown"),
+                "features": agent_info.get("features", {})
+            })
         
         # Сводка по метрикам
         metrics_summary = {}
@@ -505,20 +831,10 @@ async def health_check():
                 metrics_summary[agent_id] = {
                     "cpu": latest.get('cpu', {}).get('usage'),
                     "memory": latest.get('memory', {}).get('used_percent'),
-                    "disks": len(latest.get('disks', [])),
+                    "disks": len(latest.get('disks') or []),
                     "timestamp": latest.get('timestamp')
                 }
         
-        # Получаем кумулятивные счётчики сети (общее количество передано/получено с момента включения)
-        try:
-            current_net = psutil.net_io_counters()
-            # Используем общие кумулятивные значения (количество данных за всё время работы системы)
-            total_sent = current_net.bytes_sent
-            total_recv = current_net.bytes_recv
-        except Exception:
-            total_sent = 0
-            total_recv = 0
-
         return HealthResponse(
             status="healthy",
             service="InfraWatch API v2.5",
@@ -526,16 +842,17 @@ async def health_check():
             hostname=socket.gethostname(),
             timestamp=datetime.now(),
             system={
-                "cpu_percent": cpu_percent,
-                "memory_percent": memory.percent,
-                "memory_total": memory.total,
-                "memory_used": memory.used,
-                "disk_total": disk.total,
-                "disk_used": disk.used,
-                "disk_percent": disk.percent,
+                "cpu_percent": host["cpu"]["percent"],
+                "memory_percent": host["memory"]["percent"],
+                "memory_total": host["memory"]["total"],
+                "memory_used": host["memory"]["used"],
+                "disk_total": host["disk"]["total"],
+                "disk_used": host["disk"]["used"],
+                "disk_percent": host["disk"]["percent"],
                 # Возвращаем кумулятивные данные (общее количество Upload/Download за всё время)
-                "network_sent": total_sent,
-                "network_recv": total_recv,
+                "network_sent": host["network"]["bytes_sent"],
+                "network_recv": host["network"]["bytes_recv"],
+                "sampled_at": host["timestamp"],
             },
             agents=active_agents,
             metrics_summary=metrics_summary
@@ -546,11 +863,17 @@ async def health_check():
 @app.get("/api/v1/agents", tags=["Agents"])
 async def list_agents(status: Optional[str] = None):
     """Список всех агентов"""
+    # "inactive" — прежнее название состояния stale
+    if status == "inactive":
+        status = STALE
+    if status and status not in (ACTIVE, STALE):
+        raise HTTPException(status_code=400, detail="status must be one of: active, stale")
+    
+    liveness_tracker.advance()
     agents = []
-    for agent_id, last_seen in agent_last_seen.items():
-        agent_status = "active" if time.time() - last_seen < 60 else "inactive"
-        
-        if status and agent_status != status:
+    for agent_id in liveness_tracker.agents(status):
+        agent_status, last_seen = liveness_tracker.get(agent_id)
+        if agent_status is None:
             continue
         
         agent_info = agents_registry.get(agent_id, {})
@@ -565,10 +888,12 @@ async def list_agents(status: Optional[str] = None):
             "metrics_count": len(metrics_history.get(agent_id, []))
         })
     
+    counts = liveness_tracker.counts()
     return {
         "count": len(agents),
         "agents": agents,
-        "active_count": sum(1 for a in agents if a["status"] == "active")
+        "active_count": counts[ACTIVE],
+        "stale_count": counts[STALE]
     }
 
 @app.post("/api/v1/agents/register", tags=["Agents"])
@@ -579,7 +904,7 @@ async def register_agent(data: Dict[str, Any]):
         raise HTTPException(status_code=400, detail="agent_id is required")
     
     agents_registry[agent_id] = data
-    agent_last_seen[agent_id] = time.time()
+    liveness_tracker.heartbeat(agent_id)
     
     print(f"✅ Agent registered: {agent_id}")
     
@@ -598,39 +923,22 @@ async def get_system_info():
         cpu_count = psutil.cpu_count()
         cpu_freq = psutil.cpu_freq()
         
-        # Память
-        memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
+        # CPU, память и сеть из фонового сэмплера
+        host = host_sampler.latest()
         
-        # Диски
-        disks = []
-        for partition in psutil.disk_partitions():
-            try:
-                usage = psutil.disk_usage(partition.mountpoint)
-                disks.append({
-                    "device": partition.device,
-                    "mountpoint": partition.mountpoint,
-                    "fstype": partition.fstype,
-                    "total": usage.total,
-                    "used": usage.used,
-                    "free": usage.free,
-                    "percent": usage.percent
-                })
-            except:
-                continue
+        # Диски: проверки с таймаутом на каждую точку монтирования (зависший NFS не блокирует API)
+        loop = asyncio.get_running_loop()
+        disks = [
+            d for d in await loop.run_in_executor(None, disk_usage_collector.collect)
+            if d["status"] != "error"
+        ]
         
         # Сеть
-        net_io = psutil.net_io_counters()
         net_if_addrs = psutil.net_if_addrs()
-        net_if_stats = psutil.net_if_stats()
         
-        # Процессы
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-            try:
-                processes.append(proc.info)
-            except:
-                continue
+        # Процессы из кэшированной таблицы (обновляется в фоновом потоке);
+        # до первой публикации latest() собирает таблицу сам, поэтому не в цикле событий
+        processes = await loop.run_in_executor(None, process_table.latest)
         
         # Температура (если доступно)
         temps = []
@@ -648,32 +956,25 @@ async def get_system_info():
             },
             "cpu": {
                 "count": cpu_count,
-                "percent": psutil.cpu_percent(interval=0.1),
+                "percent": host["cpu"]["percent"],
                 "frequency": cpu_freq.current if cpu_freq else None,
-                "load_avg": psutil.getloadavg() if hasattr(psutil, 'getloadavg') else None,
-            },
-            "memory": {
-                "total": memory.total,
-                "available": memory.available,
-                "used": memory.used,
-                "percent": memory.percent,
-                "swap_total": swap.total,
-                "swap_used": swap.used,
-                "swap_percent": swap.percent,
+                "load_avg": host["cpu"]["load_avg"],
             },
+            "memory": dict(host["memory"]),
             "disks": {
                 "count": len(disks),
                 "partitions": disks,
             },
             "network": {
-                "bytes_sent": net_io.bytes_sent,
-                "bytes_recv": net_io.bytes_recv,
+                "bytes_sent": host["network"]["bytes_sent"],
+                "bytes_recv": host["network"]["bytes_recv"],
                 "interfaces": len(net_if_addrs),
             },
             "processes": {
-                "count": len(processes),
-                "top_cpu": sorted(processes, key=lambda x: x.get('cpu_percent', 0), reverse=True)[:5],
-                "top_memory": sorted(processes, key=lambda x: x.get('memory_percent', 0), reverse=True)[:5],
+                "count": processes["count"],
+                "top_cpu": processes["top_cpu"],
+                "top_memory": processes["top_memory"],
+                "updated_at": processes["timestamp"],
             },
             "temperatures": temps,
             "timestamp": datetime.now().isoformat()
@@ -727,11 +1028,27 @@ async def get_metrics_summary(timeframe: int = 3600):
         "summary": summary
     }
 
+async def current_docker_metrics() -> Dict[str, Any]:
+    """Метрики Docker из кэша, поддерживаемого событиями; пока кэш не готов — прямой сбор"""
+    if docker_state.ready:
+        metrics = docker_state.snapshot()
+    else:
+        metrics = await SimpleDockerMetrics.get_metrics_async()
+    if metrics.get("success"):
+        # Статистика контейнеров — из потоковых подписок, размеры — из кэша /system/df
+        metrics = {
+            **metrics,
+            "container_stats": container_stats_collector.snapshot(),
+            "images": docker_disk_usage.join_images(metrics.get("images") or []),
+            "volumes": docker_disk_usage.join_volumes(metrics.get("volumes") or []),
+        }
+    return metrics
+
 @app.get("/api/v1/docker/metrics", response_model=ExtendedDockerMetrics, tags=["Docker"])
 async def get_docker_metrics():
-    """Получение Docker метрик через CLI"""
+    """Получение Docker метрик (Engine API, при недоступности — CLI)"""
     try:
-        metrics = SimpleDockerMetrics.get_metrics()
+        metrics = await current_docker_metrics()
         
         if not metrics.get("success"):
             raise HTTPException(
@@ -746,9 +1063,12 @@ async def get_docker_metrics():
             images=metrics["images"],
             networks=metrics["networks"],
             volumes=metrics["volumes"],
-            events=metrics["events"]
+            events=metrics["events"],
+            errors=metrics.get("errors") or None
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"❌ Docker metrics error: {str(e)}")
         import traceback
@@ -761,8 +1081,8 @@ async def get_docker_metrics():
 
 @app.get("/api/v1/docker/simple")
 async def docker_simple():
-    """Простой Docker эндпоинт через CLI"""
-    return SimpleDockerMetrics.get_metrics()
+    """Простой Docker эндпоинт (без валидации модели)"""
+    return await current_docker_metrics()
 
 @app.get("/api/v1/docker/debug")
 async def docker_debug():
@@ -799,6 +1119,18 @@ async def docker_debug():
     except Exception as e:
         results["docker_cli_error"] = str(e)
     
+    # Проверка Engine API (основной способ сбора метрик)
+    results["engine_api"] = {"socket": docker_api.socket_path, "available": docker_api.available}
+    results["state_cache"] = docker_state.stats()
+    results["container_history"] = container_history.stats()
+    results["events_log"] = docker_events.stats()
+    results["disk_usage"] = {"updated_at": docker_disk_usage.updated_at, "duration": docker_disk_usage.duration, "error": docker_disk_usage.error}
+    if docker_api.available:
+        try:
+            results["engine_api"]["version"] = docker_api.version().get("Version")
+        except Exception as e:
+            results["engine_api"]["error"] = str(e)
+    
     # Проверка путей
     import os
     socket_paths = [
@@ -983,98 +1315,210 @@ async def docker_fixed():
     try:
         # Просто возвращаем данные из docker_simple.py без валидации
         from .docker_simple import SimpleDockerMetrics
-        return SimpleDockerMetrics.get_metrics()
+        return await current_docker_metrics()
     except Exception as e:
         return {"error": str(e)}
 
-@app.post("/api/v1/docker/container/{container_id}/start", tags=["Docker"])
-async def start_container(container_id: str):
-    """Запуск контейнера"""
+@app.get("/api/v1/docker/events", tags=["Docker"])
+async def get_docker_events(
+    since: int = 0,
+    type: Optional[str] = None,
+    action: Optional[str] = None,
+    actor: Optional[str] = None,
+    limit: int = 100,
+    wait: float = 0
+):
+    """
+    События Docker после курсора since (фильтры type/action — через запятую,
+    actor — ID или имя). wait > 0 — long-polling: ответ придёт, как только
+    появится подходящее событие, или через wait секунд (не больше 30)
+    """
+    types = [t for t in (type or "").split(",") if t]
+    actions = [a for a in (action or "").split(",") if a]
+    # Неподходящие события сдвигают курсор и запускают новое ожидание —
+    # общий срок ограничен, а не только каждое ожидание
+    deadline = time.monotonic() + min(max(wait, 0), EVENTS_MAX_WAIT)
+    
     try:
-        result = subprocess.run(
-            ["docker", "start", container_id],
-            capture_output=True,
-            text=True,
-            timeout=10
+        result = docker_events.query(since, types, actions, actor, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    while not result["events"] and time.monotonic() < deadline:
+        # Новые события, не подходящие под фильтры, сдвигают курсор
+        if not await docker_events.wait(result["cursor"], deadline - time.monotonic()):
+            break
+        result = docker_events.query(result["cursor"], types, actions, actor, limit)
+    
+    result["count"] = len(result["events"])
+    result["timestamp"] = datetime.now().isoformat()
+    return result
+
+@app.get("/api/v1/docker/inventory/{kind}", tags=["Docker"])
+async def get_docker_inventory(
+    kind: str,
+    state: Optional[str] = None,
+    label: Optional[str] = None,
+    name: Optional[str] = None,
+    dangling: Optional[bool] = None,
+    sort: str = "created",
+    order: str = "desc",
+    limit: int = 50,
+    cursor: Optional[str] = None
+):
+    """
+    Постраничный список ресурсов Docker (containers, images, networks, volumes)
+    
+    Args:
+        state: Состояния контейнеров через запятую, например running,exited
+        label: Метки через запятую: key или key=value (все сразу)
+        name: Префикс имени (для образов — тега)
+        dangling: Образы без тегов, тома и сети, не используемые контейнерами
+        sort: created, name или size (для сетей — created, name)
+        cursor: next_cursor предыдущей страницы
+    """
+    if not docker_inventory.ready:
+        raise HTTPException(status_code=503, detail="Docker state is not synced yet")
+    
+    try:
+        page = docker_inventory.query(
+            kind,
+            state=[s for s in (state or "").split(",") if s] or None,
+            labels=[l for l in (label or "").split(",") if l] or None,
+            name=name,
+            dangling=dangling,
+            sort=sort,
+            order=order,
+            limit=limit,
+            cursor=cursor
         )
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "action": "start",
-                "container_id": container_id,
-                "message": f"Container {container_id} started successfully"
-            }
-        else:
-            return {
-                "status": "error",
-                "action": "start",
-                "container_id": container_id,
-                "error": result.stderr
-            }
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    page["synced_at"] = docker_state.synced_at
+    return page
+
+@app.get("/api/v1/docker/disk-usage", tags=["Docker"])
+async def get_docker_disk_usage():
+    """Использование диска Docker (образы, контейнеры, тома, build cache) из кэша /system/df"""
+    if not docker_disk_usage.updated_at:
+        raise HTTPException(status_code=503, detail=docker_disk_usage.error or "Disk usage is not collected yet")
+    return docker_disk_usage.summary()
+
+@app.get("/api/v1/docker/container/{container_id}/history", tags=["Docker"])
+async def get_container_history(
+    container_id: str,
+    metric: str = "cpu_percent",
+    timeframe: int = 3600,
+    limit: int = 100,
+    step: Optional[float] = None
+):
+    """История метрики контейнера (по ID, префиксу ID или имени), прореженная до limit точек"""
+    full_id = container_history.resolve(container_id)
+    if full_id is None:
+        raise HTTPException(status_code=404, detail="Container history not found")
+    
+    try:
+        history = container_history.query(full_id, metric, since=time.time() - timeframe, step=step, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    for point in history["data_points"]:
+        point["time"] = datetime.fromtimestamp(point["timestamp"]).isoformat()
+    history["timeframe"] = timeframe
+    return history
+
+def action_response(result: Dict[str, Any], message: str) -> Dict[str, Any]:
+    """Результат действия над контейнером в формате ответа API"""
+    if result["status"] == "success":
+        return {
+            "status": "success",
+            "action": result["action"],
+            "container_id": result["container_id"],
+            "message": message
+        }
+    return {
+        "status": "error",
+        "action": result["action"],
+        "container_id": result["container_id"],
+        "error": result.get("error", "")
+    }
+
+def submit_job(kind: str, params: Dict[str, Any], work) -> JSONResponse:
+    """Запуск операции фоновой задачей: 202 и состояние задачи"""
+    job, created = job_manager.submit(kind, params, work)
+    return JSONResponse(status_code=202, content={**job.to_dict(), "deduplicated": not created})
+
+@app.post("/api/v1/docker/container/{container_id}/start", tags=["Docker"])
+async def start_container(container_id: str, background: bool = False):
+    """Запуск контейнера (background=true — фоновой задачей)"""
+    async def work(job=None):
+        result = await container_actions.run(container_id, "start")
+        return action_response(result, f"Container {container_id} started successfully")
+    
+    if background:
+        return submit_job("container.start", {"container_id": container_id}, work)
+    try:
+        return await work()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error starting container: {str(e)}")
 
 @app.post("/api/v1/docker/container/{container_id}/stop", tags=["Docker"])
-async def stop_container(container_id: str, timeout: int = 10):
-    """Остановка контейнера"""
+async def stop_container(container_id: str, timeout: int = 10, background: bool = False):
+    """Остановка контейнера (background=true — фоновой задачей)"""
+    async def work(job=None):
+        result = await container_actions.run(container_id, "stop", timeout)
+        return action_response(result, f"Container {container_id} stopped successfully")
+    
+    if background:
+        return submit_job("container.stop", {"container_id": container_id, "timeout": timeout}, work)
     try:
-        result = subprocess.run(
-            ["docker", "stop", "-t", str(timeout), container_id],
-            capture_output=True,
-            text=True,
-            timeout=timeout + 5
-        )
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "action": "stop",
-                "container_id": container_id,
-                "message": f"Container {container_id} stopped successfully"
-            }
-        else:
-            return {
-                "status": "error",
-                "action": "stop",
-                "container_id": container_id,
-                "error": result.stderr
-            }
+        return await work()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error stopping container: {str(e)}")
 
 @app.post("/api/v1/docker/container/{container_id}/restart", tags=["Docker"])
-async def restart_container(container_id: str, timeout: int = 10):
-    """Перезагрузка контейнера"""
+async def restart_container(container_id: str, timeout: int = 10, background: bool = False):
+    """Перезагрузка контейнера (background=true — фоновой задачей)"""
+    async def work(job=None):
+        result = await container_actions.run(container_id, "restart", timeout)
+        return action_response(result, f"Container {container_id} restarted successfully")
+    
+    if background:
+        return submit_job("container.restart", {"container_id": container_id, "timeout": timeout}, work)
     try:
-        result = subprocess.run(
-            ["docker", "restart", "-t", str(timeout), container_id],
-            capture_output=True,
-            text=True,
-            timeout=timeout + 5
-        )
-        
-        if result.returncode == 0:
-            return {
-                "status": "success",
-                "action": "restart",
-                "container_id": container_id,
-                "message": f"Container {container_id} restarted successfully"
-            }
-        else:
-            return {
-                "status": "error",
-                "action": "restart",
-                "container_id": container_id,
-                "error": result.stderr
-            }
+        return await work()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error restarting container: {str(e)}")
 
-@app.delete("/api/v1/docker/image/{image_id}")
-async def delete_docker_image(image_id: str):
-    """Delete a Docker image by ID"""
+@app.post("/api/v1/docker/containers/actions", tags=["Docker"])
+async def bulk_container_action(request: BulkContainerAction, background: bool = False):
+    """Действие над несколькими контейнерами (по ID и/или меткам) с ограниченным параллелизмом"""
+    async def work(job=None):
+        on_progress = None
+        if job is not None:
+            on_progress = lambda done, total: job_manager.update(job, done / total, f"{done}/{total}")
+        return await container_actions.bulk(
+            request.action,
+            container_ids=request.container_ids,
+            labels=request.labels,
+            timeout=request.timeout,
+            parallelism=request.parallelism,
+            on_progress=on_progress
+        )
+    
+    if background:
+        return submit_job("containers.bulk", request.model_dump(), work)
     try:
+        return await work()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error running bulk action: {str(e)}")
+
+@app.delete("/api/v1/docker/image/{image_id}")
+async def delete_docker_image(image_id: str, background: bool = False):
+    """Delete a Docker image by ID (background=true runs it as a job)"""
+    def work(job=None):
         docker_client.images.remove(image_id, force=True)
         return {
             "status": "success",
@@ -1083,13 +1527,18 @@ async def delete_docker_image(image_id: str):
             "image_id": image_id,
             "message": f"Image {image_id} deleted successfully"
         }
+    
+    if background:
+        return submit_job("image.delete", {"image_id": image_id}, work)
+    try:
+        return await asyncio.to_thread(work)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting image: {str(e)}")
 
 @app.delete("/api/v1/docker/volume/{volume_id}")
-async def delete_docker_volume(volume_id: str):
-    """Delete a Docker volume by ID"""
-    try:
+async def delete_docker_volume(volume_id: str, background: bool = False):
+    """Delete a Docker volume by ID (background=true runs it as a job)"""
+    def work(job=None):
         docker_client.volumes.get(volume_id).remove(force=True)
         return {
             "status": "success",
@@ -1098,34 +1547,45 @@ async def delete_docker_volume(volume_id: str):
             "volume_id": volume_id,
             "message": f"Volume {volume_id} deleted successfully"
         }
+    
+    if background:
+        return submit_job("volume.delete", {"volume_id": volume_id}, work)
+    try:
+        return await asyncio.to_thread(work)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting volume: {str(e)}")
 
+def scan_job(image_name: str):
+    """Сканирование Trivy (блокирующее, до 120 секунд) для выполнения в потоке"""
+    def work(job=None):
+        if not TrivyScanner.check_trivy_installed():
+            return {
+                "status": "warning",
+                "image": image_name,
+                "message": "Trivy is not installed. Install with: brew install trivy (macOS) or apt-get install trivy (Linux)",
+                "trivy_available": False
+            }
+        if job is not None:
+            job_manager.update(job, message=f"Scanning {image_name}")
+        return trivy_scanner.scan_image(image_name)
+    return work
+
 @app.get("/api/v1/docker/image/{image_id}/vulnerabilities")
-async def scan_image_vulnerabilities(image_id: str):
+async def scan_image_vulnerabilities(image_id: str, background: bool = False):
     """
     Сканирует Docker образ на уязвимости с помощью Trivy
     
     Args:
         image_id: Имя или ID образа
+        background: Запустить фоновой задачей и сразу вернуть её ID
     
     Returns:
         Результаты сканирования с найденными уязвимостями
     """
+    if background:
+        return submit_job("image.scan", {"image": image_id}, scan_job(image_id))
     try:
-        # Проверяем доступность Trivy
-        if not TrivyScanner.check_trivy_installed():
-            return {
-                "status": "warning",
-                "image": image_id,
-                "message": "Trivy is not installed. Install with: brew install trivy (macOS) or apt-get install trivy (Linux)",
-                "trivy_available": False
-            }
-        
-        # Запускаем сканирование
-        result = trivy_scanner.scan_image(image_id)
-        
-        return result
+        return await asyncio.to_thread(scan_job(image_id))
     
     except Exception as e:
         raise HTTPException(
@@ -1157,7 +1617,7 @@ async def get_available_images():
 
 
 @app.post("/api/v1/docker/image/scan")
-async def scan_image_by_name(request_data: Dict[str, str], background_tasks: BackgroundTasks):
+async def scan_image_by_name(request_data: Dict[str, str], background: bool = False):
     """
     Сканирует Docker образ по имени
     
@@ -1167,7 +1627,7 @@ async def scan_image_by_name(request_data: Dict[str, str], background_tasks: Bac
         }
     
     Returns:
-        Результаты сканирования
+        Результаты сканирования (background=true — ID фоновой задачи)
     """
     try:
         image_name = request_data.get("image_name", "").strip()
@@ -1175,19 +1635,10 @@ async def scan_image_by_name(request_data: Dict[str, str], background_tasks: Bac
         if not image_name:
             raise HTTPException(status_code=400, detail="image_name is required")
         
-        # Проверяем доступность Trivy
-        if not TrivyScanner.check_trivy_installed():
-            return {
-                "status": "warning",
-                "image": image_name,
-                "message": "Trivy is not installed",
-                "trivy_available": False
-            }
-        
-        # Запускаем сканирование
-        result = trivy_scanner.scan_image(image_name)
-        
-        return result
+        # Повторный запрос того же образа присоединяется к идущему сканированию
+        if background:
+            return submit_job("image.scan", {"image": image_name}, scan_job(image_name))
+        return await asyncio.to_thread(scan_job(image_name))
     
     except HTTPException:
         raise
@@ -1197,6 +1648,43 @@ async def scan_image_by_name(request_data: Dict[str, str], background_tasks: Bac
             detail=f"Error during scan: {str(e)}"
         )
 
+@app.get("/api/v1/jobs", tags=["Jobs"])
+async def list_jobs(kind: Optional[str] = None, status: Optional[str] = None, limit: int = 100):
+    """Фоновые задачи (от новых к старым)"""
+    if limit < 1 or limit > MAX_JOBS:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_JOBS}")
+    jobs = job_manager.list(kind=kind, status=status)
+    return {
+        "count": len(jobs),
+        "jobs": [job.to_dict() for job in jobs[:limit]],
+        "stats": job_manager.stats()
+    }
+
+@app.get("/api/v1/jobs/{job_id}", tags=["Jobs"])
+async def get_job(job_id: str):
+    """Статус, прогресс и результат фоновой задачи"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/api/v1/jobs/{job_id}/stream", tags=["Jobs"])
+async def stream_job(job_id: str):
+    """SSE-поток состояния задачи: событие job при каждом изменении до завершения"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    async def events():
+        async for state in job_manager.watch(job):
+            yield sse_hub.format_event("job", state) if state is not None else ": keepalive\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.post("/api/v1/process/{pid}/stop", tags=["System"])
 async def stop_process(pid: int, force: bool = False):
     """
@@ -0,0 +1,191 @@
+# backend/src/process_history.py
+"""
+Per-process History
+Временные ряды отдельных процессов по ключу (agent_id, pid, create_time):
+переиспользованный pid получает новый ряд. Ряды хранятся компактными
+массивами и обновляются инкрементально при приёме метрик
+"""
+
+import threading
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+RETENTION = 3600      # Глубина истории в секундах (как у metrics_history)
+MAX_POINTS = 720      # Максимум точек в ряду
+EXPIRE_AFTER = 600    # Через сколько секунд удаляется ряд исчезнувшего процесса
+
+SeriesKey = Tuple[int, int]  # (pid, create_time)
+
+
+class _Series:
+    """Ряд одного процесса: параллельные массивы значений"""
+
+    __slots__ = ("name", "command_line", "ended_at", "timestamps", "cpu", "rss", "threads", "fds")
+
+    def __init__(self, name: str, command_line: str):
+        self.name = name
+        self.command_line = command_line
+        self.ended_at: Optional[int] = None
+        self.timestamps = array("q")
+        self.cpu = array("f")
+        self.rss = array("q")
+        self.threads = array("l")
+        self.fds = array("l")
+
+    def append(self, timestamp: int, cpu: float, rss: int, threads: int, fds: int):
+        self.timestamps.append(timestamp)
+        self.cpu.append(cpu)
+        self.rss.append(rss)
+        self.threads.append(threads)
+        self.fds.append(fds)
+
+    def trim(self, horizon: int, max_points: int):
+        """Отбрасывает точки старше horizon и сверх max_points"""
+        drop = max(bisect_left(self.timestamps, horizon), len(self.timestamps) - max_points)
+        if drop > 0:
+            for values in (self.timestamps, self.cpu, self.rss, self.threads, self.fds):
+                del values[:drop]
+
+
+class _AgentHistory:
+    """Ряды процессов одного агента и индексы по pid и имени"""
+
+    __slots__ = ("series", "by_pid", "by_name", "live", "ended")
+
+    def __init__(self):
+        self.series: Dict[SeriesKey, _Series] = {}
+        self.by_pid: Dict[int, Set[SeriesKey]] = {}
+        self.by_name: Dict[str, Set[SeriesKey]] = {}
+        self.live: Set[SeriesKey] = set()
+        # Очередь на удаление (ended_at, key) в порядке завершения процессов
+        self.ended: deque = deque()
+
+    def drop(self, key: SeriesKey):
+        series = self.series.pop(key)
+        for index, value in ((self.by_pid, key[0]), (self.by_name, series.name)):
+            keys = index.get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del index[value]
+
+
+class ProcessHistoryIndex:
+    """Инкрементальный индекс истории процессов всех агентов"""
+
+    def __init__(self, retention: int = RETENTION, max_points: int = MAX_POINTS, expire_after: int = EXPIRE_AFTER):
+        self.retention = retention
+        self.max_points = max_points
+        self.expire_after = expire_after
+        self._agents: Dict[str, _AgentHistory] = {}
+        self._lock = threading.Lock()
+
+    def update(self, agent_id: str, timestamp: int, processes: Optional[List[Dict[str, Any]]]):
+        """Добавляет точки из снапшота; процессы, которых в нём нет, помечаются завершёнными"""
+        if processes is None:
+            return
+        timestamp = int(timestamp)
+        horizon = timestamp - self.retention
+
+        with self._lock:
+            state = self._agents.get(agent_id)
+            if state is None:
+                state = self._agents[agent_id] = _AgentHistory()
+
+            live = set()
+            for p in processes:
+                pid = p.get("pid")
+                if pid is None:
+                    continue
+                key = (pid, int(p.get("create_time") or 0))
+                series = state.series.get(key)
+                if series is None:
+                    name = p.get("name") or ""
+                    series = state.series[key] = _Series(name, p.get("command_line") or "")
+                    state.by_pid.setdefault(pid, set()).add(key)
+                    state.by_name.setdefault(name, set()).add(key)
+                series.ended_at = None
+                series.append(
+                    timestamp,
+                    float(p.get("cpu_percent") or 0.0),
+                    int(p.get("memory_rss") or 0),
+                    int(p.get("num_threads") or 0),
+                    int(p.get("num_fds") or 0),
+                )
+                series.trim(horizon, self.max_points)
+                live.add(key)
+
+            # Завершившиеся процессы: ряд остаётся доступен ещё expire_after секунд
+            for key in state.live - live:
+                series = state.series.get(key)
+                if series is not None:
+                    series.ended_at = timestamp
+                    state.ended.append((timestamp, key))
+            state.live = live
+
+            cutoff = timestamp - self.expire_after
+            while state.ended and state.ended[0][0] <= cutoff:
+                ended_at, key = state.ended.popleft()
+                series = state.series.get(key)
+                # Процесс мог снова появиться в снапшотах — тогда запись устарела
+                if series is not None and series.ended_at == ended_at:
+                    state.drop(key)
+
+    def forget(self, agent_id: str):
+        """Удаляет историю агента"""
+        with self._lock:
+            self._agents.pop(agent_id, None)
+
+    @staticmethod
+    def _render(key: SeriesKey, series: _Series, since: Optional[int]) -> Dict[str, Any]:
+        start = bisect_left(series.timestamps, since) if since else 0
+        return {
+            "pid": key[0],
+            "create_time": key[1],
+            "name": series.name,
+            "command_line": series.command_line,
+            "alive": series.ended_at is None,
+            "ended_at": series.ended_at,
+            "timestamps": series.timestamps[start:].tolist(),
+            "cpu_percent": [round(v, 2) for v in series.cpu[start:]],
+            "memory_rss": series.rss[start:].tolist(),
+            "num_threads": series.threads[start:].tolist(),
+            "num_fds": series.fds[start:].tolist(),
+        }
+
+    def history(
+        self,
+        agent_id: str,
+        pid: Optional[int] = None,
+        name: Optional[str] = None,
+        since: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        История процесса по pid или всех процессов с именем name
+
+        Стоимость пропорциональна размеру результата: ряды находятся по индексу.
+        Для pid возвращаются все ряды с этим pid (в том числе переиспользованные)
+        """
+        if (pid is None) == (name is None):
+            raise ValueError("exactly one of pid or name is required")
+        with self._lock:
+            state = self._agents.get(agent_id)
+            if state is None:
+                return []
+            keys = state.by_pid.get(pid, ()) if pid is not None else state.by_name.get(name, ())
+            return [self._render(key, state.series[key], since) for key in sorted(keys, key=lambda k: k[1])]
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер индекса"""
+        with self._lock:
+            return {
+                "agents": len(self._agents),
+                "series": sum(len(s.series) for s in self._agents.values()),
+                "points": sum(len(series.timestamps) for s in self._agents.values() for series in s.series.values()),
+            }
+
+
+# Глобальный индекс истории процессов
+process_history_index = ProcessHistoryIndex()
@@ -0,0 +1,148 @@
+# backend/src/process_table.py
+"""
+Cached Process Table
+Таблица процессов хоста с постоянными psutil.Process по pid: обновляется
+в фоновом потоке, добавляет новые и убирает завершившиеся процессы и
+хранит top-N по CPU и памяти. cpu_percent считается между обновлениями,
+поэтому значения осмысленные (в отличие от новых Process на каждый запрос)
+"""
+
+import heapq
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = 2.0  # Секунды между обновлениями таблицы
+TOP_N = 5
+
+
+class _Entry:
+    """Процесс и его неизменные атрибуты (читаются один раз)"""
+
+    __slots__ = ("proc", "name", "create_time", "username", "command_line")
+
+    def __init__(self, proc: psutil.Process):
+        self.proc = proc
+        with proc.oneshot():
+            self.name = proc.name()
+            self.create_time = proc.create_time()
+            try:
+                self.username = proc.username()
+            except (psutil.AccessDenied, KeyError):
+                self.username = None
+            try:
+                self.command_line = " ".join(proc.cmdline())
+            except psutil.AccessDenied:
+                self.command_line = None
+        # Первый вызов инициализирует счётчик CPU; значение появится при следующем обновлении
+        proc.cpu_percent(interval=None)
+
+
+class ProcessTable:
+    """Инкрементально обновляемая таблица процессов"""
+
+    def __init__(self, interval: float = REFRESH_INTERVAL, top_n: int = TOP_N):
+        self.interval = interval
+        self.top_n = top_n
+        self._entries: Dict[int, _Entry] = {}
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._refresh_lock = threading.Lock()
+
+    def _sync_pids(self):
+        """Добавляет новые pid и удаляет завершившиеся"""
+        current = set(psutil.pids())
+        known = self._entries.keys()
+        for pid in known - current:
+            del self._entries[pid]
+        for pid in current - known:
+            try:
+                self._entries[pid] = _Entry(psutil.Process(pid))
+            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                continue
+
+    def refresh(self) -> Dict[str, Any]:
+        """Одно обновление таблицы; результат публикуется новой ссылкой"""
+        with self._refresh_lock:
+            self._sync_pids()
+            rows = []
+            for pid, entry in list(self._entries.items()):
+                proc = entry.proc
+                try:
+                    with proc.oneshot():
+                        # pid мог быть переиспользован другим процессом
+                        if proc.create_time() != entry.create_time:
+                            raise psutil.NoSuchProcess(pid)
+                        memory_info = proc.memory_info()
+                        row = {
+                            "pid": pid,
+                            "name": entry.name,
+                            "cpu_percent": proc.cpu_percent(interval=None),
+                            "memory_percent": round(proc.memory_percent(), 3),
+                            "memory_rss": memory_info.rss,
+                            "memory_vms": memory_info.vms,
+                            "status": proc.status(),
+                            "create_time": int(entry.create_time * 1000),
+                            "num_threads": proc.num_threads(),
+                            "username": entry.username,
+                            "command_line": entry.command_line,
+                        }
+                        try:
+                            row["num_fds"] = proc.num_fds()
+                        except (psutil.AccessDenied, AttributeError):
+                            row["num_fds"] = None
+                    rows.append(row)
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    self._entries.pop(pid, None)
+                except psutil.AccessDenied:
+                    continue
+
+            brief = ("pid", "name", "cpu_percent", "memory_percent")
+            snapshot = {
+                "timestamp": time.time(),
+                "count": len(rows),
+                "processes": rows,
+                "top_cpu": [{k: r[k] for k in brief} for r in heapq.nlargest(self.top_n, rows, key=lambda r: r["cpu_percent"])],
+                "top_memory": [{k: r[k] for k in brief} for r in heapq.nlargest(self.top_n, rows, key=lambda r: r["memory_percent"])],
+            }
+            self._snapshot = snapshot
+            return snapshot
+
+    def latest(self) -> Dict[str, Any]:
+        """Последняя таблица; при первом обращении до запуска потока собирается сразу"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh()
+        return snapshot
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning(f"Process table refresh error: {e}")
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="process-table", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 2.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+
+# Глобальная таблица процессов хоста
+process_table = ProcessTable()
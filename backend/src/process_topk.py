@@ -0,0 +1,444 @@
+# backend/src/process_topk.py
+"""
+Fleet-wide Top-K Processes
+Индекс таблиц процессов всех агентов для быстрых top-K запросов.
+Ранжирование и группировка выполняются при приёме снапшота, а запрос
+только сливает готовые списки агентов вне блокировки
+"""
+
+import heapq
+import threading
+import time
+from collections import deque
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple
+
+# Поля, по которым разрешена сортировка
+SORT_FIELDS = ("cpu_percent", "memory_rss", "num_fds")
+# Варианты группировки: pid (без группировки), имя процесса, командная строка
+GROUP_BY = ("pid", "name", "command_line")
+
+BUCKET_SECONDS = 60   # Ширина окна агрегации
+MAX_WINDOW = 3600     # Максимальное окно запроса (совпадает с retention истории)
+MAX_K = 1000          # Максимальный k запроса: столько кандидатов хранится на агента
+MAX_WINDOWS = 4       # Сколько окон на агента поддерживается при приёме снапшотов
+IDLE_BUCKETS = 2      # Окно без запросов дольше стольких корзин больше не поддерживается
+
+# Индексы полей в компактной записи процесса
+_NAME, _CMD, _CPU, _RSS, _FDS = 0, 1, 2, 3, 4
+_SORT_INDEX = {"cpu_percent": _CPU, "memory_rss": _RSS, "num_fds": _FDS}
+# Индекс ключа группы в строке (agent_id, pid, name, cmd, cpu, rss, fds)
+_GROUP_INDEX = {"name": 2, "command_line": 3}
+
+
+def _compact(processes: List[Dict[str, Any]]) -> Dict[int, Tuple]:
+    """Сжимает список процессов снапшота в {pid: (name, cmd, cpu, rss, fds)}"""
+    table = {}
+    for p in processes or []:
+        pid = p.get("pid")
+        if pid is None:
+            continue
+        table[pid] = (
+            p.get("name") or "",
+            p.get("command_line") or "",
+            float(p.get("cpu_percent") or 0.0),
+            int(p.get("memory_rss") or 0),
+            int(p.get("num_fds") or 0),
+        )
+    return table
+
+
+def _rank(rows: List[Tuple]) -> Dict[str, List[Tuple]]:
+    """Строки агента, упорядоченные по убыванию каждого поля сортировки (не больше MAX_K)"""
+    return {field: heapq.nlargest(MAX_K, rows, key=itemgetter(index + 2)) for field, index in _SORT_INDEX.items()}
+
+
+def _group(rows: List[Tuple], group_by: str) -> Dict[str, List]:
+    """Суммы строк агента по группе: {ключ: [cpu, rss, fds, processes]}"""
+    index = _GROUP_INDEX[group_by]
+    groups: Dict[str, List] = {}
+    for r in rows:
+        g = groups.get(r[index])
+        if g is None:
+            groups[r[index]] = [r[4], r[5], r[6], 1]
+        else:
+            g[0] += r[4]
+            g[1] += r[5]
+            g[2] += r[6]
+            g[3] += 1
+    return groups
+
+
+def _add_bucket(sums: Dict[int, Tuple], bucket: Dict[int, Tuple], sign: int):
+    """Добавляет (sign=1) или вычитает (sign=-1) корзину из сумм окна"""
+    for pid, (name, cmd, cpu, rss, fds, n) in bucket.items():
+        acc = sums.get(pid)
+        if acc is None:
+            if sign > 0:
+                sums[pid] = (name, cmd, cpu, rss, fds, n)
+        elif acc[5] + sign * n <= 0:
+            del sums[pid]
+        else:
+            if sign < 0:
+                name, cmd = acc[0], acc[1]
+            sums[pid] = (name, cmd, acc[2] + sign * cpu, acc[3] + sign * rss, acc[4] + sign * fds, acc[5] + sign * n)
+
+
+class _Window:
+    """
+    Агрегаты агента за окно, начинающееся с корзины first: суммы закрытых
+    корзин (они больше не меняются) и ранжирование вместе с открытой корзиной
+    """
+
+    __slots__ = ("first", "open_start", "closed", "version", "rows", "_ranked", "_groups", "used")
+
+    def __init__(self, first: int, open_start: int, closed: Dict[int, Tuple], version: int, rows: List[Tuple]):
+        self.first = first
+        self.open_start = open_start
+        self.closed = closed
+        self.version = version
+        self.rows = rows
+        # Ранжирование и группировка считаются по первому запросу
+        self._ranked: Dict[str, List[Tuple]] = {}
+        self._groups: Dict[str, Dict[str, List]] = {}
+        self.used = time.monotonic()
+
+    @property
+    def span(self) -> int:
+        """Насколько окно начинается раньше открытой корзины (ключ окна у агента)"""
+        return self.open_start - self.first
+
+    def ranked(self, sort_by: str) -> List[Tuple]:
+        result = self._ranked.get(sort_by)
+        if result is None:
+            result = self._ranked[sort_by] = heapq.nlargest(MAX_K, self.rows, key=itemgetter(_SORT_INDEX[sort_by] + 2))
+        return result
+
+    def grouped(self, group_by: str) -> Dict[str, List]:
+        result = self._groups.get(group_by)
+        if result is None:
+            result = self._groups[group_by] = _group(self.rows, group_by)
+        return result
+
+
+def _build_window(agent_id: str, buckets: Tuple, first: int, version: int,
+                  base: Optional[_Window] = None) -> _Window:
+    """
+    Агрегаты окна; при наличии base (окно с first не позже) суммы закрытых
+    корзин не пересчитываются, а сдвигаются: вычитаются корзины до first
+    и добавляются закрывшиеся после base
+    """
+    open_start, open_bucket = buckets[-1] if buckets else (first, {})
+    removed = [b for start, b in buckets if base is not None and base.first <= start < min(first, base.open_start)]
+    if (base is not None and base.first <= first and base.open_start <= open_start
+            and (not removed or buckets[0][0] <= base.first)):
+        added = [b for start, b in buckets if max(base.open_start, first) <= start < open_start]
+        closed = base.closed
+        if removed or added:
+            closed = dict(closed)
+            for bucket in removed:
+                _add_bucket(closed, bucket, -1)
+            for bucket in added:
+                _add_bucket(closed, bucket, 1)
+    else:
+        closed = {}
+        for start, bucket in buckets:
+            if first <= start < open_start:
+                _add_bucket(closed, bucket, 1)
+
+    if open_start < first:
+        open_bucket = {}
+    rows = []
+    for pid, (name, cmd, cpu, rss, fds, n) in closed.items():
+        acc = open_bucket.get(pid)
+        if acc is not None:
+            name, cmd, cpu, rss, fds, n = acc[0], acc[1], cpu + acc[2], rss + acc[3], fds + acc[4], n + acc[5]
+        rows.append((agent_id, pid, name, cmd, cpu / n, rss / n, fds / n))
+    for pid, (name, cmd, cpu, rss, fds, n) in open_bucket.items():
+        if pid not in closed:
+            rows.append((agent_id, pid, name, cmd, cpu / n, rss / n, fds / n))
+    window = _Window(first, open_start, closed, version, rows)
+    if base is not None:
+        # То, что уже запрашивали, считается сразу (при приёме, а не в запросе)
+        for sort_by in base._ranked:
+            window.ranked(sort_by)
+        for group_by in base._groups:
+            window.grouped(group_by)
+    return window
+
+
+class _AgentProcesses:
+    """Последняя таблица процессов агента, её ранжирование и поминутные агрегаты"""
+
+    __slots__ = ("timestamp", "latest", "ranked", "groups", "buckets", "version", "windows")
+
+    def __init__(self):
+        self.timestamp = 0
+        self.latest: Dict[int, Tuple] = {}
+        self.ranked: Dict[str, List[Tuple]] = {field: [] for field in SORT_FIELDS}
+        self.groups: Dict[str, Dict[str, List]] = {group_by: {} for group_by in _GROUP_INDEX}
+        # deque[(bucket_start, {pid: (name, cmd, cpu_sum, rss_sum, fds_sum, samples)})];
+        # опубликованная корзина не меняется — обновление заменяет её копией
+        self.buckets: deque = deque()
+        self.version = 0
+        # Запрошенные окна {span: _Window}; при приёме снапшота сдвигаются вместе
+        # с открытой корзиной, поэтому запрос "последние N секунд" их не пересчитывает
+        self.windows: Dict[int, _Window] = {}
+
+
+class ProcessTopKIndex:
+    """Инкрементальный индекс процессов, обновляемый при приёме метрик"""
+
+    def __init__(self, bucket_seconds: int = BUCKET_SECONDS, max_window: int = MAX_WINDOW):
+        self.bucket_seconds = bucket_seconds
+        self.max_window = max_window
+        self._agents: Dict[str, _AgentProcesses] = {}
+        # Суммы последних снапшотов по группам всего парка:
+        # {group_by: {ключ: [cpu, rss, fds, processes, agents]}}
+        self._groups: Dict[str, Dict[str, List]] = {group_by: {} for group_by in _GROUP_INDEX}
+        self._lock = threading.Lock()
+
+    def _replace_groups(self, old: Dict[str, Dict[str, List]], new: Dict[str, Dict[str, List]]):
+        """Заменяет в суммах парка группы агента old на new (изменение одним проходом)"""
+        for group_by, fleet in self._groups.items():
+            previous = old.get(group_by, {})
+            for key, (cpu, rss, fds, count) in new.get(group_by, {}).items():
+                g = fleet.get(key)
+                if g is None:
+                    g = fleet[key] = [0.0, 0, 0, 0, 0]
+                prev = previous.get(key)
+                if prev is None:
+                    g[0] += cpu
+                    g[1] += rss
+                    g[2] += fds
+                    g[3] += count
+                    g[4] += 1
+                else:
+                    g[0] += cpu - prev[0]
+                    g[1] += rss - prev[1]
+                    g[2] += fds - prev[2]
+                    g[3] += count - prev[3]
+            current = new.get(group_by, {})
+            for key, (cpu, rss, fds, count) in previous.items():
+                if key in current:
+                    continue
+                g = fleet[key]
+                if g[4] <= 1:
+                    del fleet[key]
+                else:
+                    g[0] -= cpu
+                    g[1] -= rss
+                    g[2] -= fds
+                    g[3] -= count
+                    g[4] -= 1
+
+    def update(self, agent_id: str, timestamp: int, processes: Optional[List[Dict[str, Any]]]):
+        """Обновляет индекс данными нового снапшота"""
+        if processes is None:
+            return
+        table = _compact(processes)
+        bucket_start = int(timestamp) - int(timestamp) % self.bucket_seconds
+        # Ранжирование и группировка — до захвата блокировки
+        rows = [(agent_id, pid) + row for pid, row in table.items()]
+        ranked = _rank(rows)
+        groups = {group_by: _group(rows, group_by) for group_by in _GROUP_INDEX}
+
+        with self._lock:
+            state = self._agents.get(agent_id)
+            if state is None:
+                state = self._agents[agent_id] = _AgentProcesses()
+            self._replace_groups(state.groups, groups)
+            state.timestamp = int(timestamp)
+            state.latest = table
+            state.ranked = ranked
+            state.groups = groups
+            state.version += 1
+
+            if state.buckets and state.buckets[-1][0] == bucket_start:
+                bucket = dict(state.buckets.pop()[1])
+            else:
+                bucket = {}
+            for pid, (name, cmd, cpu, rss, fds) in table.items():
+                acc = bucket.get(pid)
+                if acc is None:
+                    bucket[pid] = (name, cmd, cpu, rss, fds, 1)
+                else:
+                    bucket[pid] = (name, cmd, acc[2] + cpu, acc[3] + rss, acc[4] + fds, acc[5] + 1)
+            state.buckets.append((bucket_start, bucket))
+
+            # Удаляем корзины, вышедшие за максимальное окно
+            horizon = bucket_start - self.max_window
+            while state.buckets and state.buckets[0][0] < horizon:
+                state.buckets.popleft()
+            version, windows, buckets = state.version, list(state.windows.values()), tuple(state.buckets)
+
+        if windows:
+            # Окна, которые запрашивают, сдвигаются на новый снапшот сразу при приёме
+            idle = time.monotonic() - IDLE_BUCKETS * self.bucket_seconds
+            refreshed = {}
+            for w in windows:
+                if w.used >= idle:
+                    window = _build_window(agent_id, buckets, buckets[-1][0] - w.span, version, base=w)
+                    window.used = w.used
+                    refreshed[window.span] = window
+            with self._lock:
+                if state.version == version:
+                    state.windows = refreshed
+
+    def forget(self, agent_id: str):
+        """Удаляет агента из индекса"""
+        with self._lock:
+            state = self._agents.pop(agent_id, None)
+            if state is not None:
+                self._replace_groups(state.groups, {})
+
+    def _window(self, ids: List[str], since: int) -> List[_Window]:
+        """Окна агентов; недостающие строятся (или сдвигаются из соседних) вне блокировки"""
+        # Корзины, начавшиеся не позже since - bucket_seconds, в окно не входят
+        first = since - since % self.bucket_seconds
+        entries: List[Optional[_Window]] = []
+        missing = []
+        with self._lock:
+            for agent_id in ids:
+                state = self._agents[agent_id]
+                entry = state.windows.get(state.buckets[-1][0] - first) if state.buckets else None
+                if entry is not None and entry.version == state.version:
+                    entries.append(entry)
+                    continue
+                # Основа для сдвига — окно с ближайшим first не позже запрошенного
+                base = max((w for w in state.windows.values() if w.first <= first), key=lambda w: w.first, default=None)
+                entries.append(None)
+                missing.append((len(entries) - 1, agent_id, state, state.version, tuple(state.buckets), base))
+
+        built = []
+        for position, agent_id, state, version, buckets, base in missing:
+            entries[position] = _build_window(agent_id, buckets, first, version, base)
+            built.append((state, entries[position]))
+        if built:
+            with self._lock:
+                for state, entry in built:
+                    # Снапшот, пришедший во время расчёта, окно уже не отражает
+                    if state.version != entry.version:
+                        continue
+                    windows = dict(state.windows)
+                    windows[entry.span] = entry
+                    if len(windows) > MAX_WINDOWS:
+                        del windows[min(windows.values(), key=lambda w: w.used).span]
+                    state.windows = windows
+
+        now = time.monotonic()
+        for entry in entries:
+            entry.used = now
+        return entries
+
+    def top(
+        self,
+        k: int = 20,
+        sort_by: str = "cpu_percent",
+        group_by: str = "pid",
+        window: int = 0,
+        agent_ids: Optional[List[str]] = None,
+        now: Optional[float] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Возвращает top-K процессов по всему парку агентов
+
+        Args:
+            k: Количество записей (не больше MAX_K)
+            sort_by: cpu_percent | memory_rss | num_fds
+            group_by: pid (каждый процесс отдельно) | name | command_line
+            window: 0 — последние снапшоты, иначе среднее за window секунд
+            agent_ids: Ограничить выборку этими агентами
+
+        Returns:
+            Список записей, отсортированный по убыванию sort_by
+        """
+        if sort_by not in SORT_FIELDS:
+            raise ValueError(f"sort_by must be one of {', '.join(SORT_FIELDS)}")
+        if group_by not in GROUP_BY:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY)}")
+        if window < 0 or window > self.max_window:
+            raise ValueError(f"window must be between 0 and {self.max_window}")
+        if k < 1 or k > MAX_K:
+            raise ValueError(f"k must be between 1 and {MAX_K}")
+
+        fleet_groups = None
+        if window:
+            since = int(now if now is not None else time.time()) - window
+            with self._lock:
+                ids = [a for a in (agent_ids or self._agents.keys()) if a in self._agents]
+            entries = self._window(ids, since)
+            if group_by == "pid":
+                ranked = [w.ranked(sort_by) for w in entries]
+            else:
+                agent_groups = [w.grouped(group_by) for w in entries]
+        else:
+            # Под блокировкой берутся только ссылки на готовые (неизменяемые) структуры
+            with self._lock:
+                ids = [a for a in (agent_ids or self._agents.keys()) if a in self._agents]
+                if group_by == "pid":
+                    ranked = [self._agents[a].ranked[sort_by] for a in ids]
+                elif agent_ids is None:
+                    fleet_groups = [(key, tuple(g)) for key, g in self._groups[group_by].items()]
+                else:
+                    agent_groups = [self._agents[a].groups[group_by] for a in ids]
+
+        if group_by == "pid":
+            # Списки агентов уже упорядочены: достаточно слить их головы
+            key_index = _SORT_INDEX[sort_by] + 2  # смещение на (agent_id, pid)
+            best = islice(heapq.merge(*ranked, key=itemgetter(key_index), reverse=True), k)
+            return [
+                {
+                    "agent_id": r[0],
+                    "pid": r[1],
+                    "name": r[2],
+                    "command_line": r[3],
+                    "cpu_percent": round(r[4], 2),
+                    "memory_rss": int(r[5]),
+                    "num_fds": int(r[6]),
+                }
+                for r in best
+            ]
+
+        # Группировка: суммируем группы агентов (для всего парка суммы уже готовы)
+        if fleet_groups is None:
+            merged: Dict[str, List] = {}
+            for groups in agent_groups:
+                for key, (cpu, rss, fds, count) in groups.items():
+                    g = merged.get(key)
+                    if g is None:
+                        merged[key] = [cpu, rss, fds, count, 1]
+                    else:
+                        g[0] += cpu
+                        g[1] += rss
+                        g[2] += fds
+                        g[3] += count
+                        g[4] += 1
+            fleet_groups = merged.items()
+
+        value_index = _SORT_INDEX[sort_by] - 2
+        best = heapq.nlargest(k, fleet_groups, key=lambda item: item[1][value_index])
+        return [
+            {
+                group_by: key,
+                "cpu_percent": round(g[0], 2),
+                "memory_rss": int(g[1]),
+                "num_fds": int(g[2]),
+                "processes": g[3],
+                "agents": g[4],
+            }
+            for key, g in best
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """Размер индекса"""
+        with self._lock:
+            return {
+                "agents": len(self._agents),
+                "processes": sum(len(s.latest) for s in self._agents.values()),
+            }
+
+
+# Глобальный индекс процессов
+process_topk_index = ProcessTopKIndex()
@@ -0,0 +1,224 @@
+# backend/src/procfs.py
+"""
+Linux /proc Fast Path
+Читает /proc/stat, /proc/meminfo, /proc/net/dev, /proc/diskstats и
+/proc/loadavg за один проход: файлы открываются один раз, перечитываются
+с нулевого смещения в переиспользуемый буфер и разбираются без regex.
+На других платформах используется psutil
+"""
+
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+SECTOR_SIZE = 512
+_FILES = ("stat", "meminfo", "net/dev", "diskstats", "loadavg")
+
+
+def available(root: str = "/proc") -> bool:
+    """Доступен ли быстрый путь на этой системе"""
+    return sys.platform.startswith("linux") and all(os.access(os.path.join(root, f), os.R_OK) for f in _FILES)
+
+
+class ProcReader:
+    """Пакетное чтение системных счётчиков из /proc"""
+
+    def __init__(self, root: str = "/proc", buffer_size: int = 64 * 1024):
+        self.root = root
+        self._fds: Dict[str, int] = {}
+        self._buf = bytearray(buffer_size)
+        self._prev_cpu: Optional[List[Tuple[int, int]]] = None
+        for name in _FILES:
+            self._fds[name] = os.open(os.path.join(root, name), os.O_RDONLY)
+
+    def close(self):
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds = {}
+
+    def __del__(self):
+        self.close()
+
+    def _read(self, name: str) -> bytes:
+        """Перечитывает файл с начала в общий буфер (буфер растёт при необходимости)"""
+        fd = self._fds[name]
+        os.lseek(fd, 0, os.SEEK_SET)
+        view = memoryview(self._buf)
+        size = 0
+        while True:
+            if size == len(self._buf):
+                view.release()  # bytearray нельзя расширить, пока на него есть memoryview
+                self._buf.extend(bytes(len(self._buf)))
+                view = memoryview(self._buf)
+            n = os.readv(fd, [view[size:]])
+            if n == 0:
+                break
+            size += n
+        data = bytes(view[:size])
+        view.release()
+        return data
+
+    # --- Разбор ---
+
+    @staticmethod
+    def parse_stat(data: bytes) -> List[Tuple[int, int]]:
+        """(busy, total) в тиках: [0] — суммарно, далее по ядрам"""
+        result = []
+        for line in data.split(b"\n"):
+            if not line.startswith(b"cpu"):
+                if result:
+                    break  # строки cpu идут подряд в начале файла
+                continue
+            fields = line.split()
+            values = [int(v) for v in fields[1:]]
+            # guest и guest_nice уже учтены в user и nice
+            total = sum(values[:8])
+            idle = values[3] + (values[4] if len(values) > 4 else 0)
+            result.append((total - idle, total))
+        return result
+
+    @staticmethod
+    def parse_meminfo(data: bytes) -> Dict[str, int]:
+        """Значения /proc/meminfo в байтах"""
+        result = {}
+        for line in data.split(b"\n"):
+            key, sep, rest = line.partition(b":")
+            if not sep:
+                continue
+            parts = rest.split()
+            if parts:
+                value = int(parts[0])
+                result[key.decode()] = value * 1024 if len(parts) > 1 else value
+        return result
+
+    @staticmethod
+    def parse_net_dev(data: bytes) -> Dict[str, Dict[str, int]]:
+        result = {}
+        for line in data.split(b"\n")[2:]:
+            name, sep, rest = line.partition(b":")
+            if not sep:
+                continue
+            f = rest.split()
+            result[name.strip().decode()] = {
+                "bytes_recv": int(f[0]),
+                "packets_recv": int(f[1]),
+                "err_in": int(f[2]),
+                "drop_in": int(f[3]),
+                "fifo_in": int(f[4]),
+                "bytes_sent": int(f[8]),
+                "packets_sent": int(f[9]),
+                "err_out": int(f[10]),
+                "drop_out": int(f[11]),
+                "fifo_out": int(f[12]),
+            }
+        return result
+
+    @staticmethod
+    def parse_diskstats(data: bytes) -> Dict[str, Dict[str, int]]:
+        result = {}
+        for line in data.split(b"\n"):
+            f = line.split()
+            if len(f) < 14:
+                continue
+            name = f[2].decode()
+            if name.startswith(("loop", "ram")):
+                continue
+            result[name] = {
+                "read_count": int(f[3]),
+                "read_bytes": int(f[5]) * SECTOR_SIZE,
+                "read_time": int(f[6]),
+                "write_count": int(f[7]),
+                "write_bytes": int(f[9]) * SECTOR_SIZE,
+                "write_time": int(f[10]),
+                "busy_time": int(f[12]),
+            }
+        return result
+
+    @staticmethod
+    def parse_loadavg(data: bytes) -> Tuple[float, float, float]:
+        f = data.split()
+        return float(f[0]), float(f[1]), float(f[2])
+
+    # --- Снимок ---
+
+    def _cpu_percent(self, cpu: List[Tuple[int, int]]) -> List[float]:
+        prev, self._prev_cpu = self._prev_cpu, cpu
+        if prev is None or len(prev) != len(cpu):
+            return [0.0] * len(cpu)
+        percents = []
+        for (busy, total), (pbusy, ptotal) in zip(cpu, prev):
+            dt = total - ptotal
+            percents.append(round(100.0 * (busy - pbusy) / dt, 1) if dt > 0 else 0.0)
+        return percents
+
+    def sample(self) -> Dict[str, Any]:
+        """Один проход по всем файлам"""
+        stat = self._read("stat")
+        meminfo = self._read("meminfo")
+        net_dev = self._read("net/dev")
+        diskstats = self._read("diskstats")
+        loadavg = self._read("loadavg")
+
+        cpu = self._cpu_percent(self.parse_stat(stat))
+        mem = self.parse_meminfo(meminfo)
+        nics = self.parse_net_dev(net_dev)
+
+        total = mem.get("MemTotal", 0)
+        free = mem.get("MemFree", 0)
+        buffers = mem.get("Buffers", 0)
+        cached = mem.get("Cached", 0) + mem.get("SReclaimable", 0)
+        available_mem = mem.get("MemAvailable", free + buffers + cached)
+        used = total - free - buffers - cached
+        if used < 0:
+            used = total - free
+        swap_total = mem.get("SwapTotal", 0)
+        swap_used = swap_total - mem.get("SwapFree", 0)
+
+        return {
+            "timestamp": time.time(),
+            "cpu": {
+                "percent": cpu[0] if cpu else 0.0,
+                "per_core": cpu[1:],
+                "load_avg": self.parse_loadavg(loadavg),
+            },
+            "memory": {
+                "total": total,
+                "available": available_mem,
+                "used": used,
+                "free": free,
+                "percent": round(100.0 * (total - available_mem) / total, 1) if total else 0.0,
+                "buffers": buffers,
+                "cached": cached,
+                "active": mem.get("Active"),
+                "inactive": mem.get("Inactive"),
+                "shared": mem.get("Shmem"),
+                "swap_total": swap_total,
+                "swap_used": swap_used,
+                "swap_percent": round(100.0 * swap_used / swap_total, 1) if swap_total else 0.0,
+            },
+            "network": {
+                "bytes_sent": sum(n["bytes_sent"] for n in nics.values()),
+                "bytes_recv": sum(n["bytes_recv"] for n in nics.values()),
+                "interfaces": nics,
+            },
+            "disk_io": self.parse_diskstats(diskstats),
+        }
+
+
+def statvfs_usage(path: str) -> Dict[str, Any]:
+    """Использование файловой системы через statvfs (как psutil.disk_usage)"""
+    st = os.statvfs(path)
+    total = st.f_blocks * st.f_frsize
+    free = st.f_bavail * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    total_user = used + free
+    return {
+        "total": total,
+        "used": used,
+        "free": free,
+        "percent": round(100.0 * used / total_user, 1) if total_user else 0.0,
+    }
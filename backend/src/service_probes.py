@@ -0,0 +1,137 @@
+# backend/src/service_probes.py
+"""
+Service Probes
+Проверка доступности сервисов (Docker, backend, frontend, agent) для /health:
+все проверки идут параллельно через асинхронный HTTP-клиент с общим пулом
+соединений, результат кэшируется и обновляется в фоне
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+PROBE_TTL = 5.0       # Сколько секунд результат считается свежим
+PROBE_TIMEOUT = 2.0   # Таймаут одной проверки
+
+DEFAULT_SERVICES: List[Tuple[str, str]] = [
+    ("backend", "http://localhost:8000/docs"),
+    ("frontend", "http://localhost:5173"),
+    ("agent", "http://localhost:8080/metrics"),
+]
+
+
+class ServiceProber:
+    """Параллельные проверки сервисов с кэшем и фоновым обновлением"""
+
+    def __init__(
+        self,
+        services: Optional[List[Tuple[str, str]]] = None,
+        ttl: float = PROBE_TTL,
+        timeout: float = PROBE_TIMEOUT,
+        check_docker: bool = True,
+    ):
+        self.services = list(DEFAULT_SERVICES if services is None else services)
+        self.ttl = ttl
+        self.timeout = timeout
+        self.check_docker = check_docker
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self._docker = None
+        self._results: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+        self._refreshing: Optional[asyncio.Task] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        """Общий клиент (keep-alive); пул соединений привязан к event loop"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=False)
+            self._client_loop = loop
+        return self._client
+
+    async def _probe_http(self, url: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            response = await self._http().get(url)
+        except Exception:
+            return {"status": "not_available", "status_code": None}
+        return {
+            "status": "running" if response.status_code < 500 else "error",
+            "status_code": response.status_code,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+    def _docker_version(self) -> str:
+        """Блокирующий вызов Docker SDK (выполняется в потоке); клиент переиспользуется"""
+        if self._docker is None:
+            import docker
+            self._docker = docker.from_env(timeout=int(self.timeout) or 1)
+        try:
+            self._docker.ping()
+            return self._docker.version()["Version"]
+        except Exception:
+            self._docker = None  # Переподключимся при следующей проверке
+            raise
+
+    async def _probe_docker(self) -> Dict[str, Any]:
+        try:
+            version = await asyncio.wait_for(asyncio.to_thread(self._docker_version), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            return {"status": "not_available", "error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            return {"status": "not_available", "error": str(e)}
+        return {"status": "running", "version": version}
+
+    async def refresh(self) -> Dict[str, Any]:
+        """Проверяет все сервисы одновременно"""
+        names = [name for name, _ in self.services]
+        probes = [self._probe_http(url) for _, url in self.services]
+        if self.check_docker:
+            names.insert(0, "docker")
+            probes.insert(0, self._probe_docker())
+        results = await asyncio.gather(*probes)
+        self._results = dict(zip(names, results))
+        self._checked_at = time.time()
+        return self._results
+
+    def _refresh_task(self) -> asyncio.Task:
+        # Одна проверка за раз: параллельные запросы ждут одну и ту же задачу
+        if self._refreshing is None or self._refreshing.done():
+            self._refreshing = asyncio.create_task(self.refresh())
+        return self._refreshing
+
+    async def results(self) -> Tuple[Dict[str, Any], float]:
+        """
+        Результаты проверок и время их получения
+
+        Устаревший кэш отдаётся сразу, обновление запускается в фоне;
+        ждать приходится только самую первую проверку
+        """
+        if self._results is None:
+            await self._refresh_task()
+        elif time.time() - self._checked_at >= self.ttl:
+            self._refresh_task()
+        return self._results, self._checked_at
+
+    async def run(self):
+        """Фоновая задача: держит кэш свежим"""
+        while True:
+            try:
+                await self._refresh_task()
+            except Exception as e:
+                logger.error(f"Service probe error: {e}")
+            await asyncio.sleep(self.ttl)
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Глобальный набор проверок сервисов
+service_prober = ServiceProber()
@@ -0,0 +1,216 @@
+# backend/src/sse_stream.py
+"""
+Server-Sent Events Metrics Stream
+Поток обновлений агентов с фильтрами подписчика, ограничением частоты
+и отправкой только изменившихся полей
+"""
+
+import asyncio
+import json
+import re
+import time
+from typing import Any, Dict, List, Optional, Set
+
+KEEPALIVE_INTERVAL = 15.0   # Интервал комментариев keep-alive, секунд
+DEFAULT_MAX_RATE = 1.0      # Событий в секунду на подписчика
+MAX_RATE_LIMIT = 20.0
+
+# Служебные поля снапшота, которые не транслируются
+_SKIP_FIELDS = {"received_at"}
+
+
+def flatten(value: Any, prefix: str = "", out: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Разворачивает вложенный снапшот в {путь: значение}, например disks[0].used_percent"""
+    if out is None:
+        out = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if not prefix and key in _SKIP_FIELDS:
+                continue
+            flatten(item, f"{prefix}.{key}" if prefix else key, out)
+    elif isinstance(value, list) and value and isinstance(value[0], (dict, list)):
+        for i, item in enumerate(value):
+            flatten(item, f"{prefix}[{i}]", out)
+    else:
+        out[prefix] = value
+    return out
+
+
+_MISSING = object()
+
+
+def diff(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """Изменившиеся поля; исчезнувшие поля передаются как None"""
+    if not previous:
+        return dict(current)
+    changed = {k: v for k, v in current.items() if previous.get(k, _MISSING) != v}
+    for k in previous.keys() - current.keys():
+        changed[k] = None
+    return changed
+
+
+def compile_paths(paths: Optional[List[str]]):
+    """Компилирует фильтры путей: префикс пути, `[*]` — любой индекс"""
+    if not paths:
+        return None
+    patterns = []
+    for path in paths:
+        escaped = re.escape(path.strip()).replace(r"\[\*\]", r"\[\d+\]")
+        patterns.append(escaped + r"(?:$|[.\[])")
+    return re.compile("|".join(f"(?:{p})" for p in patterns))
+
+
+class SSESubscriber:
+    """Подписчик SSE: фильтры, накопленные изменения и ограничение частоты"""
+
+    def __init__(
+        self,
+        agent_ids: Optional[Set[str]] = None,
+        labels: Optional[Dict[str, str]] = None,
+        paths: Optional[List[str]] = None,
+        max_rate: float = DEFAULT_MAX_RATE,
+    ):
+        self.agent_ids = agent_ids or None
+        self.labels = labels or None
+        self.path_filter = compile_paths(paths)
+        self.min_interval = 1.0 / max_rate
+        self.pending: Dict[str, Dict[str, Any]] = {}
+        self.ready = asyncio.Event()
+        self.last_emit = 0.0
+        self.coalesced = 0
+        self.seen: Set[str] = set()
+
+    def matches_agent(self, agent_id: str, agent_labels: Optional[Dict[str, str]]) -> bool:
+        if self.agent_ids is not None and agent_id not in self.agent_ids:
+            return False
+        if self.labels is not None:
+            agent_labels = agent_labels or {}
+            return all(agent_labels.get(k) == v for k, v in self.labels.items())
+        return True
+
+    def offer(self, agent_id: str, changes: Dict[str, Any]):
+        """Сливает изменения с ещё не отправленными: промежуточные значения сворачиваются"""
+        if self.path_filter is not None:
+            match = self.path_filter.match
+            filtered = {k: v for k, v in changes.items() if match(k)}
+            if not filtered:
+                return
+            if "timestamp" in changes:
+                filtered["timestamp"] = changes["timestamp"]
+            changes = filtered
+        elif not changes:
+            return
+        pending = self.pending.get(agent_id)
+        if pending is None:
+            # Копия: словарь изменений общий для всех подписчиков
+            self.pending[agent_id] = dict(changes)
+        else:
+            self.coalesced += 1
+            pending.update(changes)
+        self.ready.set()
+
+    def drain(self) -> Dict[str, Dict[str, Any]]:
+        pending, self.pending = self.pending, {}
+        self.ready.clear()
+        self.last_emit = time.monotonic()
+        return pending
+
+
+class SSEHub:
+    """Считает diff снапшота один раз на приём и раздаёт его подписчикам"""
+
+    def __init__(self):
+        self.subscribers: Set[SSESubscriber] = set()
+        self._last_raw: Dict[str, Dict[str, Any]] = {}
+        self._last_flat: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._labels: Dict[str, Dict[str, str]] = {}
+
+    def _flat(self, agent_id: str) -> Optional[Dict[str, Any]]:
+        flat = self._last_flat.get(agent_id)
+        if flat is None and agent_id in self._last_raw:
+            flat = self._last_flat[agent_id] = flatten(self._last_raw[agent_id])
+        return flat
+
+    def publish(self, agent_id: str, metrics: Dict[str, Any], labels: Optional[Dict[str, str]] = None):
+        """Регистрирует новый снапшот агента"""
+        self._labels[agent_id] = labels or {}
+        targets = [s for s in self.subscribers if s.matches_agent(agent_id, labels)]
+        if not targets:
+            # Никто не слушает: откладываем разворачивание до появления подписчика
+            self._last_raw[agent_id] = metrics
+            self._last_flat[agent_id] = None
+            return
+
+        previous = self._flat(agent_id)
+        current = flatten(metrics)
+        self._last_raw[agent_id] = metrics
+        self._last_flat[agent_id] = current
+        changes = diff(previous, current)
+        if not changes:
+            return
+        for subscriber in targets:
+            subscriber.offer(agent_id, changes)
+
+    def forget(self, agent_id: str):
+        self._last_raw.pop(agent_id, None)
+        self._last_flat.pop(agent_id, None)
+        self._labels.pop(agent_id, None)
+
+    def subscribe(self, subscriber: SSESubscriber) -> SSESubscriber:
+        """Добавляет подписчика и ставит в очередь полный текущий снимок подходящих агентов"""
+        self.subscribers.add(subscriber)
+        for agent_id in list(self._last_raw):
+            if subscriber.matches_agent(agent_id, self._labels.get(agent_id)):
+                subscriber.offer(agent_id, dict(self._flat(agent_id)))
+        return subscriber
+
+    def unsubscribe(self, subscriber: SSESubscriber):
+        self.subscribers.discard(subscriber)
+
+    @staticmethod
+    def format_event(event: str, data: Dict[str, Any]) -> str:
+        payload = json.dumps(data, default=str, separators=(",", ":"))
+        return f"event: {event}\ndata: {payload}\n\n"
+
+    async def stream(self, subscriber: SSESubscriber, is_disconnected=None):
+        """Асинхронный генератор SSE кадров для одного подписчика"""
+        self.subscribe(subscriber)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    if is_disconnected is not None and await is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+
+                # Ограничение частоты: ждём, пока накопятся изменения, и отдаём последнее состояние
+                wait = subscriber.last_emit + subscriber.min_interval - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+
+                for agent_id, changes in subscriber.drain().items():
+                    # Первое событие по агенту — полный снимок, дальше только изменения
+                    event = "update" if agent_id in subscriber.seen else "snapshot"
+                    subscriber.seen.add(agent_id)
+                    yield self.format_event(event, {
+                        "agent_id": agent_id,
+                        "timestamp": changes.get("timestamp"),
+                        "changes": changes,
+                    })
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "agents": len(self._last_raw),
+            "pending": sum(len(s.pending) for s in self.subscribers),
+            "coalesced": sum(s.coalesced for s in self.subscribers),
+        }
+
+
+# Глобальный хаб SSE
+sse_hub = SSEHub()
@@ -0,0 +1,126 @@
+# backend/src/ws_broadcaster.py
+"""
+WebSocket Metrics Broadcaster
+Рассылка обновлений метрик подписчикам /ws/metrics: каждое обновление
+сериализуется один раз, у каждого подписчика ограниченная очередь отправки
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+logger = logging.getLogger(__name__)
+
+MAX_PENDING = 64  # Максимум неотправленных кадров на подписчика
+
+
+class Subscriber:
+    """Подписчик с ограниченной очередью, сворачивающей обновления по ключу"""
+
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self.pending: "OrderedDict[Any, str]" = OrderedDict()
+        self.ready = asyncio.Event()
+        self.sent = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    def offer(self, key: Any, frame: str):
+        """Ставит кадр в очередь; более старый кадр с тем же ключом заменяется"""
+        if key in self.pending:
+            del self.pending[key]
+            self.coalesced += 1
+        elif len(self.pending) >= self.max_pending:
+            # Медленный клиент: выбрасываем самый старый кадр
+            self.pending.popitem(last=False)
+            self.dropped += 1
+        self.pending[key] = frame
+        self.ready.set()
+
+    def take(self) -> Optional[str]:
+        """Забирает самый старый кадр из очереди"""
+        if not self.pending:
+            self.ready.clear()
+            return None
+        return self.pending.popitem(last=False)[1]
+
+
+class MetricsBroadcaster:
+    """Рассылает сериализованные обновления всем подписчикам"""
+
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self.subscribers: Set[Subscriber] = set()
+        self.published = 0
+
+    @staticmethod
+    def serialize(message: Dict[str, Any]) -> str:
+        return json.dumps(message, default=str, separators=(",", ":"))
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.max_pending)
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    def publish(self, key: Any, message: Dict[str, Any]):
+        """Сериализует сообщение один раз и раздаёт одну и ту же строку всем подписчикам"""
+        if not self.subscribers:
+            return
+        frame = self.serialize(message)
+        self.published += 1
+        for subscriber in self.subscribers:
+            subscriber.offer(key, frame)
+
+    def publish_metrics(self, agent_id: str, metrics: Dict[str, Any]):
+        """Публикует обновление метрик агента в формате, ожидаемом фронтендом"""
+        self.publish(agent_id, {"type": "metrics_update", "data": {agent_id: metrics}})
+
+    async def serve(self, websocket: WebSocket, initial: Optional[Dict[str, Any]] = None):
+        """Обслуживает одно WebSocket соединение до его закрытия"""
+        await websocket.accept()
+        subscriber = self.subscribe()
+        if initial:
+            subscriber.offer("__initial__", self.serialize({"type": "metrics_update", "data": initial}))
+
+        async def sender():
+            while True:
+                await subscriber.ready.wait()
+                frame = subscriber.take()
+                if frame is not None:
+                    await websocket.send_text(frame)
+                    subscriber.sent += 1
+
+        send_task = asyncio.create_task(sender())
+        try:
+            while True:
+                # Входящие сообщения клиента не используются, читаем только для обнаружения закрытия
+                message = await websocket.receive_text()
+                if message == "ping":
+                    subscriber.offer("__pong__", self.serialize({"type": "pong"}))
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            logger.warning(f"WebSocket connection error: {e}")
+        finally:
+            send_task.cancel()
+            self.unsubscribe(subscriber)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "pending": sum(len(s.pending) for s in self.subscribers),
+            "coalesced": sum(s.coalesced for s in self.subscribers),
+            "dropped": sum(s.dropped for s in self.subscribers),
+        }
+
+
+# Глобальный broadcaster для /ws/metrics
+metrics_broadcaster = MetricsBroadcaster()
@@ -0,0 +1,53 @@
+import time
+
+import pytest
+
+
+@pytest.fixture
+def make_metrics():
+    """Фабрика валидных payload'ов AgentMetrics"""
+
+    def _make(agent_id="agent-1", timestamp=None, cpu=10.0, memory=50.0, processes=None, **extra):
+        payload = {
+            "agent_id": agent_id,
+            "timestamp": int(timestamp if timestamp is not None else time.time()),
+            "system": {
+                "hostname": f"{agent_id}-host",
+                "os": "linux",
+                "platform": "ubuntu",
+                "kernel_version": "6.1.0",
+                "uptime": 1000,
+                "boot_time": 0,
+                "num_goroutine": 10,
+                "num_cpu": 4,
+            },
+            "cpu": {"usage": cpu},
+            "memory": {
+                "total": 8 * 1024 ** 3,
+                "available": 4 * 1024 ** 3,
+                "used": 4 * 1024 ** 3,
+                "used_percent": memory,
+                "free": 4 * 1024 ** 3,
+            },
+        }
+        if processes is not None:
+            payload["processes"] = processes
+        payload.update(extra)
+        return payload
+
+    return _make
+
+
+@pytest.fixture
+def fake_docker():
+    """Поддельный Docker Engine API на unix-сокете (короткий путь: лимит sun_path)"""
+    import shutil
+    import tempfile
+
+    from fake_docker import FakeDockerServer, default_routes
+
+    directory = tempfile.mkdtemp(prefix="iw-", dir="/tmp")
+    server = default_routes(FakeDockerServer(f"{directory}/docker.sock")).start()
+    yield server
+    server.stop()
+    shutil.rmtree(directory, ignore_errors=True)
@@ -0,0 +1,215 @@
+"""Поддельный Docker Engine API на unix-сокете для тестов"""
+
+import json
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import parse_qs, urlsplit
+
+
+class FakeRequest:
+    def __init__(self, method, path, query, body):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+
+    def param(self, name, default=None):
+        values = self.query.get(name)
+        return values[0] if values else default
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, как у настоящего dockerd
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self):
+        return "fake-docker"
+
+    def _dispatch(self):
+        server = self.server.fake
+        url = urlsplit(self.path)
+        path = url.path
+        # Версионированные пути (/v1.43/...) обрабатываются как обычные
+        if path.startswith("/v1.") and path.count("/") > 1:
+            path = path[path.index("/", 1):]
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        request = FakeRequest(self.command, path, parse_qs(url.query), body)
+        server.requests.append(request)
+
+        handler = server.routes.get((self.command, path))
+        if handler is None:
+            for (method, prefix), candidate in server.prefix_routes.items():
+                if method == self.command and path.startswith(prefix):
+                    handler = candidate
+                    break
+        if handler is None:
+            return self._send_json(404, {"message": f"page not found: {path}"})
+
+        result = handler(request) if callable(handler) else handler
+        status = 200
+        if isinstance(result, tuple):
+            status, result = result
+        if hasattr(result, "__next__"):
+            return self._send_stream(status, result)
+        if result is None:
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json(status, result)
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, status, chunks):
+        """Потоковый ответ (events, stats): JSON-объекты построчно, chunked"""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                data = (json.dumps(chunk) + "\n").encode()
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    do_GET = do_POST = do_DELETE = do_HEAD = _dispatch
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def process_request(self, request, client_address):
+        self.fake.connections += 1
+        super().process_request(request, client_address)
+
+
+class FakeDockerServer:
+    """
+    Маршруты: route("GET", "/info", {...}) или route("GET", "/x", lambda req: ...).
+    Обработчик может вернуть (status, payload) или генератор для потокового ответа
+    """
+
+    def __init__(self, socket_path):
+        self.socket_path = str(socket_path)
+        self.routes = {}
+        self.prefix_routes = {}
+        self.requests = []
+        self.connections = 0
+        self._server = _Server(self.socket_path, _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+
+    def route(self, method, path, handler):
+        self.routes[(method, path)] = handler
+
+    def route_prefix(self, method, prefix, handler):
+        self.prefix_routes[(method, prefix)] = handler
+
+    def paths(self, method="GET"):
+        return [r.path for r in self.requests if r.method == method]
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+INFO = {
+    "ServerVersion": "24.0.7",
+    "Architecture": "x86_64",
+    "OSType": "linux",
+    "KernelVersion": "6.1.0",
+    "Containers": 2,
+    "ContainersRunning": 1,
+    "ContainersPaused": 0,
+    "ContainersStopped": 1,
+    "Images": 2,
+    "Driver": "overlay2",
+    "LoggingDriver": "json-file",
+    "CgroupDriver": "systemd",
+    "MemTotal": 8 * 1024 ** 3,
+    "NCPU": 4,
+    "OperatingSystem": "Debian GNU/Linux 12",
+    "DefaultRuntime": "runc",
+    "Warnings": None,
+}
+
+CONTAINERS = [
+    {
+        "Id": "a" * 64,
+        "Names": ["/web"],
+        "Image": "nginx:latest",
+        "ImageID": "sha256:" + "1" * 64,
+        "Command": "nginx -g 'daemon off;'",
+        "Created": 1700000000,
+        "State": "running",
+        "Status": "Up 2 hours",
+        "Ports": [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8080, "Type": "tcp"}, {"PrivatePort": 443, "Type": "tcp"}],
+        "Labels": {"com.docker.compose.project": "shop"},
+    },
+    {
+        "Id": "b" * 64,
+        "Names": ["/db"],
+        "Image": "postgres:16",
+        "ImageID": "sha256:" + "2" * 64,
+        "Command": "docker-entrypoint.sh postgres",
+        "Created": 1700000100,
+        "State": "exited",
+        "Status": "Exited (0) 5 minutes ago",
+        "Ports": [],
+        "Labels": {},
+    },
+]
+
+IMAGES = [
+    {
+        "Id": "sha256:" + "1" * 64,
+        "RepoTags": ["nginx:latest"],
+        "RepoDigests": ["nginx@sha256:" + "f" * 64],
+        "ParentId": "",
+        "Created": 1690000000,
+        "Size": 187 * 1024 ** 2,
+        "SharedSize": -1,
+        "Containers": -1,
+        "Labels": None,
+    },
+    {
+        "Id": "sha256:" + "2" * 64,
+        "RepoTags": ["postgres:16"],
+        "RepoDigests": [],
+        "ParentId": "",
+        "Created": 1695000000,
+        "Size": 412 * 1024 ** 2,
+        "SharedSize": -1,
+        "Containers": -1,
+        "Labels": {"maintainer": "postgres"},
+    },
+]
+
+
+def default_routes(server):
+    """Минимальный набор ответов для /api/v1/docker/metrics"""
+    server.route("GET", "/info", INFO)
+    server.route("GET", "/version", {"Version": "24.0.7", "ApiVersion": "1.43"})
+    server.route("GET", "/_ping", "OK")
+    server.route("GET", "/containers/json", CONTAINERS)
+    server.route("GET", "/images/json", IMAGES)
+    server.route("GET", "/networks", [{"Id": "n" * 64, "Name": "bridge", "Driver": "bridge", "Scope": "local"}])
+    server.route("GET", "/volumes", {"Volumes": [{"Name": "pgdata", "Driver": "local", "Mountpoint": "/var/lib/docker/volumes/pgdata/_data", "Scope": "local"}], "Warnings": None})
+    return server
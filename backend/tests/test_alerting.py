@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.alerting import AlertEngine, AlertRule, FileNotifier, parse_expression
+from src.main import app, alert_engine
+
+
+def test_parse_expression():
+    parsed = parse_expression("disks[*].used_percent > 85 for 2m")
+    assert parsed["segments"] == ["disks", "*", "used_percent"]
+    assert parsed["threshold"] == 85.0
+    assert parsed["for"] == 120
+    with pytest.raises(ValueError):
+        parse_expression("cpu.usage >> 90")
+
+
+def test_pending_then_firing_then_resolved_with_hysteresis(tmp_path):
+    engine = AlertEngine()
+    log = tmp_path / "alerts.jsonl"
+    engine.add_notifier(FileNotifier(str(log)))
+    engine.add_rule(AlertRule("cpu.usage > 90 for 2m", hysteresis=5, rule_id="cpu"))
+
+    assert engine.evaluate("a", {"timestamp": 0, "cpu": {"usage": 95}}) == []
+    assert engine.alerts()[0]["state"] == "pending"
+    events = engine.evaluate("a", {"timestamp": 120, "cpu": {"usage": 96}})
+    assert [e["status"] for e in events] == ["firing"]
+
+    # 88 ниже порога, но внутри гистерезиса — алерт продолжает гореть
+    assert engine.evaluate("a", {"timestamp": 130, "cpu": {"usage": 88}}) == []
+    events = engine.evaluate("a", {"timestamp": 140, "cpu": {"usage": 80}})
+    assert [e["status"] for e in events] == ["resolved"]
+    assert engine.alerts() == []
+
+    engine.flush()
+    lines = [json.loads(line) for line in log.read_text().splitlines()]
+    assert [line["status"] for line in lines] == ["firing", "resolved"]
+
+
+def test_pending_cleared_when_condition_stops():
+    engine = AlertEngine()
+    engine.add_rule(AlertRule("cpu.usage > 90 for 1m"))
+    engine.evaluate("a", {"timestamp": 0, "cpu": {"usage": 95}})
+    engine.evaluate("a", {"timestamp": 30, "cpu": {"usage": 10}})
+    assert engine.evaluate("a", {"timestamp": 90, "cpu": {"usage": 95}}) == []
+
+
+def test_wildcard_instances_and_indexing():
+    engine = AlertEngine()
+    engine.add_rule(AlertRule("disks[*].used_percent > 85"))
+    engine.add_rule(AlertRule("cpu.usage > 50", agent_id="other"))
+
+    events = engine.evaluate("a", {"timestamp": 1, "cpu": {"usage": 99}, "disks": [
+        {"mountpoint": "/", "used_percent": 90},
+        {"mountpoint": "/data", "used_percent": 10},
+    ]})
+    assert [(e["instance"], e["status"]) for e in events] == [("/", "firing")]
+    # Правило другого агента не вычислялось
+    assert engine.evaluations == 1
+
+
+def test_alert_api(make_metrics):
+    with TestClient(app) as client:
+        response = client.post("/api/v1/alerts/rules", json={"expr": "memory.used_percent > 70", "id": "mem-test"})
+        assert response.status_code == 200
+        assert client.post("/api/v1/alerts/rules", json={"expr": "nonsense"}).status_code == 400
+
+        client.post("/api/v1/metrics", json=make_metrics(agent_id="alert-agent", memory=80.0))
+        alerts = client.get("/api/v1/alerts", params={"agent_id": "alert-agent"}).json()
+        assert alerts["firing_count"] == 1
+
+        assert client.delete("/api/v1/alerts/rules/mem-test").status_code == 200
+        assert alert_engine.alerts(agent_id="alert-agent") == []
+
+
+def test_same_name_processes_are_separate_instances():
+    engine = AlertEngine()
+    engine.add_rule(AlertRule("processes[*].cpu_percent > 50"))
+    events = engine.evaluate("a", {"timestamp": 1, "processes": [
+        {"pid": 10, "name": "python", "create_time": 100.0, "cpu_percent": 90},
+        {"pid": 11, "name": "python", "create_time": 101.0, "cpu_percent": 95},
+    ]})
+    assert sorted(e["instance"] for e in events) == ["10@100.0", "11@101.0"]
+
+
+def test_vanished_instance_is_resolved():
+    engine = AlertEngine()
+    engine.add_rule(AlertRule("disks[*].used_percent > 85"))
+    engine.add_rule(AlertRule("disks[*].used_percent > 85 for 1m", name="slow"))
+    engine.evaluate("a", {"timestamp": 0, "disks": [{"mountpoint": "/mnt", "used_percent": 90}]})
+
+    events = engine.evaluate("a", {"timestamp": 10, "disks": [{"mountpoint": "/", "used_percent": 10}]})
+    assert [(e["instance"], e["status"], e["reason"]) for e in events] == [("/mnt", "resolved", "instance_missing")]
+    # pending отложенного правила снят: при возврате диска отсчёт начинается заново
+    events = engine.evaluate("a", {"timestamp": 90, "disks": [{"mountpoint": "/mnt", "used_percent": 90}]})
+    assert [e["rule"] for e in events] == ["disks[*].used_percent > 85"]
+    assert [a["since"] for a in engine.alerts(state="pending")] == [90]
+
+
+def test_rules_indexed_by_full_path():
+    engine = AlertEngine()
+    usage = engine.add_rule(AlertRule("cpu.usage > 50"))
+    engine.add_rule(AlertRule("cpu.iowait > 10"))
+    engine.add_rule(AlertRule("temperatures[*].temperature > 80"))
+
+    engine.evaluate("a", {"timestamp": 1, "cpu": {"usage": 99}, "temperatures": None})
+    # cpu.iowait и temperatures в снапшоте нет — правила не вычислялись
+    assert engine.evaluations == 1
+
+    engine.remove_rule(usage.id)
+    assert engine.alerts() == [] and "usage" not in engine._index[None].children["cpu"].children
+    engine.evaluate("a", {"timestamp": 2, "cpu": {"usage": 99, "iowait": 20}})
+    assert [a["rule"] for a in engine.alerts()] == ["cpu.iowait > 10"]
+    engine.forget_agent("a")
+    assert engine.alerts() == [] and engine._instances == {}
@@ -0,0 +1,80 @@
+from fastapi.testclient import TestClient
+
+from src.anomaly import AnomalyDetector
+from src.main import app
+
+
+def _feed(detector, values, agent_id="a", start=0, step=10):
+    scores = []
+    for i, value in enumerate(values):
+        scores.append(detector.update(agent_id, {"timestamp": start + i * step, "cpu": {"usage": value}}))
+    return scores
+
+
+def test_spike_is_flagged_after_warmup():
+    detector = AnomalyDetector(series=("cpu.usage",), warmup=5)
+    scores = _feed(detector, [10, 11, 10, 9, 10, 11, 10, 9, 10, 95])
+
+    assert scores[0]["cpu.usage"] == 0.0
+    assert scores[-1]["cpu.usage"] > 3
+    assert [a["series"] for a in detector.anomalies()] == ["cpu.usage"]
+
+    # Возврат к норме снимает аномалию
+    _feed(detector, [10], start=100)
+    assert detector.anomalies() == []
+
+
+def test_flat_series_with_jitter_is_not_anomalous():
+    detector = AnomalyDetector(series=("disks[*].used_percent",), warmup=5)
+
+    def disk(i, value):
+        return detector.update("a", {"timestamp": i * 10, "disks": [{"mountpoint": "/", "used_percent": value}]})
+
+    for i in range(20):
+        disk(i, 41.0)
+    assert abs(disk(20, 41.01)["disks[/].used_percent"]) < 1
+    assert detector.anomalies() == []
+    # Реальный скачок по-прежнему аномален
+    assert disk(21, 60.0)["disks[/].used_percent"] > 3
+
+
+def test_wildcard_series_per_instance():
+    detector = AnomalyDetector(series=("disks[*].used_percent",), warmup=1)
+    scores = detector.update("a", {"timestamp": 0, "disks": [{"mountpoint": "/", "used_percent": 40}]})
+    assert list(scores) == ["disks[/].used_percent"]
+
+
+def test_seasonal_buckets_use_hourly_baseline():
+    detector = AnomalyDetector(series=("cpu.usage",), warmup=3, seasonal=True)
+    # Ночью нагрузка низкая, днём — высокая; после прогрева дневное значение не аномально
+    for day in range(5):
+        base = day * 86400
+        _feed(detector, [5, 6, 5], start=base + 2 * 3600, step=60)
+        _feed(detector, [80, 82, 81], start=base + 14 * 3600, step=60)
+    scores = _feed(detector, [81], start=6 * 86400 + 14 * 3600)
+    assert abs(scores[0]["cpu.usage"]) < 3
+
+
+def test_history_includes_anomaly_score(make_metrics):
+    with TestClient(app) as client:
+        client.post("/api/v1/metrics", json=make_metrics(agent_id="anomaly-agent"))
+        points = client.get("/api/v1/metrics/history", params={"agent_id": "anomaly-agent"}).json()["data_points"]
+        assert points[-1]["anomaly_score"] == 0.0
+        assert client.get("/api/v1/anomalies").status_code == 200
+
+
+def test_vanished_instance_is_dropped():
+    detector = AnomalyDetector(series=("disks[*].used_percent",), warmup=2)
+    for i in range(5):
+        detector.update("a", {"timestamp": i, "disks": [
+            {"mountpoint": "/", "used_percent": 40},
+            {"mountpoint": "/mnt", "used_percent": 10 if i < 4 else 90},
+        ]})
+    assert [a["series"] for a in detector.anomalies()] == ["disks[/mnt].used_percent"]
+
+    # Снапшот без секции disks ряды не трогает, с секцией без /mnt — удаляет
+    detector.update("a", {"timestamp": 5, "cpu": {"usage": 1}})
+    assert detector.stats()["series"] == 2
+    detector.update("a", {"timestamp": 6, "disks": [{"mountpoint": "/", "used_percent": 40}]})
+    assert detector.anomalies() == []
+    assert detector.stats() == {"series": 1, "anomalous": 0}
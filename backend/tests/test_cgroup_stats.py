@@ -0,0 +1,131 @@
+import asyncio
+import shutil
+import time
+
+from src.cgroup_stats import CGROUPFS, CgroupReader, available
+from src.container_stats import ContainerStatsCollector
+from src.docker_api import DockerEngineAPI
+
+CONTAINER_ID = "c" * 64
+
+NET_DEV = (
+    "Inter-|   Receive                                                |  Transmit\n"
+    " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed\n"
+    "    lo:  9999      10    0    0    0     0          0         0     9999      10    0    0    0     0       0          0\n"
+    "  eth0:  {rx}      10    0    0    0     0          0         0     {tx}      10    0    0    0     0       0          0\n"
+)
+
+
+def _write_cgroup(path, usage_usec, rbytes, memory_max="max"):
+    path.mkdir(parents=True, exist_ok=True)
+    (path / "cpu.stat").write_text(f"usage_usec {usage_usec}\nuser_usec 0\nsystem_usec 0\n")
+    (path / "memory.current").write_text("3000\n")
+    (path / "memory.max").write_text(f"{memory_max}\n")
+    (path / "memory.stat").write_text("anon 1000\nfile 2000\ninactive_file 1000\n")
+    (path / "io.stat").write_text(f"8:0 rbytes={rbytes} wbytes=10 rios=1 wios=1\n8:16 rbytes={rbytes} wbytes=0\n")
+    (path / "pids.current").write_text("4\n")
+    (path / "cgroup.procs").write_text("42\n43\n")
+
+
+def _write_net(proc, rx, tx):
+    net = proc / "42" / "net"
+    net.mkdir(parents=True, exist_ok=True)
+    (net / "dev").write_text(NET_DEV.format(rx=rx, tx=tx))
+
+
+def _tree(tmp_path, layout):
+    root = tmp_path / "cgroup"
+    root.mkdir()
+    (root / "cgroup.controllers").write_text("cpu memory io pids\n")
+    if layout == "systemd":
+        path = root / "system.slice" / f"docker-{CONTAINER_ID}.scope"
+    else:
+        path = root / "docker" / CONTAINER_ID
+    return root, path
+
+
+def test_systemd_layout_and_deltas(tmp_path):
+    root, path = _tree(tmp_path, "systemd")
+    proc = tmp_path / "proc"
+    _write_cgroup(path, usage_usec=1_000_000, rbytes=100)
+    _write_net(proc, rx=1000, tx=500)
+    reader = CgroupReader(root=str(root), proc_root=str(proc), host_memory=8000)
+    assert available(str(root))
+
+    first = reader.read(CONTAINER_ID, "web")
+    assert first["id"] == CONTAINER_ID[:12] and first["name"] == "web"
+    assert (first["memory_usage"], first["memory_limit"], first["memory_percent"]) == (2000, 8000, 25.0)
+    assert (first["network_rx"], first["network_tx"]) == (1000, 500)  # lo не учитывается
+    assert (first["block_read"], first["block_write"]) == (200, 10)
+    assert first["pids"] == 4 and first["cpu_percent"] == 0.0
+
+    prev_at = reader._prev[CONTAINER_ID][0]
+    _write_cgroup(path, usage_usec=1_500_000, rbytes=300)
+    _write_net(proc, rx=3000, tx=500)
+    # Фиксированный интервал в 1 секунду между чтениями
+    reader._prev[CONTAINER_ID] = (prev_at - 1.0,) + reader._prev[CONTAINER_ID][1:]
+    second = reader.read(CONTAINER_ID, "web")
+    elapsed = 1.0 + (time.monotonic() - prev_at)
+    assert abs(second["cpu_percent"] - 50.0 / elapsed) < 1.0
+    assert second["network_rx_per_sec"] > 1900
+    assert second["block_read_per_sec"] > 390 and second["network_tx_per_sec"] == 0.0
+
+
+def test_cgroupfs_layout_with_memory_limit(tmp_path):
+    root, path = _tree(tmp_path, "cgroupfs")
+    _write_cgroup(path, usage_usec=0, rbytes=0, memory_max="4000")
+    reader = CgroupReader(root=str(root), proc_root=str(tmp_path / "proc"), driver=CGROUPFS)
+
+    stats = reader.sweep({CONTAINER_ID: "db", "d" * 64: "gone"})
+    assert list(stats) == [CONTAINER_ID]
+    assert stats[CONTAINER_ID]["memory_limit"] == 4000
+    assert stats[CONTAINER_ID]["network_rx"] == 0  # нет /proc/<pid>/net/dev
+
+
+def test_removed_cgroup_is_forgotten(tmp_path):
+    root, path = _tree(tmp_path, "systemd")
+    _write_cgroup(path, usage_usec=0, rbytes=0)
+    reader = CgroupReader(root=str(root), proc_root=str(tmp_path / "proc"))
+    assert reader.read(CONTAINER_ID) is not None
+
+    shutil.rmtree(path)
+    assert reader.read(CONTAINER_ID) is None
+    assert CONTAINER_ID not in reader._paths and CONTAINER_ID not in reader._prev
+
+
+def test_disabled_controllers_leave_fields_empty(tmp_path):
+    root, path = _tree(tmp_path, "systemd")
+    _write_cgroup(path, usage_usec=0, rbytes=0)
+    (path / "io.stat").unlink()
+    (path / "pids.current").unlink()
+    reader = CgroupReader(root=str(root), proc_root=str(tmp_path / "proc"), host_memory=8000)
+
+    # Контейнер работает: нет только файлов контроллеров io и pids
+    stats = reader.read(CONTAINER_ID, "web")
+    assert (stats["block_read"], stats["block_write"], stats["pids"]) == (0, 0, 0)
+    assert stats["memory_usage"] == 2000
+    assert CONTAINER_ID in reader._paths
+
+
+def test_collector_sweeps_cgroups_instead_of_streaming(tmp_path, fake_docker):
+    root, path = _tree(tmp_path, "systemd")
+    _write_cgroup(path, usage_usec=0, rbytes=0)
+    fake_docker.route("GET", "/containers/json", [{"Id": CONTAINER_ID, "Names": ["/web"], "State": "running"}])
+    fake_docker.route("GET", f"/containers/{CONTAINER_ID}/json", {"Id": CONTAINER_ID, "RestartCount": 1, "State": {"StartedAt": "2020-01-01T00:00:00Z"}})
+
+    async def scenario():
+        collector = ContainerStatsCollector(
+            api=DockerEngineAPI(socket_path=fake_docker.socket_path),
+            cgroups=CgroupReader(root=str(root), proc_root=str(tmp_path / "proc"), host_memory=8000),
+        )
+        await collector.reconcile()
+        await collector.sweep()
+        tasks = dict(collector._tasks)
+        await collector.api.aclose()
+        return collector, tasks
+
+    collector, tasks = asyncio.run(scenario())
+    assert tasks == {}
+    stats = collector.get(CONTAINER_ID)
+    assert stats["name"] == "web" and stats["restart_count"] == 1 and stats["uptime"] > 0
+    assert not any(p.endswith("/stats") for p in fake_docker.paths())
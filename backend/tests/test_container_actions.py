@@ -0,0 +1,65 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.container_actions import ContainerActions
+from src.docker_api import DockerEngineAPI
+from fake_docker import CONTAINERS
+
+
+def _actions(fake_docker, **kwargs):
+    return ContainerActions(api=DockerEngineAPI(socket_path=fake_docker.socket_path), **kwargs)
+
+
+def test_bulk_action_respects_parallelism(fake_docker):
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def restart(request):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        if request.path.startswith("/containers/missing"):
+            return 404, {"message": "No such container: missing"}
+        return None
+
+    fake_docker.route_prefix("POST", "/containers/", restart)
+    ids = [f"c{i}" for i in range(6)] + ["missing"]
+
+    async def scenario():
+        actions = _actions(fake_docker)
+        result = await actions.bulk("restart", container_ids=ids, timeout=3, parallelism=2)
+        await actions.api.aclose()
+        return result
+
+    result = asyncio.run(scenario())
+    assert active["peak"] == 2
+    assert (result["total"], result["succeeded"], result["failed"]) == (7, 6, 1)
+    assert [r["container_id"] for r in result["results"]] == ids
+    assert result["results"][-1]["status_code"] == 404
+    assert fake_docker.requests[0].param("t") == "3"
+
+
+def test_label_selector_and_validation(fake_docker):
+    fake_docker.route("GET", "/containers/json", lambda req: CONTAINERS if "shop" in req.param("filters", "") else [])
+    fake_docker.route_prefix("POST", "/containers/", lambda req: None)
+
+    async def scenario():
+        actions = _actions(fake_docker)
+        result = await actions.bulk("stop", labels=["com.docker.compose.project=shop"])
+        with pytest.raises(ValueError):
+            await actions.bulk("explode", container_ids=["x"])
+        with pytest.raises(ValueError):
+            await actions.bulk("stop")
+        await actions.api.aclose()
+        return result
+
+    result = asyncio.run(scenario())
+    assert [r["container_id"] for r in result["results"]] == [c["Id"] for c in CONTAINERS]
+    assert result["succeeded"] == 2
+    assert set(fake_docker.paths("POST")) == {f"/containers/{c['Id']}/stop" for c in CONTAINERS}
@@ -0,0 +1,73 @@
+import time
+
+from fastapi.testclient import TestClient
+import pytest
+
+from src.container_history import ContainerHistory, container_history
+from src.main import app
+
+CONTAINER_ID = "e" * 64
+
+
+def _stats(name="web", cpu=10.0, memory=1000):
+    return {"name": name, "cpu_percent": cpu, "memory_usage": memory, "memory_limit": 4000, "pids": 2}
+
+
+def test_record_throttles_and_trims():
+    history = ContainerHistory(retention=100, max_points=50, min_interval=2)
+    for t in range(0, 200):
+        history.record(CONTAINER_ID, 1000.0 + t, _stats(cpu=t))
+
+    timestamps = history._series[CONTAINER_ID].timestamps
+    assert len(timestamps) == 50  # каждая вторая точка, не больше max_points
+    assert timestamps[1] - timestamps[0] == 2
+    history.prune(2000.0)
+    assert history.stats() == {"containers": 0, "points": 0}
+
+
+def test_query_downsamples_range():
+    history = ContainerHistory(min_interval=1)
+    for t in range(60):
+        history.record(CONTAINER_ID, 6000.0 + t, _stats(memory=100 + t))
+
+    result = history.query(CONTAINER_ID, "memory_usage", since=6000.0, step=10)
+    assert result["count"] == 6
+    first = result["data_points"][0]
+    assert (first["timestamp"], first["value"], first["min"], first["max"], first["samples"]) == (6000.0, 104.5, 100, 109, 10)
+    assert result["statistics"]["last"] == 159
+
+    # Без step интервал подбирается по limit
+    assert history.query(CONTAINER_ID, "memory_usage", since=6000.0, limit=3)["count"] <= 3
+    with pytest.raises(ValueError):
+        history.query(CONTAINER_ID, "bogus", since=0)
+
+
+def test_rename_keeps_series_and_resolves_by_name_or_prefix():
+    history = ContainerHistory(min_interval=0)
+    history.record(CONTAINER_ID, 1.0, _stats(name="old"))
+    history.record(CONTAINER_ID, 2.0, _stats(name="new"))
+    assert history.resolve("new") == CONTAINER_ID
+    assert history.resolve(CONTAINER_ID[:12]) == CONTAINER_ID
+    assert history.resolve("old") is None
+    assert len(history._series[CONTAINER_ID].timestamps) == 2
+
+
+def test_history_endpoint():
+    now = time.time()
+    container_history.record(CONTAINER_ID, now - 30, _stats(cpu=20.0))
+    container_history.record(CONTAINER_ID, now - 10, _stats(cpu=40.0))
+    try:
+        with TestClient(app) as client:
+            response = client.get(f"/api/v1/docker/container/{CONTAINER_ID[:12]}/history", params={"timeframe": 60})
+            assert response.status_code == 200
+            body = response.json()
+            assert body["container_id"] == CONTAINER_ID
+            assert body["statistics"]["avg"] == 30.0
+            assert "time" in body["data_points"][0]
+            assert client.get("/api/v1/docker/container/missing/history").status_code == 404
+            assert client.get(f"/api/v1/docker/container/{CONTAINER_ID}/history", params={"metric": "x"}).status_code == 400
+            for limit in (0, -5, 10**9):
+                response = client.get(f"/api/v1/docker/container/{CONTAINER_ID}/history", params={"limit": limit})
+                assert response.status_code == 400
+    finally:
+        container_history._series.pop(CONTAINER_ID, None)
@@ -0,0 +1,59 @@
+import asyncio
+
+from src.container_stats import ContainerStatsCollector, compute_stats
+from src.docker_api import DockerEngineAPI
+
+RUNNING_ID = "a" * 64
+
+
+def _raw(total_usage, system_usage, pre_total, pre_system, rx=0, read=0):
+    return {
+        "id": RUNNING_ID,
+        "name": "/web",
+        "cpu_stats": {"cpu_usage": {"total_usage": total_usage}, "system_cpu_usage": system_usage, "online_cpus": 4},
+        "precpu_stats": {"cpu_usage": {"total_usage": pre_total}, "system_cpu_usage": pre_system},
+        "memory_stats": {"usage": 300, "limit": 1000, "stats": {"inactive_file": 100}},
+        "networks": {"eth0": {"rx_bytes": rx, "tx_bytes": 10}, "eth1": {"rx_bytes": rx, "tx_bytes": 0}},
+        "blkio_stats": {"io_service_bytes_recursive": [{"op": "read", "value": read}, {"op": "write", "value": 7}]},
+        "pids_stats": {"current": 3},
+    }
+
+
+def test_compute_stats_matches_docker_cli_formulas():
+    stats = compute_stats(_raw(200, 2000, 100, 1000, rx=500, read=40))
+    assert stats["cpu_percent"] == 40.0  # 100/1000 * 4 CPU
+    assert (stats["memory_usage"], stats["memory_percent"]) == (200, 20.0)
+    assert (stats["network_rx"], stats["network_tx"]) == (1000, 10)
+    assert (stats["block_read"], stats["block_write"]) == (40, 7)
+    assert stats["pids"] == 3 and stats["name"] == "web"
+
+    following = compute_stats(_raw(300, 3000, 200, 2000, rx=1500, read=40), prev=stats, elapsed=2.0)
+    assert following["network_rx_per_sec"] == 1000.0
+    assert following["block_read_per_sec"] == 0.0
+
+
+def test_collector_follows_running_containers(fake_docker):
+    def containers(request):
+        path = request.path
+        if path.endswith("/json"):
+            return {"Id": RUNNING_ID, "RestartCount": 2, "State": {"StartedAt": "2020-01-01T00:00:00.123456789Z"}}
+        return iter([_raw(100, 1000, 0, 0), _raw(200, 2000, 100, 1000, rx=100)])
+
+    fake_docker.route("GET", "/containers/json", [{"Id": RUNNING_ID, "State": "running"}])
+    fake_docker.route_prefix("GET", "/containers/", containers)
+
+    async def scenario():
+        collector = ContainerStatsCollector(api=DockerEngineAPI(socket_path=fake_docker.socket_path))
+        await collector.reconcile()
+        await asyncio.wait_for(asyncio.gather(*collector._tasks.values()), timeout=2)
+        stats = collector.get(RUNNING_ID)
+        await collector.stop()
+        await collector.api.aclose()
+        return stats
+
+    stats = asyncio.run(scenario())
+    assert stats["id"] == RUNNING_ID[:12]
+    assert stats["cpu_percent"] == 40.0
+    assert stats["restart_count"] == 2
+    assert stats["uptime"] > 0
+    assert fake_docker.requests[-1].param("stream") == "1"
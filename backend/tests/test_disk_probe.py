@@ -0,0 +1,59 @@
+import threading
+import time
+from collections import namedtuple
+
+from src.disk_probe import DiskUsageCollector
+
+Partition = namedtuple("Partition", "device mountpoint fstype")
+PARTITIONS = [Partition("/dev/sda1", "/", "ext4"), Partition("server:/share", "/mnt/nfs", "nfs")]
+
+
+def _collector(hang: threading.Event, calls: list, **kwargs):
+    def usage(mountpoint):
+        calls.append(mountpoint)
+        if mountpoint == "/mnt/nfs":
+            hang.wait()
+        return {"total": 100, "used": 40, "free": 60, "percent": 40.0}
+
+    return DiskUsageCollector(usage_fn=usage, partitions_fn=lambda: PARTITIONS, **kwargs)
+
+
+def test_hung_mount_degrades_only_its_entry():
+    hang, calls = threading.Event(), []
+    collector = _collector(hang, calls, timeout=0.1)
+
+    started = time.monotonic()
+    disks = {d["mountpoint"]: d for d in collector.collect()}
+    assert time.monotonic() - started < 1.0
+    assert disks["/"]["status"] == "ok" and disks["/"]["total"] == 100
+    assert disks["/mnt/nfs"]["status"] == "timeout" and disks["/mnt/nfs"]["total"] is None
+    assert collector.stats()["quarantined"] == ["/mnt/nfs"]
+
+    # Пока точка в карантине, новые проверки не запускаются
+    collector.collect()
+    assert calls.count("/mnt/nfs") == 1
+
+    # Поздний ответ выводит точку из карантина
+    hang.set()
+    time.sleep(0.05)
+    disks = {d["mountpoint"]: d for d in collector.collect()}
+    assert disks["/mnt/nfs"]["status"] == "ok"
+    assert collector.stats()["quarantined"] == []
+
+
+def test_results_are_cached_with_ttl():
+    hang, calls = threading.Event(), []
+    hang.set()
+    collector = _collector(hang, calls, ttl=60)
+    collector.collect()
+    collector.collect()
+    assert calls.count("/") == 1
+
+
+def test_errors_are_reported_per_mount():
+    def usage(mountpoint):
+        raise PermissionError("denied")
+
+    collector = DiskUsageCollector(usage_fn=usage, partitions_fn=lambda: PARTITIONS[:1])
+    (disk,) = collector.collect()
+    assert disk["status"] == "error" and disk["error"] == "denied"
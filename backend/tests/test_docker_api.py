@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import docker_simple, main
+from src.docker_api import DockerAPIError, DockerEngineAPI, DockerUnavailable
+from src.docker_simple import SimpleDockerMetrics
+
+
+def test_requests_reuse_one_connection(fake_docker):
+    api = DockerEngineAPI(socket_path=fake_docker.socket_path)
+    assert api.info()["ServerVersion"] == "24.0.7"
+    assert len(api.containers()) == 2
+    assert len(api.images()) == 2
+    api.close()
+    assert fake_docker.connections == 1
+    assert fake_docker.requests[1].param("all") == "1"
+
+
+def test_async_requests(fake_docker):
+    async def scenario():
+        api = DockerEngineAPI(socket_path=fake_docker.socket_path)
+        results = await asyncio.gather(api.aget("/info"), api.aget("/volumes"))
+        await api.aclose()
+        return results
+
+    info, volumes = asyncio.run(scenario())
+    assert info["NCPU"] == 4
+    assert volumes["Volumes"][0]["Name"] == "pgdata"
+
+
+def test_errors(fake_docker, tmp_path):
+    api = DockerEngineAPI(socket_path=fake_docker.socket_path)
+    with pytest.raises(DockerAPIError) as error:
+        api.get("/containers/missing/json")
+    assert error.value.status_code == 404
+    with pytest.raises(DockerUnavailable):
+        DockerEngineAPI(socket_path=str(tmp_path / "none.sock")).info()
+
+
+def test_metrics_via_engine_api(fake_docker, monkeypatch):
+    monkeypatch.setattr(docker_simple, "docker_api", DockerEngineAPI(socket_path=fake_docker.socket_path))
+    monkeypatch.setattr(SimpleDockerMetrics, "get_metrics_cli", staticmethod(lambda: pytest.fail("CLI used")))
+
+    metrics = SimpleDockerMetrics.get_metrics()
+    assert metrics["engine"]["version"] == "24.0.7"
+    assert metrics["engine"]["api_version"] == "1.43"
+    web = metrics["containers"][0]
+    assert web["names"] == ["web"] and web["created"] == 1700000000
+    assert web["ports"] == [{"IP": "0.0.0.0", "PrivatePort": 80, "PublicPort": 8080, "Type": "tcp"}]
+    assert metrics["images"][0]["repo_tags"] == ["nginx:latest"]
+    assert metrics["images"][0]["size"] == 187 * 1024 ** 2
+    assert metrics["volumes"][0]["name"] == "pgdata"
+
+
+def test_falls_back_to_cli_without_socket(monkeypatch, tmp_path):
+    monkeypatch.setattr(docker_simple, "docker_api", DockerEngineAPI(socket_path=str(tmp_path / "none.sock")))
+    monkeypatch.setattr(SimpleDockerMetrics, "get_metrics_cli", staticmethod(lambda: {"success": False, "error": "cli"}))
+    assert SimpleDockerMetrics.get_metrics()["error"] == "cli"
+
+
+def _cli_image(i):
+    return {"ID": f"{i:012x}", "Repository": f"app{i}", "Tag": "latest", "Size": "10MB", "CreatedAt": ""}
+
+
+def _inspect(i):
+    return {"Id": f"sha256:{i:012x}" + "0" * 52, "Size": 1000 + i, "VirtualSize": 1000 + i, "Created": "2024-01-01T00:00:00Z"}
+
+
+def test_cli_inspects_page_in_one_batch_and_caches(monkeypatch):
+    calls = []
+    listing = [_cli_image(i) for i in range(1, 401)]
+
+    def inspect_images(ids, timeout=15):
+        calls.append(list(ids))
+        return {"success": True, "data": [_inspect(int(i, 16)) for i in ids]}
+
+    monkeypatch.setattr(docker_simple, "_image_details_cache", {})
+    monkeypatch.setattr(docker_simple.DockerCLI, "inspect_images", staticmethod(inspect_images))
+    monkeypatch.setattr(docker_simple.DockerCLI, "get_info", staticmethod(lambda: {"success": True, "data": {}}))
+    monkeypatch.setattr(docker_simple.DockerCLI, "get_containers", staticmethod(lambda all=True: {"success": True, "data": []}))
+    monkeypatch.setattr(docker_simple.DockerCLI, "get_images", staticmethod(lambda: {"success": True, "data": [dict(i) for i in listing]}))
+    monkeypatch.setattr(docker_simple.DockerCLI, "get_networks", staticmethod(lambda: {"success": False}))
+    monkeypatch.setattr(docker_simple.DockerCLI, "get_volumes", staticmethod(lambda: {"success": False}))
+
+    metrics = SimpleDockerMetrics.get_metrics_cli()
+    assert len(calls) == 1 and len(calls[0]) == docker_simple.IMAGES_LIMIT
+    assert len(metrics["images"]) == docker_simple.IMAGES_LIMIT
+    assert metrics["images"][0]["size"] == 1001
+
+    SimpleDockerMetrics.get_metrics_cli()
+    assert len(calls) == 1  # Образы неизменяемы — повторный inspect не нужен
+
+
+def test_async_metrics_gather_concurrently_with_partial_results(fake_docker, monkeypatch):
+    import time as _time
+
+    def slow(payload, delay):
+        def handler(request):
+            _time.sleep(delay)
+            return payload
+        return handler
+
+    fake_docker.route("GET", "/images/json", slow(fake_docker.routes[("GET", "/images/json")], 0.3))
+    fake_docker.route("GET", "/networks", slow([], 0.3))
+    fake_docker.route("GET", "/volumes", slow({"Volumes": []}, 2.0))
+    monkeypatch.setattr(docker_simple, "docker_api", DockerEngineAPI(socket_path=fake_docker.socket_path))
+
+    async def scenario():
+        # Пока идёт сбор, event loop продолжает обслуживать другие задачи
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        started = _time.perf_counter()
+        metrics = await SimpleDockerMetrics.get_metrics_async(timeouts={"volumes": 0.5})
+        elapsed = _time.perf_counter() - started
+        task.cancel()
+        await docker_simple.docker_api.aclose()
+        return metrics, elapsed, ticks
+
+    metrics, elapsed, ticks = asyncio.run(scenario())
+    assert elapsed < 0.9  # images и networks шли параллельно, volumes ограничен таймаутом
+    assert ticks > 10
+    assert metrics["success"] and metrics["source"] == "api"
+    assert metrics["errors"] == {"volumes": "timed out"}
+    assert len(metrics["images"]) == 2 and metrics["volumes"] == []
+
+
+def test_shutdown_cancels_tasks_and_closes_async_client():
+    with TestClient(main.app):
+        tasks = list(main.background_tasks)
+        assert tasks
+    assert all(task.done() for task in tasks) and main.background_tasks == []
+    assert main.docker_api._async_client is None
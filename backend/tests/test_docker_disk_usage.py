@@ -0,0 +1,50 @@
+import asyncio
+
+from src.docker_api import DockerEngineAPI
+from src.docker_disk_usage import DockerDiskUsage
+from src.docker_simple import SimpleDockerMetrics
+from fake_docker import IMAGES
+
+SYSTEM_DF = {
+    "LayersSize": 500 * 1024 ** 2,
+    "Images": [
+        {"Id": IMAGES[0]["Id"], "Size": 187 * 1024 ** 2, "SharedSize": 80 * 1024 ** 2, "Containers": 1},
+        {"Id": IMAGES[1]["Id"], "Size": 412 * 1024 ** 2, "SharedSize": -1, "Containers": 0},
+    ],
+    "Containers": [{"Id": "a" * 64, "SizeRw": 4096, "SizeRootFs": 187 * 1024 ** 2}],
+    "Volumes": [{"Name": "pgdata", "UsageData": {"Size": 2048, "RefCount": 1}}],
+    "BuildCache": [{"ID": "x", "Size": 100}],
+}
+
+
+def test_refresh_and_join(fake_docker):
+    fake_docker.route("GET", "/system/df", SYSTEM_DF)
+
+    async def scenario():
+        usage = DockerDiskUsage(api=DockerEngineAPI(socket_path=fake_docker.socket_path))
+        await usage.refresh()
+        await usage.api.aclose()
+        return usage
+
+    usage = asyncio.run(scenario())
+    assert fake_docker.paths().count("/system/df") == 1
+    assert usage.totals["layers_size"] == 500 * 1024 ** 2
+    assert usage.totals["volumes_size"] == 2048 and usage.totals["build_cache_size"] == 100
+
+    images = [SimpleDockerMetrics.format_api_image(i) for i in IMAGES]
+    joined = usage.join_images(images)
+    assert joined[0]["shared_size"] == 80 * 1024 ** 2
+    assert joined[0]["unique_size"] == 107 * 1024 ** 2 and joined[0]["containers"] == 1
+    # SharedSize не вычислен: уникальный размер неизвестен
+    assert joined[1]["unique_size"] is None
+    assert "unique_size" not in images[0]  # исходные записи (кэш snapshot) не меняются
+
+    volumes = usage.join_volumes([SimpleDockerMetrics.format_api_volume({"Name": "pgdata"}), SimpleDockerMetrics.format_api_volume({"Name": "other"})])
+    assert volumes[0]["usage_data"] == {"Size": 2048, "RefCount": 1}
+    assert volumes[1]["usage_data"] is None
+
+
+def test_join_without_data_is_noop():
+    usage = DockerDiskUsage()
+    images = [{"id": "abc"}]
+    assert usage.join_images(images) is images
@@ -0,0 +1,79 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from src.docker_events import DockerEventLog, docker_events
+from src import main
+from src.main import app
+
+
+def _event(kind, action, actor_id, name="", nano=0):
+    return {
+        "Type": kind,
+        "Action": action,
+        "Actor": {"ID": actor_id, "Attributes": {"name": name}},
+        "time": nano // 10 ** 9,
+        "timeNano": nano,
+    }
+
+
+def test_cursor_filters_and_truncation():
+    log = DockerEventLog(capacity=3)
+    log.append(_event("container", "start", "a" * 64, "web", nano=1))
+    log.append(_event("container", "die", "a" * 64, "web", nano=2))
+    log.append(_event("container", "oom", "b" * 64, "db", nano=3))
+    log.append(_event("image", "pull", "nginx:latest", nano=4))
+
+    result = log.query(since=0)
+    assert [e["id"] for e in result["events"]] == [2, 3, 4]
+    assert result["truncated"] and result["cursor"] == 4
+
+    assert [e["action"] for e in log.query(since=2, types=["container"])["events"]] == ["oom"]
+    assert [e["id"] for e in log.query(actor="web")["events"]] == [2]
+    assert log.query(since=4)["events"] == [] and not log.query(since=4)["truncated"]
+    # Курсор из прошлой жизни журнала читается с начала
+    assert len(log.query(since=100)["events"]) == 3
+
+
+def test_action_prefix_and_duplicates():
+    log = DockerEventLog()
+    event = _event("container", "health_status: unhealthy", "a" * 64, nano=10)
+    assert log.append(event) is not None
+    assert log.append(event) is None  # повтор после переподключения
+    assert len(log.query(actions=["health_status"])["events"]) == 1
+
+
+def test_long_poll_wakes_on_new_event():
+    log = DockerEventLog()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.05, log.append, _event("container", "restart", "a" * 64, nano=1))
+        woke = await log.wait(0, timeout=2)
+        timed_out = await log.wait(log.cursor, timeout=0.05)
+        return woke, timed_out
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_events_endpoint():
+    cursor = docker_events.cursor
+    docker_events.append(_event("container", "oom", "c" * 64, "worker", nano=99))
+    with TestClient(app) as client:
+        body = client.get("/api/v1/docker/events", params={"since": cursor, "action": "oom,die"}).json()
+        assert body["count"] == 1 and body["events"][0]["actor"]["Attributes"]["name"] == "worker"
+
+        empty = client.get("/api/v1/docker/events", params={"since": body["cursor"], "wait": 0.1}).json()
+        assert empty["events"] == [] and empty["cursor"] == body["cursor"]
+
+        for limit in (0, 10**6):
+            assert client.get("/api/v1/docker/events", params={"limit": limit}).status_code == 400
+
+
+def test_events_long_poll_is_capped(monkeypatch):
+    monkeypatch.setattr(main, "EVENTS_MAX_WAIT", 0.2)
+    with TestClient(app) as client:
+        started = time.monotonic()
+        body = client.get("/api/v1/docker/events", params={"since": docker_events.cursor, "wait": 3600}).json()
+    assert body["events"] == [] and time.monotonic() - started < 2
@@ -0,0 +1,78 @@
+import pytest
+
+from fake_docker import CONTAINERS, IMAGES
+
+from src.docker_disk_usage import DockerDiskUsage
+from src.docker_inventory import DockerInventory, encode_cursor
+from src.docker_state import DockerStateCache
+
+
+def _inventory(image_count=120):
+    state = DockerStateCache()
+    state.containers = {c["Id"]: dict(c, Mounts=[{"Type": "volume", "Name": "pgdata"}] if c["State"] == "running" else []) for c in CONTAINERS}
+    state.images = {
+        f"sha256:{i:064x}": {
+            "Id": f"sha256:{i:064x}",
+            "RepoTags": [f"app{i}:latest"] if i % 10 else [],
+            "Created": 1700000000 + i,
+            "Size": (i * 7919) % 1000,
+            "Labels": {"team": "a" if i % 2 else "b"},
+        }
+        for i in range(image_count)
+    }
+    state.volumes = {n: {"Name": n, "CreatedAt": f"2024-01-0{i + 1}T00:00:00Z"} for i, n in enumerate(["pgdata", "cache"])}
+    state.ready = True
+    return state, DockerInventory(state=state, disk_usage=DockerDiskUsage())
+
+
+def test_cursor_pagination_is_complete_and_ordered():
+    _, inventory = _inventory()
+    seen, cursor = [], None
+    while True:
+        page = inventory.query("images", sort="size", order="desc", limit=25, cursor=cursor)
+        seen += [item["size"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == 120 and page["total"] == 120
+    assert seen == sorted(seen, reverse=True)
+
+
+def test_filters():
+    _, inventory = _inventory()
+    dangling = inventory.query("images", dangling=True, limit=500)
+    assert dangling["total"] == 12 and all(not i["repo_tags"] for i in dangling["items"])
+
+    labelled = inventory.query("images", labels=["team=a"], name="app1", sort="name", order="asc", limit=500)
+    assert all(i["labels"]["team"] == "a" and i["repo_tags"][0].startswith("app1") for i in labelled["items"])
+    tags = [i["repo_tags"][0] for i in labelled["items"]]
+    assert tags == sorted(tags) and "app1:latest" in tags
+
+    running = inventory.query("containers", state=["running"])
+    assert [c["names"] for c in running["items"]] == [["web"]]
+    assert [v["name"] for v in inventory.query("volumes", dangling=True)["items"]] == ["cache"]
+
+    with pytest.raises(ValueError):
+        inventory.query("networks", sort="size")
+    with pytest.raises(ValueError):
+        inventory.query("images", cursor="%%%")
+
+
+def test_cursor_rejects_other_sort_and_forged_values():
+    _, inventory = _inventory()
+    cursor = inventory.query("images", sort="name", order="asc", limit=5)["next_cursor"]
+    # Курсор по имени (строка) с сортировкой по размеру (число) раньше давал TypeError
+    for kwargs in ({"sort": "size", "order": "asc"}, {"sort": "name", "order": "desc"}):
+        with pytest.raises(ValueError):
+            inventory.query("images", cursor=cursor, **kwargs)
+    with pytest.raises(ValueError):
+        inventory.query("images", sort="size", cursor=encode_cursor(("big", "x"), "size", "desc"))
+
+
+def test_index_rebuilds_on_state_change():
+    state, inventory = _inventory(image_count=3)
+    assert inventory.query("images")["total"] == 3
+    state.images.update({i["Id"]: i for i in IMAGES})
+    assert inventory.query("images")["total"] == 3  # состояние не менялось — индекс тот же
+    state.revision += 1
+    assert inventory.query("images")["total"] == 5
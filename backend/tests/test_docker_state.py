@@ -0,0 +1,130 @@
+import asyncio
+import json
+import queue
+
+from fake_docker import CONTAINERS
+
+from src.docker_api import DockerEngineAPI
+from src.docker_state import DockerStateCache
+
+
+def _container(container_id, name, status="Up 1 second"):
+    return dict(CONTAINERS[0], Id=container_id, Names=[f"/{name}"], Status=status, Created=1800000000)
+
+
+def _event(kind, action, actor_id):
+    return {"Type": kind, "Action": action, "Actor": {"ID": actor_id, "Attributes": {}}, "time": 1800000000, "timeNano": 1800000000 * 10 ** 9}
+
+
+def _serve_state(fake_docker):
+    """Контейнеры и поток событий поддельного сервера управляются из теста"""
+    containers = {c["Id"]: c for c in CONTAINERS}
+    events = queue.Queue()
+
+    def list_containers(request):
+        filters = json.loads(request.param("filters") or "{}")
+        ids = filters.get("id")
+        return [c for c in containers.values() if ids is None or c["Id"] in ids]
+
+    def stream(request):
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            yield event
+
+    fake_docker.route("GET", "/containers/json", list_containers)
+    fake_docker.route("GET", "/events", lambda request: stream(request))
+    return containers, events
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_events_update_only_affected_entries(fake_docker):
+    containers, events = _serve_state(fake_docker)
+
+    async def scenario():
+        cache = DockerStateCache(api=DockerEngineAPI(socket_path=fake_docker.socket_path), flush_delay=0.01)
+        task = asyncio.create_task(cache.run())
+        await _wait_for(lambda: cache.ready)
+        assert [c["names"] for c in cache.snapshot()["containers"]] == [["db"], ["web"]]
+        requests_after_sync = len(fake_docker.requests)
+
+        new_id = "c" * 64
+        containers[new_id] = _container(new_id, "worker")
+        events.put(_event("container", "start", new_id))
+        del containers["b" * 64]
+        events.put(_event("container", "destroy", "b" * 64))
+        await _wait_for(lambda: new_id in cache.containers and "b" * 64 not in cache.containers)
+        await _wait_for(lambda: not cache._flush_task or cache._flush_task.done())
+
+        snapshot = cache.snapshot()
+        assert [c["names"] for c in snapshot["containers"]] == [["worker"], ["web"]]
+        assert [(e["type"], e["action"]) for e in snapshot["events"]] == [("container", "start"), ("container", "destroy")]
+        # Догрузка только затронутого контейнера (+ счётчики info), без полной синхронизации
+        refetched = [r.path for r in fake_docker.requests[requests_after_sync:]]
+        assert sorted(refetched) == ["/containers/json", "/info"]
+        (refetch,) = [r for r in fake_docker.requests[requests_after_sync:] if r.path == "/containers/json"]
+        assert json.loads(refetch.param("filters")) == {"id": [new_id]}
+        assert cache.resyncs == 1
+
+        events.put(None)  # Поток оборвался — кэш перестаёт считаться актуальным
+        await _wait_for(lambda: not cache.ready)
+        task.cancel()
+        await cache.api.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_prune_triggers_full_resync(fake_docker):
+    containers, events = _serve_state(fake_docker)
+
+    async def scenario():
+        cache = DockerStateCache(api=DockerEngineAPI(socket_path=fake_docker.socket_path), flush_delay=0.01)
+        task = asyncio.create_task(cache.run())
+        await _wait_for(lambda: cache.ready)
+        containers.clear()
+        events.put(_event("container", "prune", ""))
+        await _wait_for(lambda: cache.resyncs == 2)
+        assert cache.snapshot()["containers"] == []
+        events.put(None)
+        task.cancel()
+        await cache.api.aclose()
+
+    asyncio.run(scenario())
+
+
+def test_entries_marked_during_flush_are_flushed():
+    """Событие, пришедшее во время догрузки, не теряется до следующего события"""
+    first, second = "d" * 64, "e" * 64
+    containers = {first: _container(first, "first"), second: _container(second, "second")}
+    release = asyncio.Event()
+
+    class SlowAPI:
+        async def aget(self, path, **params):
+            if path == "/containers/json":
+                ids = json.loads(params["filters"])["id"]
+                if first in ids:
+                    await release.wait()  # первая догрузка "висит" на запросе к API
+                return [containers[i] for i in ids]
+            return {}
+
+    async def scenario():
+        cache = DockerStateCache(api=SlowAPI(), flush_delay=0.01)
+        cache.apply_event(_event("container", "start", first))
+        cache._schedule_flush()
+        await _wait_for(lambda: not cache._dirty_containers)  # пакет взят, запрос идёт
+
+        cache.apply_event(_event("container", "start", second))
+        cache._schedule_flush()
+        release.set()
+        await asyncio.wait_for(cache._flush_task, timeout=2)
+        return cache
+
+    cache = asyncio.run(scenario())
+    assert {first, second} <= cache.containers.keys()
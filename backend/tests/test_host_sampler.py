@@ -0,0 +1,40 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from src.host_sampler import HostSampler
+from src.main import app
+
+
+def test_sampler_thread_refreshes_latest_snapshot():
+    sampler = HostSampler(interval=0.05)
+    sampler.start()
+    try:
+        first = sampler.latest()
+        time.sleep(0.2)
+        second = sampler.latest()
+    finally:
+        sampler.stop()
+    assert second["timestamp"] > first["timestamp"]
+    assert {"cpu", "memory", "disk", "network"} <= set(second)
+
+
+def test_health_reads_sampled_snapshot():
+    with TestClient(app) as client:
+        started = time.perf_counter()
+        response = client.get("/api/v1/health")
+        elapsed = time.perf_counter() - started
+    assert response.status_code == 200
+    assert response.json()["system"]["sampled_at"] > 0
+    # Раньше psutil.cpu_percent(interval=0.1) держал обработчик минимум 100 мс
+    assert elapsed < 0.1
+
+
+def test_sampler_exposes_per_interface_and_disk_counters():
+    # Одинаковая форма снимка на быстром пути и на psutil
+    for use_procfs in (True, False):
+        sample = HostSampler(use_procfs=use_procfs).sample()
+        interfaces = sample["network"]["interfaces"]
+        assert interfaces and all({"bytes_sent", "packets_recv", "fifo_out"} <= set(c) for c in interfaces.values())
+        assert sample["network"]["bytes_sent"] == sum(c["bytes_sent"] for c in interfaces.values())
+        assert isinstance(sample["disk_io"], dict)
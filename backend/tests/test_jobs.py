@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from src.jobs import FAILED, SUCCEEDED, JobManager
+from src.main import app
+
+
+def test_dedup_and_bounded_workers():
+    manager = JobManager(max_workers=2)
+    active = {"now": 0, "peak": 0}
+
+    async def work(job):
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.05)
+        active["now"] -= 1
+        return job.params["n"]
+
+    async def scenario():
+        first, created = manager.submit("t", {"n": 0}, work)
+        again, created_again = manager.submit("t", {"n": 0}, work)
+        others = [manager.submit("t", {"n": n}, work)[0] for n in range(1, 5)]
+        await asyncio.gather(*list(manager._tasks.values()))
+        return first, created, again, created_again, others
+
+    first, created, again, created_again, others = asyncio.run(scenario())
+    assert created and not created_again and again is first
+    assert active["peak"] == 2
+    assert [j.result for j in others] == [1, 2, 3, 4]
+    assert all(j.status == SUCCEEDED and j.progress == 1.0 for j in others)
+
+
+def test_thread_job_progress_and_failure():
+    manager = JobManager()
+    progress = []
+
+    def work(job):
+        assert threading.current_thread() is not threading.main_thread()
+        manager.update(job, 0.5, "half")
+        time.sleep(0.05)
+        return "done"
+
+    def broken(job):
+        raise RuntimeError("boom")
+
+    async def scenario():
+        job, _ = manager.submit("thread", {}, work)
+        failed, _ = manager.submit("broken", {}, broken)
+        async for state in manager.watch(job, keepalive=1):
+            progress.append((state["status"], state["progress"], state["message"]))
+        await asyncio.gather(*list(manager._tasks.values()))
+        return job, failed
+
+    job, failed = asyncio.run(scenario())
+    assert job.result == "done"
+    assert ("running", 0.5, "half") in progress and progress[-1][0] == SUCCEEDED
+    assert failed.status == FAILED and failed.error == "boom"
+
+
+def test_error_results_fail_the_job():
+    manager = JobManager()
+    results = {
+        "single": {"status": "error", "container_id": "abc", "error": "No such container"},
+        "bulk_failed": {"action": "stop", "total": 2, "succeeded": 0, "failed": 2, "results": []},
+        "bulk_partial": {"action": "stop", "total": 2, "succeeded": 1, "failed": 1, "results": []},
+    }
+
+    async def scenario():
+        jobs = {kind: manager.submit(kind, {}, lambda job, r=result: r)[0] for kind, result in results.items()}
+        await asyncio.gather(*list(manager._tasks.values()))
+        return jobs
+
+    jobs = asyncio.run(scenario())
+    assert (jobs["single"].status, jobs["single"].error) == (FAILED, "No such container")
+    assert jobs["single"].result == results["single"]
+    assert jobs["bulk_failed"].status == FAILED and jobs["bulk_failed"].error == "all 2 operations failed"
+    # Частичный успех пакета — задача выполнена, детали в result
+    assert jobs["bulk_partial"].status == SUCCEEDED and jobs["bulk_partial"].error is None
+
+
+def test_finished_jobs_expire():
+    manager = JobManager(ttl=60)
+
+    async def scenario():
+        job, _ = manager.submit("t", {}, lambda job: None)
+        await asyncio.gather(*list(manager._tasks.values()))
+        return job
+
+    job = asyncio.run(scenario())
+    manager.prune(job.finished_at + 30)
+    assert manager.get(job.id) is job
+    manager.prune(job.finished_at + 61)
+    assert manager.get(job.id) is None
+
+
+def test_background_scan_endpoint():
+    with TestClient(app) as client:
+        response = client.post("/api/v1/docker/image/scan", params={"background": True}, json={"image_name": "nginx:latest"})
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+
+        stream = client.get(f"/api/v1/jobs/{job_id}/stream")
+        assert "event: job" in stream.text
+        job = client.get(f"/api/v1/jobs/{job_id}").json()
+        assert job["status"] == SUCCEEDED and job["kind"] == "image.scan"
+        assert job["result"]["image"] == "nginx:latest"
+        assert client.get("/api/v1/jobs", params={"kind": "image.scan"}).json()["count"] >= 1
+        assert client.get("/api/v1/jobs/missing").status_code == 404
+        for limit in (0, -1, 10**6):
+            assert client.get("/api/v1/jobs", params={"limit": limit}).status_code == 400
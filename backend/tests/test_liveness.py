@@ -0,0 +1,49 @@
+import pytest
+
+from src.liveness import ACTIVE, DEAD, STALE, LivenessTracker
+
+
+def test_active_stale_dead_transitions_and_events():
+    tracker = LivenessTracker(stale_after=60, dead_after=3600)
+    events = []
+    tracker.subscribe(lambda agent_id, old, new, last_seen: events.append((agent_id, old, new)))
+
+    tracker.heartbeat("a", now=0)
+    tracker.heartbeat("b", now=0)
+    tracker.heartbeat("a", now=50)
+
+    tracker.advance(now=70)
+    assert tracker.agents(ACTIVE) == ["a"]
+    assert tracker.agents(STALE) == ["b"]
+    assert tracker.counts() == {ACTIVE: 1, STALE: 1}
+
+    tracker.advance(now=3600)
+    assert tracker.agents() == ["a"]
+    assert tracker.counts() == {ACTIVE: 0, STALE: 1}
+    assert events == [
+        ("a", None, ACTIVE),
+        ("b", None, ACTIVE),
+        ("b", ACTIVE, STALE),
+        ("a", ACTIVE, STALE),
+        ("b", STALE, DEAD),
+    ]
+
+
+def test_stale_agent_comes_back():
+    tracker = LivenessTracker(stale_after=60, dead_after=3600)
+    tracker.heartbeat("a", now=0)
+    tracker.advance(now=61)
+    assert tracker.get("a")[0] == STALE
+
+    tracker.heartbeat("a", now=100)
+    assert tracker.get("a") == (ACTIVE, 100)
+    # Новый дедлайн отсчитывается от последнего heartbeat
+    tracker.advance(now=159)
+    assert tracker.get("a")[0] == ACTIVE
+    tracker.advance(now=160)
+    assert tracker.get("a")[0] == STALE
+
+
+def test_invalid_thresholds():
+    with pytest.raises(ValueError):
+        LivenessTracker(stale_after=60, dead_after=30)
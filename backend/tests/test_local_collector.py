@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from fastapi.testclient import TestClient
+
+from src.local_collector import LOCAL_AGENT_ID, LocalCollector
+from src.main import AgentMetrics, app
+
+
+def test_collect_produces_valid_agent_metrics():
+    snapshot = LocalCollector().collect()
+    metrics = AgentMetrics.model_validate(snapshot)
+    assert metrics.agent_id == LOCAL_AGENT_ID
+    assert metrics.processes and metrics.network.interfaces
+
+
+def test_collect_once_respects_budget():
+    class SlowCollector(LocalCollector):
+        def collect(self):
+            time.sleep(0.3)
+            return {}
+
+    async def scenario():
+        collector = SlowCollector(budget=0.05)
+        assert await collector.collect_once() is None
+        # Пока предыдущий сбор не завершился, новый не запускается
+        assert await collector.collect_once() is None
+        assert collector.skipped == 2
+
+    asyncio.run(scenario())
+
+
+def test_external_agent_cannot_use_reserved_id(make_metrics):
+    with TestClient(app) as client:
+        response = client.post("/api/v1/metrics", json=make_metrics(agent_id=LOCAL_AGENT_ID))
+        assert response.status_code == 400
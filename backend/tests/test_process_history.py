@@ -0,0 +1,58 @@
+from src.process_history import ProcessHistoryIndex
+import pytest
+
+
+def _proc(pid, name, create_time, cpu=1.0, rss=100, threads=1, fds=3):
+    return {
+        "pid": pid,
+        "name": name,
+        "create_time": create_time,
+        "cpu_percent": cpu,
+        "memory_rss": rss,
+        "num_threads": threads,
+        "num_fds": fds,
+    }
+
+
+def test_series_by_pid_and_name():
+    index = ProcessHistoryIndex()
+    index.update("a", 1000, [_proc(1, "nginx", 10, rss=100), _proc(2, "nginx", 20)])
+    index.update("a", 1010, [_proc(1, "nginx", 10, rss=200), _proc(2, "nginx", 20)])
+
+    (series,) = index.history("a", pid=1)
+    assert series["timestamps"] == [1000, 1010]
+    assert series["memory_rss"] == [100, 200]
+    assert len(index.history("a", name="nginx")) == 2
+    assert index.history("a", pid=1, since=1005)[0]["timestamps"] == [1010]
+
+
+def test_reused_pid_gets_new_series():
+    index = ProcessHistoryIndex()
+    index.update("a", 1000, [_proc(1, "old", 10)])
+    index.update("a", 1010, [_proc(1, "new", 1005)])
+
+    old, new = index.history("a", pid=1)
+    assert (old["name"], old["alive"], old["ended_at"]) == ("old", False, 1010)
+    assert (new["name"], new["alive"]) == ("new", True)
+
+
+def test_ended_process_expires():
+    index = ProcessHistoryIndex(expire_after=60)
+    index.update("a", 1000, [_proc(1, "job", 10)])
+    index.update("a", 1010, [])
+    assert index.history("a", name="job")
+    index.update("a", 1080, [])
+    assert index.history("a", name="job") == []
+    assert index.stats()["series"] == 0
+
+
+def test_points_are_bounded():
+    index = ProcessHistoryIndex(retention=100, max_points=5)
+    for t in range(0, 200, 10):
+        index.update("a", t, [_proc(1, "p", 0)])
+    assert index.history("a", pid=1)[0]["timestamps"] == [150, 160, 170, 180, 190]
+
+
+def test_requires_pid_or_name():
+    with pytest.raises(ValueError):
+        ProcessHistoryIndex().history("a")
@@ -0,0 +1,50 @@
+import asyncio
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from fastapi import HTTPException
+
+from src.process_table import ProcessTable
+
+
+def test_tracks_new_and_exited_processes():
+    table = ProcessTable(top_n=3)
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        snapshot = table.refresh()
+        pids = {row["pid"] for row in snapshot["processes"]}
+        assert child.pid in pids and os.getpid() in pids
+        assert len(snapshot["top_cpu"]) == 3
+    finally:
+        child.kill()
+        child.wait()
+
+    snapshot = table.refresh()
+    assert child.pid not in {row["pid"] for row in snapshot["processes"]}
+
+
+def test_cpu_percent_measured_between_refreshes():
+    table = ProcessTable()
+    table.refresh()
+    deadline = time.perf_counter() + 0.3
+    while time.perf_counter() < deadline:
+        pass
+    rows = {row["pid"]: row for row in table.refresh()["processes"]}
+    assert rows[os.getpid()]["cpu_percent"] > 10
+
+
+def test_system_endpoint_reads_table_off_event_loop(monkeypatch):
+    from src import main
+
+    loop_thread = threading.get_ident()
+    seen = []
+    monkeypatch.setattr(main.process_table, "latest", lambda: seen.append(threading.get_ident()) or {"count": 0, "processes": []})
+
+    try:
+        asyncio.run(main.get_system_info())
+    except HTTPException:
+        pass  # остальные разделы ответа зависят от окружения
+    assert seen and seen[0] != loop_thread
@@ -0,0 +1,105 @@
+from src.process_topk import ProcessTopKIndex
+import pytest
+
+
+def _proc(pid, name, cpu, rss=0, fds=0, cmd=None):
+    return {
+        "pid": pid,
+        "name": name,
+        "cpu_percent": cpu,
+        "memory_rss": rss,
+        "num_fds": fds,
+        "command_line": cmd or name,
+    }
+
+
+def test_latest_top_k_across_agents():
+    index = ProcessTopKIndex()
+    index.update("a", 1000, [_proc(1, "nginx", 5.0), _proc(2, "postgres", 40.0)])
+    index.update("b", 1000, [_proc(1, "java", 90.0), _proc(7, "nginx", 1.0)])
+
+    top = index.top(k=2)
+    assert [(p["agent_id"], p["name"]) for p in top] == [("b", "java"), ("a", "postgres")]
+
+
+def test_latest_replaces_previous_snapshot():
+    index = ProcessTopKIndex()
+    index.update("a", 1000, [_proc(1, "old", 99.0)])
+    index.update("a", 1010, [_proc(2, "new", 1.0)])
+
+    assert [p["name"] for p in index.top(k=5)] == ["new"]
+
+
+def test_group_by_name_sums_across_agents():
+    index = ProcessTopKIndex()
+    index.update("a", 1000, [_proc(1, "nginx", 5.0, rss=100), _proc(2, "nginx", 5.0, rss=100)])
+    index.update("b", 1000, [_proc(3, "nginx", 5.0, rss=100), _proc(4, "redis", 1.0, rss=1000)])
+
+    top = index.top(k=1, sort_by="cpu_percent", group_by="name")
+    assert top[0]["name"] == "nginx"
+    assert top[0]["cpu_percent"] == 15.0
+    assert top[0]["processes"] == 3
+    assert top[0]["agents"] == 2
+
+    top = index.top(k=1, sort_by="memory_rss", group_by="name")
+    assert top[0]["name"] == "redis"
+
+
+def test_window_average():
+    index = ProcessTopKIndex(bucket_seconds=60)
+    index.update("a", 1000, [_proc(1, "burst", 100.0), _proc(2, "steady", 40.0)])
+    index.update("a", 1010, [_proc(1, "burst", 0.0), _proc(2, "steady", 40.0)])
+    index.update("a", 1070, [_proc(1, "burst", 0.0), _proc(2, "steady", 40.0)])
+
+    top = index.top(k=2, window=600, now=1080)
+    assert [p["name"] for p in top] == ["steady", "burst"]
+    assert top[1]["cpu_percent"] == pytest.approx(33.33, abs=0.01)
+
+    # Старые корзины не попадают в короткое окно
+    top = index.top(k=2, window=30, now=1080)
+    assert top[1]["cpu_percent"] == 0.0
+
+
+def test_invalid_arguments():
+    index = ProcessTopKIndex()
+    with pytest.raises(ValueError):
+        index.top(sort_by="memory_vms")
+    with pytest.raises(ValueError):
+        index.top(group_by="user")
+
+
+def _fleet_snapshot(agent, ts):
+    # Детерминированный набор: процессы появляются, исчезают и меняют нагрузку
+    return [
+        _proc(pid, f"svc{pid % 4}", float((pid * 7 + ts // 10 + len(agent)) % 50), rss=pid * ts % 1000, fds=pid % 9)
+        for pid in range(1, 12)
+        if (pid + ts // 10) % 5
+    ]
+
+
+def test_maintained_results_match_fresh_index():
+    live = ProcessTopKIndex(bucket_seconds=60)
+    for ts in range(1000, 1400, 10):
+        for agent in ("a", "bb", "ccc"):
+            live.update(agent, ts, _fleet_snapshot(agent, ts))
+        # Запросы между приёмами: окна поддерживаются и сдвигаются инкрементально
+        for group_by in ("pid", "name"):
+            live.top(k=5, group_by=group_by, window=120, now=ts)
+            live.top(k=5, group_by=group_by, now=ts)
+    live.forget("bb")
+
+    fresh = ProcessTopKIndex(bucket_seconds=60)
+    for ts in range(1000, 1400, 10):
+        for agent in ("a", "ccc"):
+            fresh.update(agent, ts, _fleet_snapshot(agent, ts))
+
+    for window in (0, 120, 300):
+        for group_by in ("pid", "name", "command_line"):
+            for sort_by in ("cpu_percent", "memory_rss"):
+                args = dict(k=8, sort_by=sort_by, group_by=group_by, window=window, now=1390)
+                assert live.top(**args) == fresh.top(**args)
+
+
+def test_k_is_bounded():
+    with pytest.raises(ValueError):
+        ProcessTopKIndex().top(k=0)
@@ -0,0 +1,77 @@
+import os
+
+import psutil
+import pytest
+
+from src import procfs
+from src.procfs import ProcReader
+
+STAT = b"""cpu  100 0 50 800 50 0 0 0 0 0
+cpu0 60 0 20 400 20 0 0 0 0 0
+cpu1 40 0 30 400 30 0 0 0 0 0
+intr 1 2 3
+"""
+MEMINFO = b"""MemTotal:        1000 kB
+MemFree:          200 kB
+MemAvailable:     500 kB
+Buffers:           50 kB
+Cached:           100 kB
+SwapTotal:        400 kB
+SwapFree:         300 kB
+SReclaimable:      50 kB
+HugePages_Total:    0
+"""
+NET_DEV = b"""Inter-|   Receive                                                |  Transmit
+ face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets errs drop fifo colls carrier compressed
+    lo: 1000 10 0 0 0 0 0 0 1000 10 0 0 0 0 0 0
+  eth0: 5000 50 1 2 0 0 0 0 3000 30 3 4 0 0 0 0
+"""
+DISKSTATS = b"""   7       0 loop0 1 0 2 0 0 0 0 0 0 0 0 0 0 0 0 0 0
+   8       0 sda 10 0 20 5 30 0 40 7 0 9 12 0 0 0 0 0 0
+"""
+
+
+def test_parsers():
+    assert ProcReader.parse_stat(STAT) == [(150, 1000), (80, 500), (70, 500)]
+
+    mem = ProcReader.parse_meminfo(MEMINFO)
+    assert mem["MemTotal"] == 1000 * 1024
+    assert mem["HugePages_Total"] == 0
+
+    nics = ProcReader.parse_net_dev(NET_DEV)
+    assert nics["eth0"]["bytes_recv"] == 5000 and nics["eth0"]["drop_out"] == 4
+
+    disks = ProcReader.parse_diskstats(DISKSTATS)
+    assert list(disks) == ["sda"]
+    assert disks["sda"]["read_bytes"] == 20 * 512 and disks["sda"]["write_bytes"] == 40 * 512
+
+
+def test_reader_on_fake_proc_tree(tmp_path):
+    for name, content in (("stat", STAT), ("meminfo", MEMINFO), ("diskstats", DISKSTATS), ("loadavg", b"0.5 0.25 0.1 1/2 3\n")):
+        (tmp_path / name).write_bytes(content)
+    (tmp_path / "net").mkdir()
+    (tmp_path / "net" / "dev").write_bytes(NET_DEV)
+
+    reader = ProcReader(root=str(tmp_path), buffer_size=16)
+    first = reader.sample()
+    assert first["cpu"]["percent"] == 0.0
+    assert first["memory"]["used"] == (1000 - 200 - 50 - 150) * 1024
+    assert first["memory"]["percent"] == 50.0
+    assert first["memory"]["swap_used"] == 100 * 1024
+    assert first["network"]["bytes_sent"] == 4000
+    assert first["cpu"]["load_avg"] == (0.5, 0.25, 0.1)
+
+    (tmp_path / "stat").write_bytes(STAT.replace(b"cpu  100 0 50 800", b"cpu  200 0 50 900"))
+    assert reader.sample()["cpu"]["percent"] == 50.0
+    reader.close()
+
+
+@pytest.mark.skipif(not procfs.available(), reason="requires Linux /proc")
+def test_matches_psutil_on_this_host():
+    reader = ProcReader()
+    sample = reader.sample()
+    reader.close()
+    assert sample["memory"]["total"] == psutil.virtual_memory().total
+    assert len(sample["cpu"]["per_core"]) == psutil.cpu_count()
+    usage = procfs.statvfs_usage("/")
+    assert usage["total"] == psutil.disk_usage("/").total
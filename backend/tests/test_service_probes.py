@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import httpx
+
+from src.service_probes import ServiceProber
+
+
+def _prober(handler, **kwargs):
+    prober = ServiceProber(
+        services=[("up", "http://up.test/"), ("down", "http://down.test/"), ("slow", "http://slow.test/")],
+        check_docker=False,
+        **kwargs,
+    )
+    prober._client = httpx.AsyncClient(transport=httpx.MockTransport(handler), timeout=prober.timeout)
+    return prober
+
+
+async def _handler(request):
+    if request.url.host == "down.test":
+        raise httpx.ConnectError("refused")
+    if request.url.host == "slow.test":
+        await asyncio.sleep(0.2)
+        return httpx.Response(503)
+    return httpx.Response(200)
+
+
+def test_probes_run_concurrently():
+    async def scenario():
+        prober = _prober(_handler)
+        prober._client_loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        results, _ = await prober.results()
+        elapsed = time.perf_counter() - started
+        await prober.close()
+        return results, elapsed
+
+    results, elapsed = asyncio.run(scenario())
+    assert results["up"]["status"] == "running"
+    assert results["down"] == {"status": "not_available", "status_code": None}
+    assert results["slow"]["status"] == "error"
+    assert elapsed < 0.5
+
+
+def test_stale_cache_is_served_while_refreshing():
+    calls = []
+
+    async def handler(request):
+        calls.append(request.url.host)
+        return httpx.Response(200)
+
+    async def scenario():
+        prober = _prober(handler, ttl=0.0)
+        prober._client_loop = asyncio.get_running_loop()
+        first, first_at = await prober.results()
+        second, second_at = await prober.results()  # отдаётся кэш, обновление в фоне
+        await prober._refreshing
+        await prober.close()
+        return first_at, second_at
+
+    first_at, second_at = asyncio.run(scenario())
+    assert first_at == second_at
+    assert len(calls) == 6
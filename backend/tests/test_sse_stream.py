@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from src.sse_stream import SSEHub, SSESubscriber, diff, flatten
+
+
+def _parse(frame):
+    event, data = frame.strip().split("\n")
+    return event[len("event: "):], json.loads(data[len("data: "):])
+
+
+def test_flatten_and_diff():
+    previous = flatten({"cpu": {"usage": 10}, "disks": [{"used_percent": 50}], "received_at": "x"})
+    current = flatten({"cpu": {"usage": 20}, "disks": [{"used_percent": 50}]})
+    assert "received_at" not in previous
+    assert diff(previous, current) == {"cpu.usage": 20}
+
+
+def test_stream_sends_snapshot_then_changed_fields_only():
+    async def scenario():
+        hub = SSEHub()
+        hub.publish("a", {"timestamp": 1, "cpu": {"usage": 10}, "memory": {"used_percent": 40}})
+        stream = hub.stream(SSESubscriber(max_rate=1000))
+        assert await stream.__anext__() == "retry: 3000\n\n"
+
+        event, data = _parse(await stream.__anext__())
+        assert event == "snapshot"
+        assert data["changes"] == {"timestamp": 1, "cpu.usage": 10, "memory.used_percent": 40}
+
+        hub.publish("a", {"timestamp": 2, "cpu": {"usage": 15}, "memory": {"used_percent": 40}})
+        event, data = _parse(await stream.__anext__())
+        assert event == "update"
+        assert data["changes"] == {"timestamp": 2, "cpu.usage": 15}
+        await stream.aclose()
+        assert not hub.subscribers
+
+    asyncio.run(scenario())
+
+
+def test_filters_and_coalescing():
+    async def scenario():
+        hub = SSEHub()
+        subscriber = SSESubscriber(agent_ids={"a"}, labels={"env": "prod"}, paths=["disks[*].used_percent"])
+        hub.subscribe(subscriber)
+
+        hub.publish("b", {"disks": [{"used_percent": 1}]}, labels={"env": "prod"})
+        hub.publish("a", {"disks": [{"used_percent": 1}]}, labels={"env": "dev"})
+        assert subscriber.pending == {}
+
+        for value in (10, 20, 30):
+            hub.publish("a", {"timestamp": value, "cpu": {"usage": value}, "disks": [{"used_percent": value, "free": value}]},
+                        labels={"env": "prod"})
+        assert subscriber.drain() == {"a": {"timestamp": 30, "disks[0].used_percent": 30}}
+        assert subscriber.coalesced == 2
+
+    asyncio.run(scenario())
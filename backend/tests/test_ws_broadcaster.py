@@ -0,0 +1,43 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.ws_broadcaster import MetricsBroadcaster, Subscriber
+
+
+def test_publish_serializes_once_and_shares_frame():
+    async def scenario():
+        broadcaster = MetricsBroadcaster()
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        broadcaster.publish_metrics("a", {"cpu": {"usage": 1.0}})
+        assert first.take() is second.take()
+
+    asyncio.run(scenario())
+
+
+def test_slow_subscriber_coalesces_and_drops():
+    async def scenario():
+        subscriber = Subscriber(max_pending=2)
+        subscriber.offer("a", "a1")
+        subscriber.offer("a", "a2")
+        subscriber.offer("b", "b1")
+        subscriber.offer("c", "c1")
+        assert subscriber.coalesced == 1
+        assert subscriber.dropped == 1
+        assert [subscriber.take(), subscriber.take(), subscriber.take()] == ["b1", "c1", None]
+
+    asyncio.run(scenario())
+
+
+def test_websocket_receives_metrics_update(make_metrics):
+    with TestClient(app) as client:
+        with client.websocket_connect("/ws/metrics") as ws:
+            response = client.post("/api/v1/metrics", json=make_metrics(agent_id="ws-agent", cpu=42.0))
+            assert response.status_code == 200
+
+            while True:
+                message = ws.receive_json()
+                if message["type"] == "metrics_update" and "ws-agent" in message["data"]:
+                    break
+            assert message["data"]["ws-agent"]["cpu"]["usage"] == 42.0
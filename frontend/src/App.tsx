@@ -1,4 +1,4 @@
-import { useEffect, useState, useCallback } from 'react'
+import { useEffect, useState, useCallback, useRef } from 'react'
 import axios from 'axios'
 import { 
   Cpu, 
@@ -743,6 +743,7 @@ function App() {
   const [darkMode, setDarkMode] = useState(true)
   const [agentMetrics, setAgentMetrics] = useState<Record<string, AgentMetrics>>({})
   const [agentsList, setAgentsList] = useState<string[]>([])
+  const wsConnectedRef = useRef(false)
   const [showAgents, setShowAgents] = useState(true)
   const [dockerMetrics, setDockerMetrics] = useState<any>(null)
 
@@ -818,6 +819,23 @@ function App() {
     }
   }, [])
 
+  // Push-обновления метрик агентов: пока WebSocket открыт, опрос /metrics/latest не нужен
+  useEffect(() => {
+    if (!autoRefresh) return
+
+    const ws = api.connectAgentWebSocket((agentId, metrics) => {
+      setAgentMetrics(prev => ({ ...prev, [agentId]: metrics }))
+      setAgentsList(prev => (prev.includes(agentId) ? prev : [...prev, agentId]))
+    })
+    ws.addEventListener('open', () => { wsConnectedRef.current = true })
+    ws.addEventListener('close', () => { wsConnectedRef.current = false })
+
+    return () => {
+      wsConnectedRef.current = false
+      ws.close()
+    }
+  }, [autoRefresh])
+
   useEffect(() => {
     fetchHealth()
     fetchAgentMetrics()
@@ -828,7 +846,9 @@ function App() {
     if (autoRefresh) {
       interval = window.setInterval(() => {
         fetchHealth()
-        fetchAgentMetrics()
+        if (!wsConnectedRef.current) {
+          fetchAgentMetrics()
+        }
         fetchDockerMetrics()
       }, REFRESH_INTERVAL)
     }